@@ -0,0 +1,236 @@
+from __future__ import annotations
+import hashlib
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Satu laluan: aksara pertama -> senarai semakan (prefix/panjang dahulu,
+# kemudian checksum). Calon yang lulus checksum disusun di hadapan calon
+# yang hanya lulus bentuk (SOL tiada checksum).
+
+BTC_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+XRP_ALPHABET = "rpshnaf39wBUDNEGHJKLM4PQRST7VWXYZ2bcdeCg65jkm8oFqi1tuvAxyz"
+BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+BECH32_CONST = 1
+BECH32M_CONST = 0x2BC830A3
+CACHE_SIZE = 65536
+
+_BTC_INDEX = {c: i for i, c in enumerate(BTC_ALPHABET)}
+_XRP_INDEX = {c: i for i, c in enumerate(XRP_ALPHABET)}
+_BECH32_INDEX = {c: i for i, c in enumerate(BECH32_CHARSET)}
+_HEX = frozenset("0123456789abcdefABCDEF")
+
+# ---------- Base58 / Base58Check ----------
+def b58decode(s: str, index: Dict[str, int] = _BTC_INDEX) -> Optional[bytes]:
+    n = 0
+    leading = 0
+    for c in s:
+        v = index.get(c)
+        if v is None:
+            return None
+        if n == 0 and v == 0:
+            leading += 1
+        n = n * 58 + v
+    body = n.to_bytes((n.bit_length() + 7) // 8, "big") if n else b""
+    return b"\0" * leading + body
+
+def b58check_payload(s: str, index: Dict[str, int] = _BTC_INDEX) -> Optional[bytes]:
+    raw = b58decode(s, index)
+    if raw is None or len(raw) < 5:
+        return None
+    payload, checksum = raw[:-4], raw[-4:]
+    if hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4] != checksum:
+        return None
+    return payload
+
+# ---------- bech32 / bech32m (BIP-173 / BIP-350) ----------
+def _bech32_polymod(values: Iterable[int]) -> int:
+    gen = (0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3)
+    chk = 1
+    for v in values:
+        top = chk >> 25
+        chk = (chk & 0x1FFFFFF) << 5 ^ v
+        for i in range(5):
+            if (top >> i) & 1:
+                chk ^= gen[i]
+    return chk
+
+def _convertbits(data: Iterable[int], frombits: int, tobits: int) -> Optional[List[int]]:
+    acc = bits = 0
+    out = []
+    maxv = (1 << tobits) - 1
+    for v in data:
+        acc = (acc << frombits) | v
+        bits += frombits
+        while bits >= tobits:
+            bits -= tobits
+            out.append((acc >> bits) & maxv)
+    if bits >= frombits or ((acc << (tobits - bits)) & maxv):
+        return None
+    return out
+
+def segwit_decode(address: str, hrp: str = "bc") -> Optional[Tuple[int, bytes]]:
+    if address.lower() != address and address.upper() != address:
+        return None
+    address = address.lower()
+    pos = address.rfind("1")
+    if address[:pos] != hrp or pos + 7 > len(address) or len(address) > 90:
+        return None
+    data = []
+    for c in address[pos + 1:]:
+        v = _BECH32_INDEX.get(c)
+        if v is None:
+            return None
+        data.append(v)
+    const = _bech32_polymod([ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp] + data)
+    if const not in (BECH32_CONST, BECH32M_CONST) or not data[:-6]:
+        return None
+    version = data[0]
+    program = _convertbits(data[1:-6], 5, 8)
+    if version > 16 or program is None or not 2 <= len(program) <= 40:
+        return None
+    # v0 wajib bech32 (20/32 bait), v1+ wajib bech32m
+    if version == 0 and (const != BECH32_CONST or len(program) not in (20, 32)):
+        return None
+    if version != 0 and const != BECH32M_CONST:
+        return None
+    return version, bytes(program)
+
+# ---------- Keccak-256 (EIP-55) ----------
+try:
+    from Crypto.Hash import keccak as _pycryptodome_keccak
+except ImportError:
+    _pycryptodome_keccak = None
+
+_KECCAK_RC = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+]
+_KECCAK_ROT = [
+    [0, 36, 3, 41, 18], [1, 44, 10, 45, 2], [62, 6, 43, 15, 61],
+    [28, 55, 25, 21, 56], [27, 20, 39, 8, 14],
+]
+_MASK64 = (1 << 64) - 1
+# Lane disimpan rata: indeks x + 5*y. Langkah rho+pi dipratentukan sebagai
+# (sumber, destinasi, putaran) supaya gelung dalam tiada aritmetik indeks.
+_RHO_PI = [(x + 5 * y, y + 5 * ((2 * x + 3 * y) % 5), _KECCAK_ROT[x][y]) for x in range(5) for y in range(5)]
+
+def _keccak_f(a: List[int]) -> None:
+    mask = _MASK64
+    b = [0] * 25
+    for rc in _KECCAK_RC:
+        c0 = a[0] ^ a[5] ^ a[10] ^ a[15] ^ a[20]
+        c1 = a[1] ^ a[6] ^ a[11] ^ a[16] ^ a[21]
+        c2 = a[2] ^ a[7] ^ a[12] ^ a[17] ^ a[22]
+        c3 = a[3] ^ a[8] ^ a[13] ^ a[18] ^ a[23]
+        c4 = a[4] ^ a[9] ^ a[14] ^ a[19] ^ a[24]
+        d = (c4 ^ ((c1 << 1 | c1 >> 63) & mask), c0 ^ ((c2 << 1 | c2 >> 63) & mask),
+             c1 ^ ((c3 << 1 | c3 >> 63) & mask), c2 ^ ((c4 << 1 | c4 >> 63) & mask),
+             c3 ^ ((c0 << 1 | c0 >> 63) & mask))
+        for src, dst, r in _RHO_PI:
+            v = a[src] ^ d[src % 5]
+            b[dst] = ((v << r) | (v >> (64 - r))) & mask if r else v
+        for y in range(0, 25, 5):
+            b0, b1, b2, b3, b4 = b[y], b[y + 1], b[y + 2], b[y + 3], b[y + 4]
+            a[y] = b0 ^ (~b1 & b2)
+            a[y + 1] = b1 ^ (~b2 & b3)
+            a[y + 2] = b2 ^ (~b3 & b4)
+            a[y + 3] = b3 ^ (~b4 & b0)
+            a[y + 4] = b4 ^ (~b0 & b1)
+        a[0] ^= rc
+
+def keccak256(data: bytes) -> bytes:
+    if _pycryptodome_keccak is not None:
+        return _pycryptodome_keccak.new(digest_bits=256, data=data).digest()
+    rate = 136
+    padded = bytearray(data) + b"\x01" + b"\0" * ((-len(data) - 1) % rate)
+    padded[-1] |= 0x80
+    a = [0] * 25
+    for off in range(0, len(padded), rate):
+        for i in range(rate // 8):
+            a[i] ^= int.from_bytes(padded[off + 8 * i:off + 8 * i + 8], "little")
+        _keccak_f(a)
+    return b"".join(a[i].to_bytes(8, "little") for i in range(4))
+
+def eip55_checksum(address: str) -> str:
+    body = address[2:].lower()
+    digest = keccak256(body.encode("ascii")).hex()
+    return "0x" + "".join(c.upper() if int(h, 16) >= 8 else c for c, h in zip(body, digest))
+
+# ---------- semakan per chain: pulangkan (lulus, checksum disahkan) ----------
+Check = Tuple[bool, bool]
+_FAIL: Check = (False, False)
+
+def _check_eth(a: str) -> Check:
+    if len(a) != 42 or a[1] != "x" or not _HEX.issuperset(a[2:]):
+        return _FAIL
+    body = a[2:]
+    if body.islower() or body.isupper() or body.isdigit():
+        return True, False
+    return (True, True) if eip55_checksum(a) == a else _FAIL
+
+def _check_btc_base58(a: str) -> Check:
+    if not 26 <= len(a) <= 35:
+        return _FAIL
+    payload = b58check_payload(a)
+    return (True, True) if payload is not None and len(payload) == 21 and payload[0] in (0x00, 0x05) else _FAIL
+
+def _check_btc_bech32(a: str) -> Check:
+    return (True, True) if segwit_decode(a) is not None else _FAIL
+
+def _check_tron(a: str) -> Check:
+    if len(a) != 34:
+        return _FAIL
+    payload = b58check_payload(a)
+    return (True, True) if payload is not None and len(payload) == 21 and payload[0] == 0x41 else _FAIL
+
+def _check_xrp(a: str) -> Check:
+    if not 25 <= len(a) <= 35:
+        return _FAIL
+    payload = b58check_payload(a, _XRP_INDEX)
+    return (True, True) if payload is not None and len(payload) == 21 and payload[0] == 0x00 else _FAIL
+
+def _check_sol(a: str) -> Check:
+    # Kunci awam ed25519 32 bait; tiada checksum
+    if not 32 <= len(a) <= 44:
+        return _FAIL
+    raw = b58decode(a)
+    return (True, False) if raw is not None and len(raw) == 32 else _FAIL
+
+def _check_hbar(a: str) -> Check:
+    return (True, False) if a.startswith("0.0.") and a[4:].isdigit() else _FAIL
+
+_DISPATCH: Dict[str, List[Tuple[str, Callable[[str], Check]]]] = {
+    "0": [("eth", _check_eth), ("hbar", _check_hbar)],
+    "1": [("btc", _check_btc_base58), ("sol", _check_sol)],
+    "3": [("btc", _check_btc_base58), ("sol", _check_sol)],
+    "b": [("btc", _check_btc_bech32), ("sol", _check_sol)],
+    "B": [("btc", _check_btc_bech32), ("sol", _check_sol)],
+    "T": [("tron", _check_tron), ("sol", _check_sol)],
+    "r": [("xrp", _check_xrp), ("sol", _check_sol)],
+}
+_DEFAULT = [("sol", _check_sol)]
+
+@lru_cache(maxsize=CACHE_SIZE)
+def candidates(address: str) -> Tuple[str, ...]:
+    """Senarai chain yang mungkin, disusun: checksum disahkan dahulu."""
+    if not address or len(address) > 100:
+        return ()
+    verified: List[str] = []
+    shaped: List[str] = []
+    for chain, check in _DISPATCH.get(address[0], _DEFAULT):
+        ok, checksum = check(address)
+        if ok:
+            (verified if checksum else shaped).append(chain)
+    return tuple(verified + shaped)
+
+def classify(address: str) -> Optional[str]:
+    found = candidates(address)
+    return found[0] if found else None
+
+def classify_batch(addresses: Iterable[str]) -> List[Optional[str]]:
+    # Alamat berulang dalam senarai besar dijawab dari cache candidates()
+    return [found[0] if found else None for found in map(candidates, addresses)]
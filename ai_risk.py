@@ -1,36 +1,72 @@
+from enum import IntFlag
+
+class RiskReason(IntFlag):
+    LOW_BALANCE = 1
+    FEW_TX = 2
+    NO_AGE = 4
+    STRONG_BALANCE = 8
+    LOW_RISK = 16
+    MEDIUM_RISK = 32
+    HIGH_RISK = 64
+
+REASON_TEXT = {
+    RiskReason.LOW_BALANCE: "⚠️ Very low balance",
+    RiskReason.FEW_TX: "⚠️ Few transactions",
+    RiskReason.NO_AGE: "⚠️ No age data / too new",
+    RiskReason.STRONG_BALANCE: "✅ Strong wallet balance",
+    RiskReason.LOW_RISK: "✅ Low Risk Wallet",
+    RiskReason.MEDIUM_RISK: "⚠️ Medium Risk Wallet",
+    RiskReason.HIGH_RISK: "🚨 High Risk Wallet",
+}
+
+# Bit biasa (int) di laluan panas; operasi IntFlag jauh lebih perlahan
+_LOW_BALANCE = int(RiskReason.LOW_BALANCE)
+_FEW_TX = int(RiskReason.FEW_TX)
+_NO_AGE = int(RiskReason.NO_AGE)
+_STRONG_BALANCE = int(RiskReason.STRONG_BALANCE)
+_LOW_RISK = int(RiskReason.LOW_RISK)
+_MEDIUM_RISK = int(RiskReason.MEDIUM_RISK)
+_HIGH_RISK = int(RiskReason.HIGH_RISK)
+_REASON_BITS = [(int(flag), text) for flag, text in REASON_TEXT.items()]
+
+def reasons_text(mask):
+    # Tukar bitmask RiskReason kepada teks (ikut susunan bit)
+    mask = int(mask)
+    return "; ".join(text for bit, text in _REASON_BITS if mask & bit)
+
 def calculate_risk_score(data):
     score = 100
-    reasons = []
+    reasons = 0
 
     # Penalti jika balance rendah
     if data["balance"] < 0.01:
         score -= 30
-        reasons.append("⚠️ Very low balance")
+        reasons |= _LOW_BALANCE
 
     # Penalti jika tx rendah
     if data["tx_count"] < 3:
         score -= 20
-        reasons.append("⚠️ Few transactions")
+        reasons |= _FEW_TX
 
     # Penalti jika wallet baru
     if data["wallet_age"] == 0:
         score -= 20
-        reasons.append("⚠️ No age data / too new")
+        reasons |= _NO_AGE
 
     # Bonus jika balance tinggi
     if data["balance"] > 1:
         score += 10
-        reasons.append("✅ Strong wallet balance")
+        reasons |= _STRONG_BALANCE
 
     # Hadkan antara 0 hingga 100
     score = max(0, min(100, score))
 
     # Penilaian akhir
     if score >= 80:
-        reasons.append("✅ Low Risk Wallet")
+        reasons |= _LOW_RISK
     elif score >= 50:
-        reasons.append("⚠️ Medium Risk Wallet")
+        reasons |= _MEDIUM_RISK
     else:
-        reasons.append("🚨 High Risk Wallet")
+        reasons |= _HIGH_RISK
 
-    return score, "; ".join(reasons)
+    return score, reasons_text(reasons)
@@ -1,59 +1,252 @@
 from __future__ import annotations
+import contextvars
+import json
+import os
+import threading
 import time
-import re
-from typing import Any, Dict, List, Optional
-import requests
-from urllib.parse import quote
-from requests.exceptions import RequestException, Timeout
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+from urllib.parse import quote, urljoin
+from requests.exceptions import HTTPError, RequestException, Timeout
+from address_classifier import classify as classify_address
+from evm_networks import EvmNetwork, load_networks, units as evm_units
+import http_replay
+from history_sync import AddressHistory, build_history_store, merge as merge_history
+from http_pool import get_session, pool_stats, resolve_url
+from metrics import REGISTRY as METRICS, count_error, observe_fallback, observe_provider, track_lookup
+from pagination import PageCount, count_items, with_query
+from provider_health import ERROR, OK, REGISTRY as PROVIDER_HEALTH, TIMEOUT, provider_key
+from rate_limit import LIMITER as RATE_LIMITER
+from result_cache import SingleFlight, build_result_cache
+from subqueries import SubQueries, Values
+from wallet_result import Result, TxSummary, WalletResult, as_dict, epoch
 
 API_REJECTED = "❌ API rejected"
 NETWORK_TIMEOUT = 12
+SOL_SIGNATURE_LIMIT = 1000
+# Hedging: tunggu HEDGE_DELAY saat sebelum lancar provider backup,
+# dan hadkan satu lookup kepada REQUEST_DEADLINE saat secara keseluruhan.
+HEDGE_DELAY = float(os.environ.get("HEDGE_DELAY", "0.75"))
+REQUEST_DEADLINE = float(os.environ.get("REQUEST_DEADLINE", "15"))
+HEDGE_WORKERS = int(os.environ.get("HEDGE_WORKERS", "32"))
 
-WALLET_PATTERNS = [
-    re.compile(r"^0x[a-fA-F0-9]{40}$"),                     # ETH/EVM
-    re.compile(r"^T[1-9A-HJ-NP-Za-km-z]{33}$"),             # TRON
-    re.compile(r"^(?:bc1|[13])[a-zA-HJ-NP-Z0-9]{25,62}$"),  # BTC
-    re.compile(r"^r[1-9A-HJ-NP-Za-km-z]{24,}$"),            # XRP
-    re.compile(r"^[1-9A-HJ-NP-Za-km-z]{44}$"),              # SOL
-    re.compile(r"^0\.0\.\d+$"),                             # HBAR
-]
+# Attempt yang kalah dan sudah berjalan tidak boleh dihentikan (requests
+# menyekat): ia terus memegang thread _HEDGE_POOL sehingga timeoutnya. Had
+# attempt serentak per host supaya host yang lambat tidak menghabiskan pool.
+HEDGE_MAX_PER_HOST = int(os.environ.get("HEDGE_MAX_PER_HOST", "8"))
+
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="hedge")
+# Lookup per rangkaian EVM dan sub-query pilihan berjalan di pool berasingan:
+# setiap satu mungkin menunggu _hedged yang guna _HEDGE_POOL (elak deadlock pool yang sama)
+LOOKUP_WORKERS = int(os.environ.get("LOOKUP_WORKERS", "32"))
+_LOOKUP_POOL = ThreadPoolExecutor(max_workers=LOOKUP_WORKERS, thread_name_prefix="lookup")
+_GET_FLIGHT = SingleFlight()
+
+T = TypeVar("T")
 
 def is_wallet_format_ok(addr: str) -> bool:
-    return any(p.fullmatch(addr) for p in WALLET_PATTERNS)
+    # Bentuk + checksum (Base58Check, bech32/bech32m, EIP-55) dalam satu laluan
+    return classify_address(addr) is not None
+
+def _deadline(budget: float | None = None) -> float:
+    return time.monotonic() + (REQUEST_DEADLINE if budget is None else budget)
+
+def _call_timeout(deadline: float) -> float:
+    # Timeout satu panggilan = baki bajet, tidak lebih dari NETWORK_TIMEOUT
+    return max(0.1, min(NETWORK_TIMEOUT, deadline - time.monotonic()))
+
+class _HostSlots:
+    # Kiraan attempt _hedged yang sedang berjalan per host provider
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._busy: Dict[str, int] = {}
 
-def _http_get_json(url: str, params: dict | None = None, timeout: int = NETWORK_TIMEOUT) -> Dict[str, Any]:
+    def acquire(self, host: str, force: bool = False) -> bool:
+        with self._lock:
+            n = self._busy.get(host, 0)
+            if n >= self.limit and not force:
+                return False
+            self._busy[host] = n + 1
+            return True
+
+    def release(self, host: str) -> None:
+        with self._lock:
+            n = self._busy.get(host, 0) - 1
+            if n > 0:
+                self._busy[host] = n
+            else:
+                self._busy.pop(host, None)
+
+    def busy(self, host: str) -> int:
+        with self._lock:
+            return self._busy.get(host, 0)
+
+_HEDGE_SLOTS = _HostSlots(HEDGE_MAX_PER_HOST)
+
+def _hedged(endpoints: List[Any], attempt: Callable[[Any, float], Optional[T]],
+            deadline: float | None = None, hedge_delay: float | None = None) -> Optional[T]:
+    # Provider pertama terus jalan; backup dilancar setiap hedge_delay saat
+    # (atau serta-merta bila satu attempt gagal). Jawapan sah (bukan None)
+    # pertama menang. Attempt yang belum mula dibatalkan; yang sedang berjalan
+    # tidak dapat dihentikan dan dibiar tamat (terikat timeout), jadi backup ke
+    # host yang sudah ada HEDGE_MAX_PER_HOST attempt berjalan dilangkau.
+    deadline = _deadline() if deadline is None else deadline
+    hedge_delay = HEDGE_DELAY if hedge_delay is None else hedge_delay
+    queue = PROVIDER_HEALTH.rank(list(endpoints))
+    pending: set = set()
+    launched: Dict[Any, int] = {}
+    next_launch = time.monotonic()
     try:
-        r = requests.get(url, params=params, timeout=timeout)
-        r.raise_for_status()
-        return r.json()
-    except Timeout as e:
-        return {"error": f"timeout: {e}"}
-    except RequestException as e:
-        return {"error": f"network: {e}"}
-    except ValueError as e:
-        return {"error": f"json: {e}"}
+        while queue or pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if queue and (not pending or now >= next_launch):
+                endpoint = queue.pop(0)
+                # Attempt pertama (tiada yang berjalan) sentiasa dilancar
+                host = provider_key(str(endpoint))
+                if not _HEDGE_SLOTS.acquire(host, force=not pending):
+                    continue
+                # Circuit breaker terbuka: langkau, kecuali ia peluang terakhir. allow()
+                # hanya selepas slot diperoleh: ia menuntut slot probe half-open.
+                if not PROVIDER_HEALTH.allow(endpoint) and (queue or pending):
+                    _HEDGE_SLOTS.release(host)
+                    continue
+                # Salin contextvars (chain / trace) ke thread pool
+                fut = _HEDGE_POOL.submit(contextvars.copy_context().run, attempt, endpoint, _call_timeout(deadline))
+                fut.add_done_callback(lambda _, host=host: _HEDGE_SLOTS.release(host))
+                launched[fut] = len(launched)
+                pending.add(fut)
+                next_launch = now + hedge_delay
+                continue
+            wait_for = deadline - now
+            if queue:
+                wait_for = min(wait_for, next_launch - now)
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    result = fut.result()
+                except Exception:
+                    result = None
+                if result is not None:
+                    observe_fallback(launched[fut])
+                    return result
+            if done:
+                next_launch = time.monotonic()
+    finally:
+        for fut in pending:
+            fut.cancel()
+    return None
 
-def _http_post_json(url: str, payload: dict, timeout: int = NETWORK_TIMEOUT) -> Dict[str, Any]:
+def _http_error_outcome(e: HTTPError) -> str:
+    # 4xx biasa (cth. address tiada) bermakna provider masih sihat; 429/5xx tidak
+    status = e.response.status_code if e.response is not None else 0
+    return ERROR if status in (408, 429) or status >= 500 else OK
+
+def _http_get_json(url: str, params: dict | None = None, timeout: float = NETWORK_TIMEOUT) -> Dict[str, Any]:
+    # GET serentak ke URL yang sama dikongsi: hanya satu request ke provider
+    # Pemanggil yang menumpang menunggu paling lama timeout sendiri, bukan timeout leader
+    key = (url, tuple(sorted((params or {}).items())))
     try:
-        r = requests.post(url, json=payload, timeout=timeout)
+        return _GET_FLIGHT.do(key, lambda: _http_request_json("GET", url, timeout, params=params), timeout)
+    except TimeoutError:
+        count_error(url, "timeout")
+        return {"error": "timeout: coalesced request still running"}
+
+def _http_post_json(url: str, payload: Any, timeout: float = NETWORK_TIMEOUT) -> Any:
+    return _http_request_json("POST", url, timeout, json=payload)
+
+def _replay_request_json(replayer: http_replay.Replayer, method: str, url: str,
+                         timeout: float, **kwargs: Any) -> Any:
+    # Main semula dari arkib: tiada rangkaian dan tiada token bucket, tetapi
+    # parse JSON, health dan metrics sama seperti jawapan sebenar
+    started = time.monotonic()
+    hit = replayer.lookup(http_replay.request_key(method, url, kwargs.get("params"), kwargs.get("json")))
+    data: Any = None
+    error: Optional[str] = None
+    outcome = OK
+    if hit is None:
+        outcome, error = ERROR, "network: replay miss"
+    else:
+        kind, raw, latency = hit
+        delay = replayer.delay(latency)
+        if delay > timeout:
+            time.sleep(timeout)
+            outcome, error = TIMEOUT, "timeout: replayed latency exceeds timeout"
+        else:
+            if delay:
+                time.sleep(delay)
+            if kind == http_replay.KIND_ERROR:
+                error = raw.decode("utf-8")
+                outcome = TIMEOUT if error.startswith("timeout") else ERROR
+            else:
+                try:
+                    data = json.loads(raw)
+                except ValueError as e:
+                    outcome, error = ERROR, f"json: {e}"
+    elapsed = time.monotonic() - started
+    PROVIDER_HEALTH.record(url, elapsed, outcome)
+    observe_provider(url, elapsed, error)
+    return {"error": error} if error else data
+
+def _http_request_json(method: str, url: str, timeout: float, **kwargs: Any) -> Any:
+    replayer = http_replay.REPLAYER
+    if replayer is not None:
+        return _replay_request_json(replayer, method, url, timeout, **kwargs)
+    # Beratur di token bucket provider dahulu; baki timeout untuk request itu sendiri
+    queued = time.monotonic()
+    if not RATE_LIMITER.acquire(url, timeout):
+        count_error(url, "rate_limited")
+        return {"error": "rate_limited: provider quota"}
+    started = time.monotonic()
+    timeout = max(0.1, timeout - (started - queued))
+    data: Any = None
+    raw = b""
+    error: Optional[str] = None
+    outcome = OK
+    try:
+        target = resolve_url(url)
+        r = get_session(target).request(method, target, timeout=timeout, **kwargs)
         r.raise_for_status()
-        return r.json()
+        raw = r.content
+        data = json.loads(raw)
     except Timeout as e:
-        return {"error": f"timeout: {e}"}
+        outcome, error = TIMEOUT, f"timeout: {e}"
+    except HTTPError as e:
+        if e.response is not None and e.response.status_code == 429:
+            RATE_LIMITER.penalize(url, e.response.headers.get("Retry-After"))
+        outcome, error = _http_error_outcome(e), f"network: {e}"
     except RequestException as e:
-        return {"error": f"network: {e}"}
+        outcome, error = ERROR, f"network: {e}"
     except ValueError as e:
-        return {"error": f"json: {e}"}
+        outcome, error = ERROR, f"json: {e}"
+    elapsed = time.monotonic() - started
+    recorder = http_replay.RECORDER
+    if recorder is not None:
+        key = http_replay.request_key(method, url, kwargs.get("params"), kwargs.get("json"))
+        recorder.record(key, elapsed, raw if error is None else None, error)
+    PROVIDER_HEALTH.record(url, elapsed, outcome)
+    observe_provider(url, elapsed, error)
+    return {"error": error} if error else data
 
-def _wei_to_eth(wei_hex_or_int: Any) -> float:
-    try:
-        if isinstance(wei_hex_or_int, str):
-            val = int(wei_hex_or_int, 16)
-        else:
-            val = int(wei_hex_or_int)
-        return val / 10**18
-    except Exception:
-        return 0.0
+def _http_post_batch(url: str, calls: Sequence[Tuple[str, list]],
+                     timeout: float = NETWORK_TIMEOUT) -> List[Dict[str, Any]]:
+    # JSON-RPC batch: satu POST, jawapan dipadankan semula ikut id.
+    # Pulangkan satu dict per call (ikut susunan `calls`).
+    payload = [{"jsonrpc": "2.0", "id": i, "method": m, "params": p} for i, (m, p) in enumerate(calls)]
+    res = _http_post_json(url, payload, timeout=timeout)
+    if not isinstance(res, list):
+        err = res.get("error") if isinstance(res, dict) else None
+        return [{"error": err or "batch: unexpected response"}] * len(calls)
+    by_id = {item.get("id"): item for item in res if isinstance(item, dict)}
+    return [by_id.get(i) or {"error": "batch: missing response"} for i in range(len(calls))]
+
+def _attempt_get(url: str, timeout: float) -> Optional[Dict[str, Any]]:
+    data = _http_get_json(url, timeout=timeout)
+    if data and not data.get("error"):
+        return data
+    return None
 
 def _lamports_to_sol(lamports: int) -> float:
     try:
@@ -81,77 +274,179 @@ def _score(ai_inputs: Dict[str, Any]) -> int:
 
 def _normalize_result(address: str, network: str, balance: float = 0.0,
                       tx_count: int = 0, wallet_age_days: float = 0.0,
-                      last5tx: Optional[List[Dict[str, Any]]] = None,
-                      reason: str = "OK") -> Dict[str, Any]:
-    return {
-        "address": address,
-        "network": network,
-        "balance": balance,
-        "tx_count": tx_count,
-        "wallet_age": round(wallet_age_days, 2) if wallet_age_days else 0,
-        "last5tx": last5tx or [],
-        "reason": reason,
-        "ai_score": _score({"tx_count": tx_count, "wallet_age": wallet_age_days, "balance": balance})
-    }
+                      last5tx: Sequence[TxSummary] = (),
+                      reason: str = "OK") -> WalletResult:
+    # Bentuk dict (untuk templat / JSON) dibina oleh as_dict() di sempadan
+    return WalletResult(
+        address, network,
+        balance=balance,
+        tx_count=tx_count,
+        wallet_age=round(wallet_age_days, 2) if wallet_age_days else 0,
+        last5tx=last5tx,
+        reason=reason,
+        ai_score=_score({"tx_count": tx_count, "wallet_age": wallet_age_days, "balance": balance}),
+    )
+
+# ---------- History (sync berperingkat) ----------
+HISTORY = build_history_store()
+
+def _history(chain: str, address: str) -> Optional[AddressHistory]:
+    if HISTORY is None:
+        return None
+    try:
+        return HISTORY.get(chain, address)
+    except Exception:
+        return None
+
+def _record_history(chain: str, address: str, prev: Optional[AddressHistory], persist: bool = True,
+                    **delta: Any) -> AddressHistory:
+    # persist=False: hasil separa, gabung dalam memori sahaja (hasil penuh disimpan kemudian)
+    if HISTORY is not None and persist:
+        try:
+            return HISTORY.apply(chain, address, **delta)
+        except Exception:
+            pass
+    return merge_history(prev, **delta)
+
+def _reset_history(chain: str, address: str, prev: AddressHistory) -> AddressHistory:
+    # Rekod basi: buang cursor dan kiraan, kekalkan first_seen (tx pertama tetap sah)
+    if HISTORY is not None:
+        try:
+            HISTORY.forget(chain, address)
+            if prev.first_seen:
+                return HISTORY.apply(chain, address, first_seen=prev.first_seen)
+        except Exception:
+            pass
+    return AddressHistory(first_seen=prev.first_seen)
+
+def _with_history(result: Result, hist: Optional[AddressHistory]) -> Result:
+    # Guna kiraan tx & umur dari stor sejarah (skor dikira semula)
+    if hist is None or not isinstance(result, WalletResult):
+        return result
+    return _normalize_result(
+        result.address, result.network, balance=result.balance,
+        tx_count=max(result.tx_count, hist.tx_count), wallet_age_days=hist.age_days(),
+        last5tx=result.last5tx, reason=result.reason
+    )
+
+def _lower_bound(result: Result, tx_count: int) -> Result:
+    if not isinstance(result, WalletResult):
+        return result
+    out = _normalize_result(
+        result.address, result.network, balance=result.balance,
+        tx_count=max(result.tx_count, tx_count), wallet_age_days=result.wallet_age,
+        last5tx=result.last5tx, reason=result.reason
+    )
+    out.tx_count_is_lower_bound = True
+    return out
+
+# ---------- Hasil separa ----------
+def _store_completed(chain: str, address: str, result: Result) -> None:
+    # RESULT_CACHE dibaca semasa panggilan (boleh diganti/dimatikan selepas import)
+    if RESULT_CACHE is not None:
+        RESULT_CACHE.store(chain, address, result)
+
+def _partial(chain: str, address: str, values: Values, incomplete: List[str],
+             complete: Callable[[Callable[[Values], None]], None],
+             build: Callable[[Values, bool], Result]) -> Result:
+    """Bina hasil dari sub-query yang siap; jika ada yang belum, tandakan
+    medan dalam "incomplete_fields" dan lengkapkan di background."""
+    if not incomplete:
+        return build(values, True)
+    result = build(values, False)
+    if isinstance(result, WalletResult):
+        result.incomplete_fields = tuple(incomplete)
+    complete(lambda full: _store_completed(chain, address, build(full, True)))
+    return result
+
+def _get_until(url: str, deadline: float) -> Dict[str, Any]:
+    return _http_get_json(url, timeout=_call_timeout(deadline))
 
 # ---------- ETH / EVM ----------
-def fetch_eth(address: str) -> Dict[str, Any]:
-    rpcs = [
-        "https://cloudflare-eth.com",
-        "https://rpc.ankr.com/eth",
-        "https://ethereum.publicnode.com",
-        "https://rpc.flashbots.net",
-        "https://eth-mainnet.public.blastapi.io",
+EVM_NETWORKS = load_networks()
+
+def _eth_calls(address: str) -> List[Tuple[str, list]]:
+    return [
+        ("eth_getBalance", [address, "latest"]),
+        ("eth_getTransactionCount", [address, "latest"]),
     ]
-    nonce = None
-    balance = None
-    for rpc in rpcs:
-        r1 = _http_post_json(rpc, {"jsonrpc":"2.0","id":1,"method":"eth_getBalance","params":[address, "latest"]})
-        if not r1.get("error") and r1.get("result"):
-            balance = _wei_to_eth(r1["result"])
-        r2 = _http_post_json(rpc, {"jsonrpc":"2.0","id":2,"method":"eth_getTransactionCount","params":[address, "latest"]})
-        if not r2.get("error") and r2.get("result"):
-            try:
-                nonce = int(r2["result"], 16)
-            except Exception:
-                pass
-        if balance is not None and nonce is not None:
-            break
-    if balance is None and nonce is None:
+
+def _parse_eth(r1: Dict[str, Any], r2: Dict[str, Any], decimals: int = 18) -> Optional[Tuple[float, int]]:
+    if r1.get("error") or not r1.get("result") or r2.get("error") or not r2.get("result"):
+        return None
+    try:
+        return evm_units(r1["result"], decimals), int(r2["result"], 16)
+    except Exception:
+        return None
+
+def _evm_result(address: str, found: Sequence[Tuple[EvmNetwork, Optional[Tuple[float, int]]]]) -> Result:
+    # Baki / nonce yang dipaparkan (dan dieksport) dari rangkaian utama sahaja,
+    # supaya unit tidak bercampur. Jumlah merentasi rangkaian hanya input skor
+    # risiko; pecahan per rangkaian dalam "evm_networks".
+    (primary, main), others = found[0], found[1:]
+    if main is None:
         return {"status": "0", "message": API_REJECTED}
-    return _normalize_result(address, "Ethereum", balance=balance or 0.0, tx_count=nonce or 0)
+    result = _normalize_result(address, primary.name, balance=main[0], tx_count=main[1])
+    if not others:
+        return result
+    breakdown = []
+    balance, tx_count = 0.0, 0
+    for network, res in found:
+        entry: Dict[str, Any] = {"network": network.key, "name": network.name,
+                                 "chain_id": network.chain_id, "symbol": network.symbol}
+        if res is None:
+            entry["error"] = "unavailable"
+        else:
+            entry["balance"], entry["tx_count"] = res
+            balance += res[0]
+            tx_count += res[1]
+        breakdown.append(entry)
+    result.ai_score = _score({"tx_count": tx_count, "wallet_age": result.wallet_age, "balance": balance})
+    result.evm_networks = tuple(breakdown)
+    return result
+
+def _evm_lookup(network: EvmNetwork, address: str, deadline: float) -> Optional[Tuple[float, int]]:
+    def attempt(rpc: str, timeout: float):
+        return _parse_eth(*_http_post_batch(rpc, _eth_calls(address), timeout=timeout), network.decimals)
+    return _hedged(list(network.rpcs), attempt, deadline)
+
+def fetch_eth(address: str) -> Result:
+    # Rangkaian opt-in (EVM_NETWORKS) serentak dengan satu deadline: masa ~ rangkaian paling perlahan
+    deadline = _deadline()
+    if len(EVM_NETWORKS) == 1:
+        return _evm_result(address, [(EVM_NETWORKS[0], _evm_lookup(EVM_NETWORKS[0], address, deadline))])
+    futures = [(n, _LOOKUP_POOL.submit(contextvars.copy_context().run, _evm_lookup, n, address, deadline))
+               for n in EVM_NETWORKS]
+    found = []
+    for network, fut in futures:
+        try:
+            found.append((network, fut.result()))
+        except Exception:
+            found.append((network, None))
+    return _evm_result(address, found)
 
 # ---------- BTC ----------
-def fetch_btc(address: str) -> Dict[str, Any]:
+def _btc_endpoints(address: str) -> List[str]:
     safe_addr = quote(address, safe="")
-    endpoints = [
+    return [
         f"https://blockchain.info/rawaddr/{safe_addr}",
         f"https://blockstream.info/api/address/{safe_addr}",
         f"https://api.blockcypher.com/v1/btc/main/addrs/{safe_addr}",
         f"https://api.blockchair.com/bitcoin/dashboards/address/{safe_addr}",
         f"https://mempool.space/api/address/{safe_addr}",
     ]
-    data = {}
-    for url in endpoints:
-        data = _http_get_json(url)
-        if data and not data.get("error"):
-            break
-    if not data or data.get("error"):
-        return {"status": "0", "message": API_REJECTED}
 
+def _parse_btc(address: str, data: Dict[str, Any]) -> WalletResult:
     balance = 0.0
     tx_count = 0
-    last5tx = []
+    last5tx: List[TxSummary] = []
 
     if "final_balance" in data or "n_tx" in data:
         balance = (data.get("final_balance") or 0)/1e8
         tx_count = data.get("n_tx") or 0
         txs = data.get("txs") or []
         for tx in txs[:5]:
-            h = tx.get("hash") or ""
-            t = tx.get("time")
-            if t: t = time.strftime("%Y-%m-%d %H:%M", time.gmtime(t))
-            last5tx.append({"hash": h, "time": t, "from": "-", "to": "-", "value": "-"})
+            last5tx.append(TxSummary(tx.get("hash") or "", epoch(tx.get("time"))))
     elif "chain_stats" in data:
         bal_sat = (data["chain_stats"].get("funded_txo_sum", 0) - data["chain_stats"].get("spent_txo_sum", 0))
         balance = max(0, bal_sat)/1e8
@@ -166,27 +461,61 @@ def fetch_btc(address: str) -> Dict[str, Any]:
 
     return _normalize_result(address, "Bitcoin", balance=balance, tx_count=tx_count, last5tx=last5tx)
 
+def _btc_times(data: Dict[str, Any]) -> List[int]:
+    return [int(t) for t in (tx.get("time") for tx in (data or {}).get("txs") or [] if isinstance(tx, dict))
+            if isinstance(t, (int, float))]
+
+def _btc_oldest_url(address: str, prev: Optional[AddressHistory], data: Dict[str, Any], n_tx: int) -> Optional[str]:
+    # blockchain.info susun tx terbaru dahulu: offset n_tx-1 = tx pertama (sekali sahaja per address)
+    if (prev and prev.first_seen) or not n_tx or len(_btc_times(data)) >= n_tx:
+        return None
+    return f"https://blockchain.info/rawaddr/{quote(address, safe='')}?limit=1&offset={n_tx - 1}"
+
+def _btc_history(address: str, result: WalletResult, data: Dict[str, Any],
+                 prev: Optional[AddressHistory], oldest: Optional[Dict[str, Any]], persist: bool = True) -> Result:
+    since = prev.last_seen if prev else 0
+    times = _btc_times(data)
+    # Semua tx ada dalam jawapan ringkasan: tx tertua = first-seen, tiada request tambahan
+    oldest_times = times if times and len(times) >= result.tx_count else _btc_times(oldest)
+    hist = _record_history(
+        "btc", address, prev, persist,
+        new_times=[t for t in times if t > since],
+        tx_count=result.tx_count,
+        first_seen=min(oldest_times) if oldest_times else None,
+    )
+    return _with_history(result, hist)
+
+def fetch_btc(address: str) -> Result:
+    deadline = _deadline()
+    plan = SubQueries(_LOOKUP_POOL, deadline)
+    data = _hedged(_btc_endpoints(address), _attempt_get, deadline)
+    if not data:
+        return {"status": "0", "message": API_REJECTED}
+    result = _parse_btc(address, data)
+    prev = _history("btc", address)
+    # Pilihan: tx tertua (umur) bergantung pada n_tx dari jawapan wajib
+    oldest_url = _btc_oldest_url(address, prev, data, result.tx_count)
+    if oldest_url:
+        plan.optional("oldest", ("wallet_age",), _get_until, oldest_url, deadline)
+    values, incomplete = plan.collect()
+    return _partial("btc", address, values, incomplete, plan.complete,
+                    lambda v, persist: _btc_history(address, result, data, prev, v.get("oldest"), persist))
+
 # ---------- TRON ----------
-def fetch_tron(address: str) -> Dict[str, Any]:
+def _tron_endpoints(address: str) -> List[str]:
     safe_addr = quote(address, safe="")
-    endpoints = [
+    return [
         f"https://apilist.tronscanapi.com/api/account?address={safe_addr}",
         f"https://apilist.trongrid.io/v1/accounts/{safe_addr}",
         f"https://apilist.tronscan.org/api/account?address={safe_addr}",
         f"https://apilist.trongrid.io/v1/accounts/{safe_addr}/transactions",
         f"https://tronscan.org/api/accountv2?address={safe_addr}",
     ]
-    data = {}
-    for url in endpoints:
-        data = _http_get_json(url)
-        if data and not data.get("error"):
-            break
-    if not data or data.get("error"):
-        return {"status": "0", "message": API_REJECTED}
 
+def _parse_tron(address: str, data: Dict[str, Any]) -> WalletResult:
     balance = 0.0
     tx_count = 0
-    last5tx: List[Dict[str, Any]] = []
+    last5tx: List[TxSummary] = []
 
     if "balance" in data:
         try:
@@ -201,99 +530,184 @@ def fetch_tron(address: str) -> Dict[str, Any]:
     if isinstance(txs, list):
         tx_count = len(txs)
         for tx in txs[:5]:
-            h = tx.get("hash") or tx.get("txID") or ""
-            t = tx.get("timestamp") or tx.get("block_timestamp")
-            if t and isinstance(t, (int, float)):
-                t = time.strftime("%Y-%m-%d %H:%M", time.gmtime(t/1000 if t > 1e12 else t))
-            last5tx.append({
-                "hash": h,
-                "time": t,
-                "from": tx.get("transferFromAddress") or "-",
-                "to": tx.get("transferToAddress") or "-",
-                "value": tx.get("amount") or "-"
-            })
+            last5tx.append(TxSummary(
+                tx.get("hash") or tx.get("txID") or "",
+                epoch(tx.get("timestamp") or tx.get("block_timestamp"), millis=True),
+                tx.get("transferFromAddress") or "-",
+                tx.get("transferToAddress") or "-",
+                tx.get("amount") or "-",
+            ))
 
     return _normalize_result(address, "TRON", balance=balance, tx_count=tx_count, last5tx=last5tx)
 
+TRONGRID_PAGE_LIMIT = 200
+
+def _tron_txs_url(address: str, min_timestamp: int = 0, oldest: bool = False) -> str:
+    url = f"https://apilist.trongrid.io/v1/accounts/{quote(address, safe='')}/transactions?only_confirmed=true"
+    if oldest:
+        return url + "&order_by=block_timestamp,asc&limit=1"
+    url += f"&limit={TRONGRID_PAGE_LIMIT}"
+    return url + f"&min_timestamp={min_timestamp}" if min_timestamp else url
+
+def _tron_times_ms(data: Optional[Dict[str, Any]]) -> Optional[List[int]]:
+    if not data or not isinstance(data.get("data"), list):
+        return None
+    return [int(t) for t in (tx.get("block_timestamp") for tx in data["data"] if isinstance(tx, dict))
+            if isinstance(t, (int, float))]
+
+def _trongrid_next(page: Dict[str, Any], url: str) -> Optional[str]:
+    fingerprint = (page.get("meta") or {}).get("fingerprint")
+    return with_query(url, fingerprint=fingerprint) if fingerprint else None
+
+def _trongrid_items(page: Dict[str, Any]) -> List[Any]:
+    return [tx for tx in page.get("data") or [] if isinstance(tx, dict)]
+
+def _trongrid_timestamp(tx: Dict[str, Any]) -> Optional[int]:
+    t = tx.get("block_timestamp")
+    return int(t) if isinstance(t, (int, float)) else None
+
+def _tron_cursor(prev: Optional[AddressHistory]) -> int:
+    # Cursor TRON = block_timestamp (ms) tx terbaru yang sudah dikira
+    return int(prev.cursor) if prev and prev.cursor and prev.cursor.isdigit() else 0
+
+def _tron_delta_url(address: str, prev: Optional[AddressHistory]) -> str:
+    since = _tron_cursor(prev)
+    return _tron_txs_url(address, min_timestamp=since + 1 if since else 0)
+
+def _tron_oldest_url(address: str, prev: Optional[AddressHistory], counted: Optional[PageCount]) -> Optional[str]:
+    # Tak perlu jika first-seen sudah disimpan atau sync pertama baca semua halaman
+    if (prev and prev.first_seen) or (counted and counted.complete and not prev):
+        return None
+    return _tron_txs_url(address, oldest=True)
+
+def _record_paged(chain: str, address: str, result: Result, prev: Optional[AddressHistory],
+                  counted: Optional[PageCount], new_times: List[int], cursor: Optional[str],
+                  first_seen: Optional[int], persist: bool = True) -> Result:
+    # counted = tx baru selepas cursor (semua tx pada sync pertama), dikira oleh paginator
+    if counted is None:
+        return _with_history(result, prev)
+    if not counted.complete:
+        # Kiraan terpotong (had skor / bajet halaman / deadline): cursor dan kiraan
+        # tidak disimpan supaya tx yang belum dibaca tidak hilang dari asas; hanya
+        # first_seen disimpan, dan tx_count dilaporkan sebagai had bawah
+        hist = _record_history(chain, address, prev, persist, first_seen=first_seen) if first_seen else prev
+        return _lower_bound(_with_history(result, hist), (prev.tx_count if prev else 0) + counted.count)
+    hist = _record_history(
+        chain, address, prev, persist,
+        new_times=new_times,
+        cursor=cursor,
+        tx_count=(prev.tx_count if prev else 0) + counted.count,
+        first_seen=first_seen,
+    )
+    return _with_history(result, hist)
+
+def _tron_history(address: str, result: WalletResult, prev: Optional[AddressHistory],
+                  counted: Optional[PageCount], oldest: Optional[Dict[str, Any]], persist: bool = True) -> Result:
+    oldest_times = _tron_times_ms(oldest) or []
+    if oldest_times:
+        first_seen = min(oldest_times) // 1000
+    elif counted and counted.complete and counted.oldest and not prev:
+        first_seen = counted.oldest // 1000
+    else:
+        first_seen = None
+    return _record_paged(
+        "tron", address, result, prev, counted,
+        new_times=[t // 1000 for t in map(_trongrid_timestamp, counted.first_page) if t] if counted else [],
+        cursor=str(counted.newest) if counted and counted.newest else None,
+        first_seen=first_seen,
+        persist=persist,
+    )
+
+def _tron_paged(address: str, prev: Optional[AddressHistory], deadline: float
+                ) -> Tuple[Optional[PageCount], Optional[Dict[str, Any]]]:
+    counted = count_items(
+        _tron_delta_url(address, prev), lambda url: _get_until(url, deadline),
+        _trongrid_next, _trongrid_items, _trongrid_timestamp, deadline=deadline,
+    )
+    oldest_url = _tron_oldest_url(address, prev, counted)
+    return counted, _get_until(oldest_url, deadline) if oldest_url else None
+
+def fetch_tron(address: str) -> Result:
+    deadline = _deadline()
+    plan = SubQueries(_LOOKUP_POOL, deadline)
+    prev = _history("tron", address)
+    # Pilihan (serentak dengan akaun): kiraan tx berhalaman + tx tertua
+    plan.optional("paged", ("tx_count", "wallet_age"), _tron_paged, address, prev, deadline)
+    data = _hedged(_tron_endpoints(address), _attempt_get, deadline)
+    if not data:
+        plan.cancel()
+        return {"status": "0", "message": API_REJECTED}
+    result = _parse_tron(address, data)
+    values, incomplete = plan.collect()
+    return _partial("tron", address, values, incomplete, plan.complete,
+                    lambda v, persist: _tron_history(address, result, prev, *(v.get("paged") or (None, None)), persist))
+
 # ----------------------------
 # XRP FETCH — gunakan rippled JSON-RPC (balance tepat) + Ripple Data API (age/tx)
 # ----------------------------
-def fetch_xrp(address: str) -> Dict[str, Any]:
-    from urllib.parse import quote
-    import time
-    safe_addr = quote(address, safe="")
+# Public rippled nodes — tiada API key
+XRP_RIPPLED_NODES = [
+    "https://xrplcluster.com",          # community cluster
+    "https://s1.ripple.com:51234/",     # Ripple public
+    "https://s2.ripple.com:51234/",     # Ripple public
+    "https://xrpl.link/rpc",            # gateway
+    "https://rippled.xrpldata.com/"     # community
+]
+XRP_DATA_API = "https://data.ripple.com/v2/accounts"
 
-    # 1) Dapatkan BALANCE melalui rippled JSON-RPC (public nodes — tiada API key)
-    rippled_nodes = [
-        "https://xrplcluster.com",          # community cluster
-        "https://s1.ripple.com:51234/",     # Ripple public
-        "https://s2.ripple.com:51234/",     # Ripple public
-        "https://xrpl.link/rpc",            # gateway
-        "https://rippled.xrpldata.com/"     # community
-    ]
-    balance = None
-    for rpc in rippled_nodes:
-        res = _http_post_json(rpc, {
-            "method": "account_info",
-            "params": [{"account": address, "ledger_index": "validated", "strict": True}]
-        })
-        if res.get("result") and res["result"].get("status") == "success":
-            acct = res["result"].get("account_data") or {}
-            bal_drops = acct.get("Balance")
-            if bal_drops is not None:
-                try:
-                    balance = float(bal_drops) / 1_000_000.0  # drops -> XRP
-                    break
-                except Exception:
-                    balance = 0.0
+def _xrp_account_info_payload(address: str) -> Dict[str, Any]:
+    return {
+        "method": "account_info",
+        "params": [{"account": address, "ledger_index": "validated", "strict": True}]
+    }
 
-    # Jika semua RPC gagal, cuba Ripple Data API /balances (kadang bagi nilai terus)
-    if balance is None:
-        resp = _http_get_json(f"https://data.ripple.com/v2/accounts/{safe_addr}/balances")
-        if resp and not resp.get("error"):
+def _parse_xrp_account_info(res: Dict[str, Any]) -> Optional[float]:
+    if res.get("result") and res["result"].get("status") == "success":
+        acct = res["result"].get("account_data") or {}
+        bal_drops = acct.get("Balance")
+        if bal_drops is not None:
             try:
-                for b in resp.get("balances", []):
-                    if b.get("currency") == "XRP":
-                        balance = float(b.get("value", 0))
-                        break
+                return float(bal_drops) / 1_000_000.0  # drops -> XRP
             except Exception:
-                balance = 0.0
+                return 0.0
+    return None
 
-    if balance is None:
-        # Semua fallback gagal
-        return {"status": "0", "message": API_REJECTED}
-
-    # 2) Dapatkan umur & kiraan transaksi (anggaran) dari Ripple Data API (public)
-    wallet_age_days = 0.0
-    tx_count = 0
+def _parse_xrp_balances(resp: Dict[str, Any]) -> Optional[float]:
+    balance = None
+    if resp and not resp.get("error"):
+        try:
+            for b in resp.get("balances", []):
+                if b.get("currency") == "XRP":
+                    balance = float(b.get("value", 0))
+                    break
+        except Exception:
+            balance = 0.0
+    return balance
 
-    meta = _http_get_json(f"https://data.ripple.com/v2/accounts/{safe_addr}")
+def _parse_xrp_inception_epoch(meta: Dict[str, Any]) -> Optional[int]:
     if meta and not meta.get("error"):
         inc = meta.get("inception")
         if inc:
             try:
-                secs = int(inc)  # API lazimnya bagi epoch seconds
-                wallet_age_days = max(0.0, (time.time() - secs) / 86400.0)
+                return int(inc)  # API lazimnya bagi epoch seconds
             except Exception:
                 pass
+    return None
 
-    tx_meta = _http_get_json(f"https://data.ripple.com/v2/accounts/{safe_addr}/transactions?limit=1")
+def _parse_xrp_count(tx_meta: Dict[str, Any]) -> int:
     if tx_meta and not tx_meta.get("error"):
         try:
-            tx_count = int(tx_meta.get("count") or 0)
+            return int(tx_meta.get("count") or 0)
         except Exception:
-            tx_count = 0
+            return 0
+    return 0
 
-    # 3) (Optional) 5 transaksi terakhir untuk UI
-    last5tx = []
-    txs = _http_get_json(f"https://data.ripple.com/v2/accounts/{safe_addr}/transactions?result=tesSUCCESS&limit=5")
+def _parse_xrp_last5(txs: Dict[str, Any]) -> List[TxSummary]:
+    last5tx: List[TxSummary] = []
     if txs and not txs.get("error"):
         for item in (txs.get("transactions") or [])[:5]:
             tx = item.get("tx") or {}
             h = tx.get("hash") or item.get("hash") or ""
-            t = item.get("date")
-            if isinstance(t, (int, float)):
-                t = time.strftime("%Y-%m-%d %H:%M", time.gmtime(t))
             frm = tx.get("Account") or "-"
             to = tx.get("Destination") or "-"
             val = tx.get("Amount")
@@ -302,55 +716,160 @@ def fetch_xrp(address: str) -> Dict[str, Any]:
                     val = f"{(float(val)/1_000_000.0):.6f} XRP"
                 except Exception:
                     pass
-            last5tx.append({"hash": h, "time": t, "from": frm, "to": to, "value": val or "-"})
+            last5tx.append(TxSummary(h, epoch(item.get("date")), frm, to, val or "-"))
+    return last5tx
+
+def _xrp_times(txs: Dict[str, Any]) -> List[int]:
+    if not txs or txs.get("error"):
+        return []
+    return [int(t) for t in (item.get("date") for item in txs.get("transactions") or [] if isinstance(item, dict))
+            if isinstance(t, (int, float))]
 
+def _xrp_history(address: str, balance: float, prev: Optional[AddressHistory], meta: Optional[Dict[str, Any]],
+                 tx_meta: Optional[Dict[str, Any]], txs: Optional[Dict[str, Any]], persist: bool = True) -> Result:
+    since = prev.last_seen if prev else 0
+    counted = bool(tx_meta) and not tx_meta.get("error")
+    hist = _record_history(
+        "xrp", address, prev, persist,
+        new_times=[t for t in _xrp_times(txs) if t > since],
+        tx_count=_parse_xrp_count(tx_meta) if counted else None,
+        first_seen=_parse_xrp_inception_epoch(meta) if meta else None,
+    )
     return _normalize_result(
         address, "XRP",
         balance=balance,
-        tx_count=tx_count,
-        wallet_age_days=wallet_age_days,
-        last5tx=last5tx
+        tx_count=hist.tx_count,
+        wallet_age_days=hist.age_days(),
+        last5tx=_parse_xrp_last5(txs)
     )
 
+def fetch_xrp(address: str) -> Result:
+    safe_addr = quote(address, safe="")
+    deadline = _deadline()
+    plan = SubQueries(_LOOKUP_POOL, deadline)
+
+    # Pilihan (serentak dengan balance): umur (inception, sekali sahaja; selepas
+    # itu dari stor sejarah), kiraan tx dan 5 transaksi terakhir untuk UI
+    prev = _history("xrp", address)
+    if not (prev and prev.first_seen):
+        plan.optional("meta", ("wallet_age",), _get_until, f"{XRP_DATA_API}/{safe_addr}", deadline)
+    plan.optional("tx_meta", ("tx_count",), _get_until, f"{XRP_DATA_API}/{safe_addr}/transactions?limit=1", deadline)
+    plan.optional("txs", ("last5tx",), _get_until,
+                  f"{XRP_DATA_API}/{safe_addr}/transactions?result=tesSUCCESS&limit=5", deadline)
+
+    # Wajib: BALANCE melalui rippled JSON-RPC
+    def attempt(rpc: str, timeout: float):
+        return _parse_xrp_account_info(_http_post_json(rpc, _xrp_account_info_payload(address), timeout=timeout))
+
+    balance = _hedged(XRP_RIPPLED_NODES, attempt, deadline)
+
+    # Jika semua RPC gagal, cuba Ripple Data API /balances (kadang bagi nilai terus)
+    if balance is None:
+        balance = _parse_xrp_balances(_get_until(f"{XRP_DATA_API}/{safe_addr}/balances", deadline))
+
+    if balance is None:
+        # Semua fallback gagal
+        plan.cancel()
+        return {"status": "0", "message": API_REJECTED}
+
+    values, incomplete = plan.collect()
+    return _partial("xrp", address, values, incomplete, plan.complete,
+                    lambda v, persist: _xrp_history(address, balance, prev, v.get("meta"), v.get("tx_meta"),
+                                                    v.get("txs"), persist))
+
 # ---------- SOL ----------
-def fetch_solana(address: str) -> Dict[str, Any]:
-    rpcs = [
-        "https://api.mainnet-beta.solana.com",
-        "https://rpc.ankr.com/solana",
-        "https://solana.publicnode.com",
-        "https://api.solana.com",
-        "https://solana-api.projectserum.com",
+SOL_RPCS = [
+    "https://api.mainnet-beta.solana.com",
+    "https://rpc.ankr.com/solana",
+    "https://solana.publicnode.com",
+    "https://api.solana.com",
+    "https://solana-api.projectserum.com",
+]
+
+def _sol_calls(address: str, prev: Optional[AddressHistory] = None) -> List[Tuple[str, list]]:
+    # Ada cursor: hanya signature selepas cursor ("until") + 5 terbaru untuk UI, satu batch
+    if prev and prev.cursor:
+        return [
+            ("getBalance", [address]),
+            ("getSignaturesForAddress", [address, {"limit": SOL_SIGNATURE_LIMIT, "until": prev.cursor}]),
+            ("getSignaturesForAddress", [address, {"limit": 5}]),
+        ]
+    return [
+        ("getBalance", [address]),
+        ("getSignaturesForAddress", [address, {"limit": SOL_SIGNATURE_LIMIT}]),
     ]
-    balance = None
-    for rpc in rpcs:
-        res = _http_post_json(rpc, {"jsonrpc":"2.0","id":1,"method":"getBalance","params":[address]})
-        if not res.get("error") and res.get("result"):
-            value = res["result"].get("value")
-            if value is not None:
-                balance = _lamports_to_sol(value)
-                break
-    if balance is None:
+
+def _sol_signatures(resp: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    sig_list = resp.get("result") if resp and not resp.get("error") else None
+    return [s for s in sig_list if isinstance(s, dict)] if isinstance(sig_list, list) else []
+
+def _parse_sol(bal: Dict[str, Any], sigs: Dict[str, Any], latest: Optional[Dict[str, Any]] = None
+               ) -> Optional[Tuple[float, List[Dict[str, Any]], List[Dict[str, Any]]]]:
+    if bal.get("error") or not bal.get("result"):
+        return None
+    value = bal["result"].get("value")
+    if value is None:
+        return None
+    new_sigs = _sol_signatures(sigs)
+    return _lamports_to_sol(value), new_sigs, _sol_signatures(latest) if latest is not None else new_sigs
+
+def _sol_result(address: str, balance: float, signatures: List[Dict[str, Any]],
+                latest: Optional[List[Dict[str, Any]]] = None, prev: Optional[AddressHistory] = None) -> Result:
+    # signatures = tx baru sejak cursor (semua tx pada sync pertama), terbaru dahulu.
+    times = [int(s["blockTime"]) for s in signatures if isinstance(s.get("blockTime"), (int, float))]
+    last5tx = [TxSummary(sig.get("signature") or "", epoch(sig.get("blockTime")))
+               for sig in (signatures if latest is None else latest)[:5]]
+
+    if len(signatures) >= SOL_SIGNATURE_LIMIT:
+        # Halaman penuh: mungkin ada tx lebih lama (atau lebih dari had sejak cursor)
+        # yang tidak dibaca. Cursor, kiraan dan first_seen tidak disimpan; cursor
+        # lama sudah basi kerana jurang tx tidak dapat dikira lagi.
+        hist = _reset_history("sol", address, prev) if prev and prev.cursor else prev
+        if hist and hist.first_seen:
+            age_days = hist.age_days()
+        else:
+            # Umur dari tx tertua dalam halaman: had bawah, untuk paparan sahaja
+            age_days = max(0.0, (time.time() - min(times)) / 86400.0) if times else 0.0
+        result = _normalize_result(address, "Solana", balance=balance, wallet_age_days=age_days, last5tx=last5tx)
+        return _lower_bound(result, (prev.tx_count if prev else 0) + len(signatures))
+
+    hist = _record_history(
+        "sol", address, prev,
+        new_times=times,
+        cursor=signatures[0].get("signature") if signatures else None,
+        tx_count=(prev.tx_count if prev else 0) + len(signatures),
+        first_seen=min(times) if times and not (prev and prev.first_seen) else None,
+    )
+    return _normalize_result(address, "Solana", balance=balance, tx_count=hist.tx_count,
+                             wallet_age_days=hist.age_days(), last5tx=last5tx)
+
+def fetch_solana(address: str) -> Result:
+    prev = _history("sol", address)
+    calls = _sol_calls(address, prev)
+
+    def attempt(rpc: str, timeout: float):
+        return _parse_sol(*_http_post_batch(rpc, calls, timeout=timeout))
+
+    res = _hedged(SOL_RPCS, attempt)
+    if res is None:
         return {"status": "0", "message": API_REJECTED}
-    return _normalize_result(address, "Solana", balance=balance, tx_count=0)
+    return _sol_result(address, *res, prev=prev)
 
 # ---------- HBAR ----------
-def fetch_hbar(address: str) -> Dict[str, Any]:
+HEDERA_MIRROR = "https://mainnet-public.mirrornode.hedera.com"
+HEDERA_PAGE_LIMIT = 100
+
+def _hbar_endpoints(address: str) -> List[str]:
     safe_addr = quote(address, safe="")
-    endpoints = [
+    return [
         f"https://mainnet-public.mirrornode.hedera.com/api/v1/accounts/{safe_addr}",
         f"https://mainnet-public.mirrornode.hedera.com/api/v1/balances?account.id={safe_addr}",
         f"https://mainnet-public.mirrornode.hedera.com/api/v1/transactions?account.id={safe_addr}",
         f"https://testnet.mirrornode.hedera.com/api/v1/accounts/{safe_addr}",
         f"https://mainnet-public.mirrornode.hedera.com/api/v1/tokens?account.id={safe_addr}",
     ]
-    data = {}
-    for url in endpoints:
-        data = _http_get_json(url)
-        if data and not data.get("error"):
-            break
-    if not data or data.get("error"):
-        return {"status": "0", "message": API_REJECTED}
 
+def _parse_hbar(address: str, data: Dict[str, Any]) -> WalletResult:
     balance = 0.0
     tx_count = 0
 
@@ -364,22 +883,145 @@ def fetch_hbar(address: str) -> Dict[str, Any]:
 
     return _normalize_result(address, "Hedera", balance=balance, tx_count=tx_count)
 
+def _hbar_txs_url(address: str, after: Optional[str] = None, oldest: bool = False) -> str:
+    url = f"{HEDERA_MIRROR}/api/v1/transactions?account.id={quote(address, safe='')}"
+    if oldest:
+        return url + "&order=asc&limit=1"
+    url += f"&limit={HEDERA_PAGE_LIMIT}&order=desc"
+    return url + f"&timestamp=gt:{after}" if after else url
+
+def _hedera_next(page: Dict[str, Any], url: str) -> Optional[str]:
+    nxt = (page.get("links") or {}).get("next")
+    return urljoin(url, nxt) if nxt else None
+
+def _hedera_items(page: Dict[str, Any]) -> List[Any]:
+    return [tx for tx in page.get("transactions") or [] if isinstance(tx, dict)]
+
+def _hedera_timestamp(tx: Dict[str, Any]) -> Optional[int]:
+    try:
+        return int(float(tx.get("consensus_timestamp")))
+    except (TypeError, ValueError):
+        return None
+
+def _hbar_delta_url(address: str, prev: Optional[AddressHistory]) -> str:
+    # Cursor Hedera = consensus_timestamp ("saat.nano") tx terbaru yang sudah dikira
+    return _hbar_txs_url(address, after=prev.cursor if prev else None)
+
+def _hbar_oldest_url(address: str, prev: Optional[AddressHistory], counted: Optional[PageCount]) -> Optional[str]:
+    if (prev and prev.first_seen) or (counted and counted.complete and not prev):
+        return None
+    return _hbar_txs_url(address, oldest=True)
+
+def _hbar_history(address: str, result: WalletResult, prev: Optional[AddressHistory],
+                  counted: Optional[PageCount], oldest: Optional[Dict[str, Any]], persist: bool = True) -> Result:
+    oldest_items = _hedera_items(oldest) if oldest and not oldest.get("error") else []
+    if oldest_items:
+        first_seen = _hedera_timestamp(oldest_items[0])
+    elif counted and counted.complete and counted.oldest and not prev:
+        first_seen = counted.oldest
+    else:
+        first_seen = None
+    newest = counted.first_page[0].get("consensus_timestamp") if counted and counted.first_page else None
+    return _record_paged(
+        "hbar", address, result, prev, counted,
+        new_times=[t for t in map(_hedera_timestamp, counted.first_page) if t] if counted else [],
+        cursor=str(newest) if newest else None,
+        first_seen=first_seen,
+        persist=persist,
+    )
+
+def _hbar_paged(address: str, prev: Optional[AddressHistory], deadline: float
+                ) -> Tuple[Optional[PageCount], Optional[Dict[str, Any]]]:
+    counted = count_items(
+        _hbar_delta_url(address, prev), lambda url: _get_until(url, deadline),
+        _hedera_next, _hedera_items, _hedera_timestamp, deadline=deadline,
+    )
+    oldest_url = _hbar_oldest_url(address, prev, counted)
+    return counted, _get_until(oldest_url, deadline) if oldest_url else None
+
+def fetch_hbar(address: str) -> Result:
+    deadline = _deadline()
+    plan = SubQueries(_LOOKUP_POOL, deadline)
+    prev = _history("hbar", address)
+    plan.optional("paged", ("tx_count", "wallet_age"), _hbar_paged, address, prev, deadline)
+    data = _hedged(_hbar_endpoints(address), _attempt_get, deadline)
+    if not data:
+        plan.cancel()
+        return {"status": "0", "message": API_REJECTED}
+    result = _parse_hbar(address, data)
+    values, incomplete = plan.collect()
+    return _partial("hbar", address, values, incomplete, plan.complete,
+                    lambda v, persist: _hbar_history(address, result, prev, *(v.get("paged") or (None, None)), persist))
+
 # ---------- Router ----------
-def get_wallet_data(address: str) -> Dict[str, Any]:
-    if not is_wallet_format_ok(address):
+FETCHERS: Dict[str, Callable[[str], Dict[str, Any]]] = {
+    "eth": fetch_eth,
+    "tron": fetch_tron,
+    "btc": fetch_btc,
+    "xrp": fetch_xrp,
+    "sol": fetch_solana,
+    "hbar": fetch_hbar,
+}
+
+RESULT_CACHE = build_result_cache()
+
+def _cache_metrics():
+    # Dibaca semasa scrape /metrics; nisbah hit = (hits + stale_hits) / semua
+    if RESULT_CACHE is None:
+        return []
+    stats = RESULT_CACHE.stats()
+    hits, stale, misses = stats.get("hits", 0), stats.get("stale_hits", 0), stats.get("misses", 0)
+    total = hits + stale + misses
+    return [
+        ("adc_cache_lookups_total", "counter", "Result cache lookups by outcome",
+         [("adc_cache_lookups_total", {"result": k}, v) for k, v in (("hit", hits), ("stale", stale), ("miss", misses))]),
+        ("adc_cache_hit_ratio", "gauge", "Result cache hit ratio (fresh + stale)",
+         [("adc_cache_hit_ratio", {}, (hits + stale) / total if total else 0.0)]),
+    ]
+
+def _pool_metrics():
+    # Sambungan keep-alive per host provider: opened = TCP/TLS baru, reused = request atas sambungan sedia ada
+    stats = pool_stats()
+    return [
+        ("adc_http_pool_requests_total", "counter", "Provider HTTP requests by connection reuse",
+         [("adc_http_pool_requests_total", {"provider": provider_key(host), "connection": kind}, s[kind])
+          for host, s in stats.items() for kind in ("opened", "reused")]),
+    ]
+
+METRICS.add_collector(_cache_metrics)
+METRICS.add_collector(_pool_metrics)
+
+def detect_chain(address: str) -> Optional[str]:
+    return classify_address(address)
+
+def get_wallet_result(address: str) -> Result:
+    # Bentuk padat (WalletResult) untuk pemegang hasil yang banyak (job, cache)
+    chain = detect_chain(address)
+    if chain is None:
         return {"status": "0", "message": "❌ Invalid wallet format", "result": ""}
 
-    if address.startswith("0x") and len(address) == 42:
-        return fetch_eth(address)
-    if address.startswith("T") and len(address) == 34:
-        return fetch_tron(address)
-    if address.startswith(("1", "3", "bc1")):
-        return fetch_btc(address)
-    if address.startswith("r") and len(address) >= 25:
-        return fetch_xrp(address)
-    if len(address) == 44 and re.fullmatch(r"[1-9A-HJ-NP-Za-km-z]{44}", address):
-        return fetch_solana(address)
-    if address.startswith("0.0.") and address.count(".") == 2:
-        return fetch_hbar(address)
-
-    return {"status": "0", "message": "❌ Chain not recognized"}
+    fetcher = FETCHERS[chain]
+    with track_lookup(chain):
+        if RESULT_CACHE is None:
+            return fetcher(address)
+        return RESULT_CACHE.get_or_fetch(chain, address, lambda: fetcher(address))
+
+def get_wallet_data(address: str) -> Dict[str, Any]:
+    return as_dict(get_wallet_result(address))
+
+def get_wallet_data_with_age(address: str) -> Tuple[Dict[str, Any], float, int]:
+    """(hasil, umur cache dalam saat, TTL chain); umur dan TTL 0 jika tiada cache."""
+    result = get_wallet_data(address)
+    chain = detect_chain(address)
+    if RESULT_CACHE is None or chain is None:
+        return result, 0.0, 0
+    hit = RESULT_CACHE.peek(chain, address)
+    return result, (hit[1] if hit else 0.0), RESULT_CACHE.ttl_for(chain)
+
+def cached_wallet_data(address: str) -> Optional[Dict[str, Any]]:
+    # Hasil validate terakhir dari cache sahaja (tiada panggilan provider)
+    chain = detect_chain(address)
+    if RESULT_CACHE is None or chain is None:
+        return None
+    hit = RESULT_CACHE.peek(chain, address)
+    return as_dict(hit[0]) if hit else None
@@ -1,41 +1,125 @@
-from flask import Flask, render_template, request, send_file, flash, redirect, url_for
+from flask import Flask, Response, g, jsonify, render_template, request, send_file, flash, redirect, url_for, stream_with_context
 from werkzeug.utils import secure_filename
-from api_handler import get_wallet_data, is_wallet_format_ok
-from iso_export import generate_iso_xml
+from api_handler import cached_wallet_data, get_wallet_data, get_wallet_data_with_age, is_wallet_format_ok
+from bulk import detect_format, iter_bulk_results, iter_ndjson, parse_addresses
+from fast_json import dumps as json_dumps
+from iso_export import generate_iso_xml, iter_iso_batch
+from jobs import JobTooLarge, QueueFull, build_job_queue
+from metrics import HTTP_INFLIGHT, HTTP_LATENCY, end_trace, render as render_metrics, server_timing, start_trace
+from provider_health import REGISTRY as PROVIDER_HEALTH
+from startup import warm_up
+from usage_counter import USERS_VALIDATED, build_usage_counter
+import hashlib
 import io
 import os
+import sys
+import time
 
 ERROR_PREFIX = "❌"
 ERR_INVALID_WALLET = f"{ERROR_PREFIX} Sila masukkan wallet address yang valid!"
 ERR_UNKNOWN = f"{ERROR_PREFIX} Error tidak diketahui!"
 ERR_VALIDATE = f"{ERROR_PREFIX} Terjadi error semasa validate wallet. Cuba lagi!"
 ERR_EXPORT_NEED_WALLET = f"{ERROR_PREFIX} Wallet address diperlukan untuk export!"
+ERR_BULK_EMPTY = f"{ERROR_PREFIX} Tiada wallet address untuk bulk validate!"
 
-USER_COUNT_FILE = os.path.join('static', 'user_count.txt')
+HIGH_RISK_SCORE = 50
+# Kod ralat berstruktur untuk /api/v1 (pelanggan mesin tidak parse mesej flash)
+API_ERRORS = {
+    'missing_address': (400, "address is required"),
+    'invalid_address': (400, "address format not recognised"),
+    'invalid_json': (400, "request body is not valid JSON"),
+    'upstream_unavailable': (502, "no provider returned a usable result"),
+    'internal_error': (500, "unexpected error while validating"),
+    'missing_addresses': (400, "at least one address is required"),
+    'job_too_large': (413, "too many addresses for one job"),
+    'job_not_found': (404, "job not found or expired"),
+    'queue_full': (503, "job queue is full, retry later"),
+    'jobs_disabled': (503, "background jobs are disabled"),
+}
+# Header permintaan untuk trace per request (dipulangkan dalam Server-Timing)
+TRACE_HEADER = os.environ.get('TRACE_HEADER', 'X-ADC-Trace')
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'super_secret_key')
 
+# Kiraan dikumpul dalam memori per worker dan diflush berkala (tiada I/O disk per request)
+USAGE = build_usage_counter()
+
 def read_user_count() -> int:
-    try:
-        if not os.path.exists(USER_COUNT_FILE):
-            os.makedirs(os.path.dirname(USER_COUNT_FILE), exist_ok=True)
-            with open(USER_COUNT_FILE, 'w') as f:
-                f.write("0")
-            return 0
-        with open(USER_COUNT_FILE, 'r') as f:
-            return int((f.read() or "0").strip())
-    except (ValueError, OSError):
-        return 0
-
-def update_user_count() -> int:
-    try:
-        count = read_user_count() + 1
-        with open(USER_COUNT_FILE, 'w') as f:
-            f.write(str(count))
-        return count
-    except OSError:
-        return read_user_count()
+    return USAGE.get(USERS_VALIDATED)
+
+def record_usage(result, validated: bool = False) -> None:
+    network = result.get('network') if isinstance(result, dict) else None
+    score = result.get('ai_score') if isinstance(result, dict) else None
+    high_risk = isinstance(score, (int, float)) and score < HIGH_RISK_SCORE
+    USAGE.record(network=network, high_risk=high_risk, validated=validated)
+
+def _count_job_item(item) -> None:
+    # Dipanggil dari thread dispatcher job (di luar konteks request)
+    if item.get('chain'):
+        record_usage(item.get('result'))
+
+# Job latar (jobs.py); None jika JOB_BACKEND=off
+JOBS = build_job_queue(on_result=_count_job_item)
+
+def _count_bulk(items):
+    for item in items:
+        if item.get('chain'):
+            record_usage(item.get('result'))
+        yield item
+
+@app.before_request
+def _start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    g.trace_token = start_trace() if request.headers.get(TRACE_HEADER) else None
+    HTTP_INFLIGHT.inc()
+
+@app.after_request
+def _finish_request_metrics(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        # Label ikut endpoint Flask, bukan path (elak kardinaliti address)
+        HTTP_LATENCY.observe(time.perf_counter() - started, endpoint=request.endpoint or 'unknown',
+                             status=str(response.status_code))
+    token = g.pop('trace_token', None)
+    if token is not None:
+        spans = end_trace(token)
+        if spans:
+            response.headers['Server-Timing'] = server_timing(spans)
+    return response
+
+@app.teardown_request
+def _teardown_request_metrics(exc=None):
+    HTTP_INFLIGHT.dec()
+    token = g.pop('trace_token', None)
+    if token is not None:
+        end_trace(token)
+
+def _is_failed(result) -> bool:
+    return not isinstance(result, dict) or result.get('status') == "0" or bool(result.get('error')) or (
+        isinstance(result.get('reason'), str) and result['reason'].startswith(ERROR_PREFIX))
+
+def _bulk_addresses():
+    # Terima upload (field "file") atau body mentah: CSV, NDJSON atau satu address per baris.
+    # Pulangkan None jika tiada address langsung.
+    upload = request.files.get('file')
+    if upload is not None:
+        stream, fmt = upload.stream, detect_format(upload.mimetype, upload.filename)
+    else:
+        stream, fmt = request.stream, detect_format(request.content_type)
+    fmt = request.args.get('format') or fmt
+
+    lines = io.TextIOWrapper(stream, encoding='utf-8', errors='replace', newline='')
+    addresses = parse_addresses(lines, fmt)
+    first = next(addresses, None)
+    if first is None:
+        return None
+
+    def all_addresses():
+        yield first
+        yield from addresses
+
+    return all_addresses()
 
 @app.route('/', methods=['GET', 'POST'])
 def home():
@@ -51,17 +135,14 @@ def home():
         try:
             result = get_wallet_data(address)
 
-            if (isinstance(result, dict) and (
-                result.get('status') == "0" or
-                result.get('error') or
-                (isinstance(result.get('reason'), str) and result['reason'].startswith(ERROR_PREFIX))
-            )):
+            if isinstance(result, dict) and _is_failed(result):
                 msg = result.get('message') or result.get('reason') or result.get('error') or ERR_UNKNOWN
                 extra = result.get('result')
+                record_usage(result)
                 flash(f"{msg}{(' ' + extra) if extra else ''}")
                 return redirect(url_for('home'))
 
-            update_user_count()
+            record_usage(result, validated=True)
             return render_template('index.html', result=result, user_count=read_user_count())
 
         except Exception:
@@ -70,6 +151,106 @@ def home():
 
     return render_template('index.html', result=result, user_count=user_count)
 
+def _json_response(payload, status: int = 200) -> Response:
+    return Response(json_dumps(payload), status=status, mimetype='application/json')
+
+def _api_error(code: str) -> Response:
+    status, message = API_ERRORS[code]
+    response = _json_response({'status': "0", 'error': {'code': code, 'message': message}}, status)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/api/v1/validate', methods=['GET', 'POST'])
+def api_validate():
+    # JSON terus dari _normalize_result: tiada render template, flash atau redirect
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        if data is None and request.get_data(cache=False):
+            return _api_error('invalid_json')
+        address = (data.get('address') or data.get('wallet')) if isinstance(data, dict) else None
+    else:
+        address = request.args.get('address') or request.args.get('wallet')
+    address = address.strip() if isinstance(address, str) else ""
+    if not address:
+        return _api_error('missing_address')
+    if not is_wallet_format_ok(address):
+        return _api_error('invalid_address')
+
+    try:
+        result, age, ttl = get_wallet_data_with_age(address)
+    except Exception:
+        return _api_error('internal_error')
+    if _is_failed(result):
+        record_usage(result)
+        return _api_error('upstream_unavailable')
+    record_usage(result, validated=True)
+
+    body = json_dumps(result)
+    response = Response(body, mimetype='application/json')
+    # ETag dari kandungan; max-age = baki TTL entri dalam result cache
+    response.set_etag(hashlib.blake2b(body, digest_size=12).hexdigest())
+    if result.get('incomplete_fields'):
+        # Hasil separa: medan pilihan masih dilengkapkan di background
+        response.headers['Cache-Control'] = 'no-cache'
+    else:
+        response.headers['Cache-Control'] = f"public, max-age={max(0, int(ttl - age))}"
+    response.headers['Age'] = str(int(age))
+    return response.make_conditional(request)
+
+def _job_addresses():
+    # JSON {"addresses": [...]} atau input yang sama dengan /api/bulk (CSV, NDJSON, teks)
+    if request.is_json:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return None
+        addresses = data.get('addresses') or ([data['address']] if data.get('address') else [])
+        addresses = [a for a in addresses if isinstance(a, str) and a.strip()] if isinstance(addresses, list) else []
+        return addresses or None
+    return _bulk_addresses()
+
+@app.route('/api/v1/jobs', methods=['POST'])
+def submit_job():
+    # Pulang segera dengan job id; lookup berjalan dalam worker pool jobs.py
+    if JOBS is None:
+        return _api_error('jobs_disabled')
+    if request.is_json and request.get_json(silent=True) is None:
+        return _api_error('invalid_json')
+    addresses = _job_addresses()
+    if addresses is None:
+        return _api_error('missing_addresses')
+    try:
+        status = JOBS.submit(addresses)
+    except JobTooLarge:
+        return _api_error('job_too_large')
+    except QueueFull as e:
+        response = _api_error('queue_full')
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    response = _json_response(status, 202)
+    response.headers['Location'] = url_for('job_status', job_id=status['job_id'])
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/api/v1/jobs/<job_id>')
+def job_status(job_id):
+    status = JOBS.status(job_id) if JOBS is not None else None
+    if status is None:
+        return _api_error('job_not_found')
+    response = _json_response(status)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/api/v1/jobs/<job_id>/results')
+def job_results(job_id):
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', 100, type=int)
+    page = JOBS.results(job_id, offset, limit) if JOBS is not None else None
+    if page is None:
+        return _api_error('job_not_found')
+    response = _json_response(page)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route('/export-iso')
 def export_iso():
     wallet = (request.args.get("wallet") or "").strip()
@@ -78,7 +259,7 @@ def export_iso():
         return redirect(url_for('home'))
 
     safe_name = secure_filename(wallet)[:80] or "wallet"
-    xml_data = generate_iso_xml(wallet)
+    xml_data = generate_iso_xml(wallet, cached_wallet_data(wallet))
     return send_file(
         io.BytesIO(xml_data.encode('utf-8')),
         mimetype='application/xml',
@@ -86,7 +267,54 @@ def export_iso():
         download_name=f'{safe_name}_iso20022.xml'
     )
 
+@app.route('/api/bulk', methods=['POST'])
+def bulk_validate():
+    # Hasil distrim sebagai NDJSON sebaik setiap lookup siap.
+    addresses = _bulk_addresses()
+    if addresses is None:
+        return jsonify({"status": "0", "message": ERR_BULK_EMPTY}), 400
+
+    return Response(
+        stream_with_context(iter_ndjson(_count_bulk(iter_bulk_results(addresses)))),
+        mimetype='application/x-ndjson'
+    )
+
+@app.route('/export-iso/batch', methods=['POST'])
+def export_iso_batch():
+    # Satu dokumen pain.001 (satu PmtInf per wallet yang berjaya divalidate), distrim
+    addresses = _bulk_addresses()
+    if addresses is None:
+        return jsonify({"status": "0", "message": ERR_BULK_EMPTY}), 400
+
+    # Item gagal dihantar sebagai None: tidak dieksport, tetapi beri peluang keep-alive
+    validated = (item['result'] if item.get('chain') and not _is_failed(item.get('result')) else None
+                 for item in _count_bulk(iter_bulk_results(addresses)))
+    return Response(
+        stream_with_context(iter_iso_batch(validated)),
+        mimetype='application/xml',
+        headers={'Content-Disposition': 'attachment; filename=batch_iso20022.xml'}
+    )
+
+@app.route('/api/providers')
+def provider_status():
+    return jsonify(PROVIDER_HEALTH.snapshot())
+
+@app.route('/metrics')
+def metrics():
+    # Format teks Prometheus; nilai per worker
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/usage')
+def usage_status():
+    # Metrik agregat sahaja (DATAFLOW.md); tiada address atau IP
+    return jsonify(USAGE.snapshot())
+
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv[1:]:
+        from startup import main
+        main(sys.argv[1:])
+        sys.exit(0)
+    warm_up(app)
     port = int(os.environ.get("PORT", 1000))
     debug = os.environ.get("DEBUG", "False").lower() == "true"
     app.run(host="0.0.0.0", port=port, debug=debug)
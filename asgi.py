@@ -0,0 +1,91 @@
+from __future__ import annotations
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import TRACE_HEADER, app as flask_app
+from api_handler import REQUEST_DEADLINE
+from async_handler import close_session, drain, get_wallet_data_async
+from fast_json import dumps as json_dumps
+from metrics import end_trace, server_timing, start_trace
+from startup import warm_up
+
+# Entry point ASGI: `uvicorn asgi:app` (atau gunicorn -k uvicorn.workers.UvicornWorker).
+# /api/async/validate dilayan terus oleh event loop; laluan lain diserah ke Flask.
+ASYNC_VALIDATE_PATH = "/api/async/validate"
+MAX_BODY_BYTES = 16 * 1024
+
+_flask = WsgiToAsgi(flask_app)
+
+async def _send_json(send, status: int, payload: Dict[str, Any],
+                     extra_headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+    body = json_dumps(payload)
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode())] + (extra_headers or []),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError("body too large")
+        if not message.get("more_body"):
+            return body
+
+async def _validate(scope, receive, send) -> None:
+    wallet = ""
+    if scope["method"] == "GET":
+        qs = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        wallet = (qs.get("wallet") or [""])[0]
+    elif scope["method"] == "POST":
+        try:
+            data = json.loads(await _read_body(receive) or b"{}")
+            wallet = str(data.get("wallet") or "") if isinstance(data, dict) else ""
+        except ValueError:
+            await _send_json(send, 400, {"status": "0", "message": "❌ Invalid JSON body"})
+            return
+    else:
+        await _send_json(send, 405, {"status": "0", "message": "❌ Method not allowed"})
+        return
+
+    trace_name = TRACE_HEADER.lower().encode("latin-1")
+    token = start_trace() if any(k == trace_name and v for k, v in scope.get("headers", [])) else None
+    try:
+        result = await get_wallet_data_async(wallet.strip())
+    finally:
+        spans = end_trace(token) if token is not None else []
+    status = 200
+    if result.get("status") == "0":
+        status = 400 if "Invalid" in (result.get("message") or "") else 502
+    extra = [(b"server-timing", server_timing(spans).encode("latin-1", "replace"))] if spans else None
+    await _send_json(send, status, result, extra)
+
+async def _lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Warm-up (blocking I/O) di thread executor sebelum lapor sedia
+            await asyncio.get_running_loop().run_in_executor(None, warm_up, flask_app)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await drain(REQUEST_DEADLINE)
+            await close_session()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send) -> None:
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+    elif scope["type"] == "http" and scope["path"] == ASYNC_VALIDATE_PATH:
+        await _validate(scope, receive, send)
+    else:
+        await _flask(scope, receive, send)
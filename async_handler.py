@@ -0,0 +1,396 @@
+from __future__ import annotations
+import asyncio
+import contextvars
+import json
+import os
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+from urllib.parse import quote
+
+import aiohttp
+
+import api_handler
+from api_handler import (
+    API_REJECTED, EVM_NETWORKS, HEDGE_DELAY, SOL_RPCS, XRP_DATA_API, XRP_RIPPLED_NODES,
+    _btc_endpoints, _btc_history, _btc_oldest_url, _call_timeout, _deadline, _eth_calls, _evm_result, _hbar_delta_url,
+    _hbar_endpoints, _hbar_history, _hbar_oldest_url, _hedera_items, _hedera_next, _hedera_timestamp,
+    _history, _parse_btc, _parse_eth, _parse_hbar, _parse_sol, _parse_tron,
+    _parse_xrp_account_info, _parse_xrp_balances, _sol_calls, _sol_result, _store_completed, _tron_delta_url,
+    _tron_endpoints, _tron_history, _tron_oldest_url, _trongrid_items, _trongrid_next, _trongrid_timestamp,
+    _xrp_account_info_payload, _xrp_history,
+    detect_chain,
+)
+import http_replay
+from history_sync import AddressHistory
+from http_pool import HTTP_POOL_SIZE, USER_AGENT, resolve_url
+from metrics import count_error, observe_fallback, observe_provider, track_lookup
+from pagination import PageCount, acount_items
+from provider_health import ERROR, OK, REGISTRY as PROVIDER_HEALTH, TIMEOUT
+from rate_limit import LIMITER as RATE_LIMITER
+from subqueries import AsyncSubQueries, Values, drain_background
+from wallet_result import Result, WalletResult, as_dict
+
+# Versi asyncio bagi lapisan fetcher: parser & hasil _normalize_result sama
+# dengan api_handler, tetapi satu proses boleh pegang ratusan lookup serentak.
+ASYNC_MAX_CONNECTIONS = int(os.environ.get("ASYNC_MAX_CONNECTIONS", "200"))
+
+T = TypeVar("T")
+
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+_inflight: Dict[str, "asyncio.Task[Result]"] = {}
+_inflight_gets: Dict[Any, "asyncio.Future[Any]"] = {}
+
+def _session() -> aiohttp.ClientSession:
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit=ASYNC_MAX_CONNECTIONS, limit_per_host=HTTP_POOL_SIZE, ttl_dns_cache=300)
+        session = aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT},
+                                        cookie_jar=aiohttp.DummyCookieJar())
+        _sessions[loop] = session
+    return session
+
+async def close_session() -> None:
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+async def _replay_json(replayer: http_replay.Replayer, method: str, url: str, timeout: float, **kwargs: Any) -> Any:
+    started = time.monotonic()
+    hit = replayer.lookup(http_replay.request_key(method, url, kwargs.get("params"), kwargs.get("json")))
+    data: Any = None
+    error: Optional[str] = None
+    outcome = OK
+    if hit is None:
+        outcome, error = ERROR, "network: replay miss"
+    else:
+        kind, raw, latency = hit
+        delay = replayer.delay(latency)
+        if delay > timeout:
+            await asyncio.sleep(timeout)
+            outcome, error = TIMEOUT, "timeout: replayed latency exceeds timeout"
+        else:
+            if delay:
+                await asyncio.sleep(delay)
+            if kind == http_replay.KIND_ERROR:
+                error = raw.decode("utf-8")
+                outcome = TIMEOUT if error.startswith("timeout") else ERROR
+            else:
+                try:
+                    data = json.loads(raw) if raw.strip() else None
+                except ValueError as e:
+                    outcome, error = ERROR, f"json: {e}"
+    elapsed = time.monotonic() - started
+    PROVIDER_HEALTH.record(url, elapsed, outcome)
+    observe_provider(url, elapsed, error)
+    return {"error": error} if error else data
+
+async def _request_json(method: str, url: str, timeout: float, **kwargs: Any) -> Any:
+    replayer = http_replay.REPLAYER
+    if replayer is not None:
+        return await _replay_json(replayer, method, url, timeout, **kwargs)
+    wait = RATE_LIMITER.reserve(url, timeout)
+    if wait is None:
+        count_error(url, "rate_limited")
+        return {"error": "rate_limited: provider quota"}
+    if wait > 0:
+        await asyncio.sleep(wait)
+        timeout = max(0.1, timeout - wait)
+    started = time.monotonic()
+    data: Any = None
+    raw = b""
+    error: Optional[str] = None
+    outcome = OK
+    try:
+        async with _session().request(method, resolve_url(url), timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as r:
+            r.raise_for_status()
+            raw = await r.read()
+            data = json.loads(raw) if raw.strip() else None
+    except asyncio.TimeoutError as e:
+        outcome, error = TIMEOUT, f"timeout: {e}"
+    except aiohttp.ClientResponseError as e:
+        if e.status == 429:
+            RATE_LIMITER.penalize(url, (e.headers or {}).get("Retry-After"))
+        outcome = ERROR if e.status in (408, 429) or e.status >= 500 else OK
+        error = f"network: {e}"
+    except aiohttp.ClientError as e:
+        outcome, error = ERROR, f"network: {e}"
+    except ValueError as e:
+        outcome, error = ERROR, f"json: {e}"
+    elapsed = time.monotonic() - started
+    recorder = http_replay.RECORDER
+    if recorder is not None:
+        key = http_replay.request_key(method, url, kwargs.get("params"), kwargs.get("json"))
+        recorder.record(key, elapsed, raw if error is None else None, error)
+    PROVIDER_HEALTH.record(url, elapsed, outcome)
+    observe_provider(url, elapsed, error)
+    return {"error": error} if error else data
+
+async def _get_json(url: str, timeout: float, params: dict | None = None) -> Dict[str, Any]:
+    # GET serentak ke URL yang sama dalam loop ini dikongsi; pemanggil yang
+    # menumpang menunggu paling lama timeout sendiri
+    key = (url, tuple(sorted((params or {}).items())))
+    fut = _inflight_gets.get(key)
+    if fut is None or fut.done() or fut.get_loop() is not asyncio.get_running_loop():
+        fut = asyncio.ensure_future(_request_json("GET", url, timeout, params=params))
+        _inflight_gets[key] = fut
+        fut.add_done_callback(lambda f: _inflight_gets.pop(key, None) if _inflight_gets.get(key) is f else None)
+        return await asyncio.shield(fut)
+    try:
+        return await asyncio.wait_for(asyncio.shield(fut), timeout)
+    except asyncio.TimeoutError:
+        count_error(url, "timeout")
+        return {"error": "timeout: coalesced request still running"}
+
+async def _post_json(url: str, payload: Any, timeout: float) -> Any:
+    return await _request_json("POST", url, timeout, json=payload)
+
+async def _post_batch(url: str, calls: Sequence[Tuple[str, list]], timeout: float) -> List[Dict[str, Any]]:
+    payload = [{"jsonrpc": "2.0", "id": i, "method": m, "params": p} for i, (m, p) in enumerate(calls)]
+    res = await _post_json(url, payload, timeout)
+    if not isinstance(res, list):
+        err = res.get("error") if isinstance(res, dict) else None
+        return [{"error": err or "batch: unexpected response"}] * len(calls)
+    by_id = {item.get("id"): item for item in res if isinstance(item, dict)}
+    return [by_id.get(i) or {"error": "batch: missing response"} for i in range(len(calls))]
+
+async def _attempt_get(url: str, timeout: float) -> Optional[Dict[str, Any]]:
+    data = await _get_json(url, timeout)
+    if data and not data.get("error"):
+        return data
+    return None
+
+async def _hedged(endpoints: List[Any], attempt: Callable[[Any, float], Awaitable[Optional[T]]],
+                  deadline: float | None = None, hedge_delay: float | None = None) -> Optional[T]:
+    # Sama seperti api_handler._hedged, tetapi attempt yang kalah betul-betul dibatalkan
+    deadline = _deadline() if deadline is None else deadline
+    hedge_delay = HEDGE_DELAY if hedge_delay is None else hedge_delay
+    queue = PROVIDER_HEALTH.rank(list(endpoints))
+    pending: set = set()
+    launched: Dict[Any, int] = {}
+    next_launch = time.monotonic()
+    try:
+        while queue or pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if queue and (not pending or now >= next_launch):
+                endpoint = queue.pop(0)
+                if not PROVIDER_HEALTH.allow(endpoint) and (queue or pending):
+                    continue
+                task = asyncio.ensure_future(attempt(endpoint, _call_timeout(deadline)))
+                launched[task] = len(launched)
+                pending.add(task)
+                next_launch = now + hedge_delay
+                continue
+            wait_for = deadline - now
+            if queue:
+                wait_for = min(wait_for, next_launch - now)
+            done, pending = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    result = task.result()
+                except Exception:
+                    result = None
+                if result is not None:
+                    observe_fallback(launched[task])
+                    return result
+            if done:
+                next_launch = time.monotonic()
+    finally:
+        for task in pending:
+            task.cancel()
+    return None
+
+# ---------- Stor sejarah (menyekat) ----------
+async def _offload(fn: Callable[..., T], *args: Any) -> T:
+    # Panggilan SQLite (stor sejarah) di thread executor supaya event loop tidak tersekat
+    return await asyncio.get_running_loop().run_in_executor(None, contextvars.copy_context().run, fn, *args)
+
+async def _partial(chain: str, address: str, values: Values, incomplete: List[str], plan: AsyncSubQueries,
+                   build: Callable[[Values, bool], Result]) -> Result:
+    # Sama seperti api_handler._partial; build(..., True) menulis stor sejarah jadi dijalankan di executor
+    if not incomplete:
+        return await _offload(build, values, True)
+    result = build(values, False)
+    if isinstance(result, WalletResult):
+        result.incomplete_fields = tuple(incomplete)
+    plan.complete(lambda full: _offload(lambda: _store_completed(chain, address, build(full, True))))
+    return result
+
+# ---------- Fetchers ----------
+async def fetch_eth(address: str) -> Result:
+    deadline = _deadline()
+
+    async def lookup(network):
+        async def attempt(rpc: str, timeout: float):
+            return _parse_eth(*await _post_batch(rpc, _eth_calls(address), timeout), network.decimals)
+        return await _hedged(list(network.rpcs), attempt, deadline)
+
+    found = await asyncio.gather(*(lookup(n) for n in EVM_NETWORKS), return_exceptions=True)
+    return _evm_result(address, [(n, None if isinstance(r, BaseException) else r) for n, r in zip(EVM_NETWORKS, found)])
+
+async def _maybe_get(url: Optional[str], timeout: float) -> Optional[Dict[str, Any]]:
+    return await _get_json(url, timeout) if url else None
+
+async def _get_until(url: str, deadline: float) -> Dict[str, Any]:
+    return await _get_json(url, _call_timeout(deadline))
+
+async def fetch_btc(address: str) -> Result:
+    deadline = _deadline()
+    plan = AsyncSubQueries(deadline)
+    data = await _hedged(_btc_endpoints(address), _attempt_get, deadline)
+    if not data:
+        return {"status": "0", "message": API_REJECTED}
+    result = _parse_btc(address, data)
+    prev = await _offload(_history, "btc", address)
+    oldest_url = _btc_oldest_url(address, prev, data, result.tx_count)
+    if oldest_url:
+        plan.optional("oldest", ("wallet_age",), _get_until(oldest_url, deadline))
+    values, incomplete = await plan.collect()
+    return await _partial("btc", address, values, incomplete, plan,
+                    lambda v, persist: _btc_history(address, result, data, prev, v.get("oldest"), persist))
+
+async def _tron_paged(address: str, prev: Optional[AddressHistory], deadline: float) -> Tuple[Optional[PageCount], Optional[Dict[str, Any]]]:
+    counted = await acount_items(
+        _tron_delta_url(address, prev), lambda url: _get_until(url, deadline),
+        _trongrid_next, _trongrid_items, _trongrid_timestamp, deadline=deadline,
+    )
+    return counted, await _maybe_get(_tron_oldest_url(address, prev, counted), _call_timeout(deadline))
+
+async def fetch_tron(address: str) -> Result:
+    deadline = _deadline()
+    plan = AsyncSubQueries(deadline)
+    prev = await _offload(_history, "tron", address)
+    plan.optional("paged", ("tx_count", "wallet_age"), _tron_paged(address, prev, deadline))
+    data = await _hedged(_tron_endpoints(address), _attempt_get, deadline)
+    if not data:
+        plan.cancel()
+        return {"status": "0", "message": API_REJECTED}
+    result = _parse_tron(address, data)
+    values, incomplete = await plan.collect()
+    return await _partial("tron", address, values, incomplete, plan,
+                    lambda v, persist: _tron_history(address, result, prev, *(v.get("paged") or (None, None)), persist))
+
+async def fetch_xrp(address: str) -> Result:
+    safe_addr = quote(address, safe="")
+    deadline = _deadline()
+    plan = AsyncSubQueries(deadline)
+
+    # Umur, kiraan tx dan 5 tx terakhir: pilihan, serentak dengan balance;
+    # inception hanya diminta jika first-seen belum ada dalam stor sejarah
+    prev = await _offload(_history, "xrp", address)
+    if not (prev and prev.first_seen):
+        plan.optional("meta", ("wallet_age",), _get_until(f"{XRP_DATA_API}/{safe_addr}", deadline))
+    plan.optional("tx_meta", ("tx_count",), _get_until(f"{XRP_DATA_API}/{safe_addr}/transactions?limit=1", deadline))
+    plan.optional("txs", ("last5tx",),
+                  _get_until(f"{XRP_DATA_API}/{safe_addr}/transactions?result=tesSUCCESS&limit=5", deadline))
+
+    async def attempt(rpc: str, timeout: float):
+        return _parse_xrp_account_info(await _post_json(rpc, _xrp_account_info_payload(address), timeout))
+
+    balance = await _hedged(XRP_RIPPLED_NODES, attempt, deadline)
+    if balance is None:
+        balance = _parse_xrp_balances(await _get_until(f"{XRP_DATA_API}/{safe_addr}/balances", deadline))
+    if balance is None:
+        plan.cancel()
+        return {"status": "0", "message": API_REJECTED}
+
+    values, incomplete = await plan.collect()
+    return await _partial("xrp", address, values, incomplete, plan,
+                    lambda v, persist: _xrp_history(address, balance, prev, v.get("meta"), v.get("tx_meta"),
+                                                    v.get("txs"), persist))
+
+async def fetch_solana(address: str) -> Result:
+    prev = await _offload(_history, "sol", address)
+    calls = _sol_calls(address, prev)
+
+    async def attempt(rpc: str, timeout: float):
+        return _parse_sol(*await _post_batch(rpc, calls, timeout))
+
+    res = await _hedged(SOL_RPCS, attempt)
+    if res is None:
+        return {"status": "0", "message": API_REJECTED}
+    return await _offload(lambda: _sol_result(address, *res, prev=prev))
+
+async def _hbar_paged(address: str, prev: Optional[AddressHistory], deadline: float) -> Tuple[Optional[PageCount], Optional[Dict[str, Any]]]:
+    counted = await acount_items(
+        _hbar_delta_url(address, prev), lambda url: _get_until(url, deadline),
+        _hedera_next, _hedera_items, _hedera_timestamp, deadline=deadline,
+    )
+    return counted, await _maybe_get(_hbar_oldest_url(address, prev, counted), _call_timeout(deadline))
+
+async def fetch_hbar(address: str) -> Result:
+    deadline = _deadline()
+    plan = AsyncSubQueries(deadline)
+    prev = await _offload(_history, "hbar", address)
+    plan.optional("paged", ("tx_count", "wallet_age"), _hbar_paged(address, prev, deadline))
+    data = await _hedged(_hbar_endpoints(address), _attempt_get, deadline)
+    if not data:
+        plan.cancel()
+        return {"status": "0", "message": API_REJECTED}
+    result = _parse_hbar(address, data)
+    values, incomplete = await plan.collect()
+    return await _partial("hbar", address, values, incomplete, plan,
+                    lambda v, persist: _hbar_history(address, result, prev, *(v.get("paged") or (None, None)), persist))
+
+FETCHERS: Dict[str, Callable[[str], Awaitable[Dict[str, Any]]]] = {
+    "eth": fetch_eth,
+    "tron": fetch_tron,
+    "btc": fetch_btc,
+    "xrp": fetch_xrp,
+    "sol": fetch_solana,
+    "hbar": fetch_hbar,
+}
+
+# ---------- Router ----------
+async def _fetch_and_store(chain: str, address: str) -> Result:
+    result = await FETCHERS[chain](address)
+    _store_completed(chain, address, result)
+    return result
+
+def _shared_fetch(chain: str, address: str) -> "asyncio.Task[Result]":
+    # Lookup serentak untuk address yang sama dalam event loop ini dikongsi
+    key = f"{chain}:{address}"
+    task = _inflight.get(key)
+    if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_fetch_and_store(chain, address))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _inflight.pop(key, None) if _inflight.get(key) is t else None)
+    return task
+
+async def get_wallet_data_async(address: str) -> Dict[str, Any]:
+    chain = detect_chain(address)
+    if chain is None:
+        return {"status": "0", "message": "❌ Invalid wallet format", "result": ""}
+
+    with track_lookup(chain):
+        # api_handler.RESULT_CACHE dibaca semasa panggilan (boleh diganti/dimatikan selepas import)
+        cache = api_handler.RESULT_CACHE
+        if cache is not None:
+            cached = cache.peek(chain, address)
+            if cached is not None:
+                value, age = cached
+                if age >= cache.ttl_for(chain):
+                    _shared_fetch(chain, address)  # stale: refresh di background
+                return as_dict(value)
+        return as_dict(await asyncio.shield(_shared_fetch(chain, address)))
+
+async def drain(timeout: Optional[float] = None) -> None:
+    # Refresh stale dan pelengkapan hasil separa mesti siap sebelum loop / session ditutup
+    loop = asyncio.get_running_loop()
+    refresh = [t for t in _inflight.values() if t.get_loop() is loop and not t.done()]
+    if refresh:
+        await asyncio.wait(refresh, timeout=timeout)
+    await drain_background(timeout)
+
+def get_wallet_data_sync(address: str) -> Dict[str, Any]:
+    # Pembalut nipis untuk pemanggil yang tiada event loop
+    async def run() -> Dict[str, Any]:
+        try:
+            return await get_wallet_data_async(address)
+        finally:
+            await drain()
+            await close_session()
+    return asyncio.run(run())
@@ -0,0 +1,319 @@
+from __future__ import annotations
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Pelayan HTTP tempatan yang meniru bentuk jawapan provider yang dihurai
+# oleh fetcher dalam api_handler. Digunakan bersama ADC_UPSTREAM_OVERRIDE:
+# laluan /<host asal>/<path asal> dihala ke handler ikut host.
+
+ETH_HOSTS = {"cloudflare-eth.com", "rpc.ankr.com", "ethereum.publicnode.com", "rpc.flashbots.net",
+             "eth-mainnet.public.blastapi.io"}
+# Rangkaian EVM lain (evm_networks.DEFAULT_NETWORKS): host -> chain id
+EVM_CHAIN_HOSTS = {
+    "bsc-dataseed.bnb.org": 56, "bsc-dataseed1.defibit.io": 56, "bsc-rpc.publicnode.com": 56,
+    "polygon-rpc.com": 137, "polygon-bor-rpc.publicnode.com": 137,
+    "arb1.arbitrum.io": 42161, "arbitrum-one-rpc.publicnode.com": 42161,
+    "mainnet.optimism.io": 10, "optimism-rpc.publicnode.com": 10,
+    "mainnet.base.org": 8453, "base-rpc.publicnode.com": 8453,
+    "api.avax.network": 43114, "avalanche-c-chain-rpc.publicnode.com": 43114,
+}
+SOL_HOSTS = {"api.mainnet-beta.solana.com", "solana.publicnode.com", "api.solana.com",
+             "solana-api.projectserum.com"}
+XRPL_HOSTS = {"xrplcluster.com", "s1.ripple.com:51234", "s2.ripple.com:51234", "xrpl.link",
+              "rippled.xrpldata.com"}
+NOW = 1_700_000_000
+
+class FaultConfig:
+    # latency (saat) + jitter, kadar 500 dan kadar 429; boleh ditetapkan per host
+    def __init__(self, latency: float = 0.02, jitter: float = 0.01, error_rate: float = 0.0,
+                 rate_429: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+
+def _rng(address: str) -> random.Random:
+    return random.Random(zlib.crc32(address.encode("utf-8")))
+
+def _txs(address: str, n: int, step: int = 86400) -> list:
+    return [{"hash": f"{zlib.crc32(f'{address}:{i}'.encode()):08x}" * 8, "time": NOW - i * step} for i in range(n)]
+
+# ---------- handler ikut bentuk jawapan ----------
+def _eth_rpc(call: Dict[str, Any], chain_id: int = 1) -> Dict[str, Any]:
+    address = (call.get("params") or [""])[0]
+    r = _rng(address if chain_id == 1 else f"{chain_id}:{address}")
+    if call.get("method") == "eth_getBalance":
+        result = hex(r.randint(0, 50) * 10**17)
+    elif call.get("method") == "eth_getTransactionCount":
+        result = hex(r.randint(0, 300))
+    else:
+        return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32601, "message": "method not found"}}
+    return {"jsonrpc": "2.0", "id": call.get("id"), "result": result}
+
+def _sol_rpc(call: Dict[str, Any]) -> Dict[str, Any]:
+    params = call.get("params") or [""]
+    address = params[0]
+    r = _rng(address)
+    if call.get("method") == "getBalance":
+        result: Any = {"context": {"slot": 1}, "value": r.randint(0, 10**10)}
+    elif call.get("method") == "getSignaturesForAddress":
+        opts = params[1] if len(params) > 1 and isinstance(params[1], dict) else {}
+        sigs = [{"signature": t["hash"][:88], "slot": 1000 - i, "blockTime": t["time"], "err": None}
+                for i, t in enumerate(_txs(address, r.randint(0, 150)))]
+        until = opts.get("until")
+        if until:
+            cut = next((i for i, sig in enumerate(sigs) if sig["signature"] == until), len(sigs))
+            sigs = sigs[:cut]
+        result = sigs[:opts.get("limit", 1000)]
+    else:
+        return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32601, "message": "method not found"}}
+    return {"jsonrpc": "2.0", "id": call.get("id"), "result": result}
+
+def _xrpl_rpc(body: Dict[str, Any]) -> Dict[str, Any]:
+    account = ((body.get("params") or [{}])[0] or {}).get("account", "")
+    drops = _rng(account).randint(10, 10**9)
+    return {"result": {"status": "success", "account_data": {"Account": account, "Balance": str(drops)}}}
+
+def _btc(host: str, path: str, query: Dict[str, list]) -> Dict[str, Any]:
+    address = unquote(path.rstrip("/").split("/")[-1])
+    r = _rng(address)
+    sats, n_tx = r.randint(0, 10**9), r.randint(0, 400)
+    if host == "blockchain.info":
+        offset = int((query.get("offset") or ["0"])[0])
+        limit = int((query.get("limit") or ["50"])[0])
+        txs = [{"hash": t["hash"], "time": t["time"]} for t in _txs(address, n_tx)[offset:offset + limit]]
+        return {"address": address, "final_balance": sats, "n_tx": n_tx, "txs": txs}
+    if host in ("blockstream.info", "mempool.space"):
+        return {"address": address, "chain_stats": {"funded_txo_sum": sats * 2, "spent_txo_sum": sats, "tx_count": n_tx}}
+    if host == "api.blockcypher.com":
+        return {"address": address, "balance": sats, "final_balance": sats, "n_tx": n_tx, "final_n_tx": n_tx}
+    return {"data": {address: {"address": {"balance": sats, "transaction_count": n_tx}}}}
+
+def _tron(host: str, path: str, query: Dict[str, list]) -> Dict[str, Any]:
+    address = (query.get("address") or [""])[0] or path.split("/accounts/")[-1].split("/")[0]
+    r = _rng(address)
+    sun = r.randint(0, 10**10)
+    txs = [{"txID": t["hash"], "block_timestamp": t["time"] * 1000} for t in _txs(address, r.randint(0, 400), 3600)]
+    if host == "apilist.trongrid.io":
+        if path.endswith("/transactions"):
+            since = int((query.get("min_timestamp") or ["0"])[0])
+            txs = [tx for tx in txs if tx["block_timestamp"] >= since]
+            if (query.get("order_by") or [""])[0].endswith(",asc"):
+                txs.reverse()
+            # fingerprint = offset seterusnya (legap bagi klien)
+            offset = int((query.get("fingerprint") or ["0"])[0])
+            limit = int((query.get("limit") or ["20"])[0])
+            page = txs[offset:offset + limit]
+            meta: Dict[str, Any] = {"page_size": len(page)}
+            if offset + limit < len(txs):
+                meta["fingerprint"] = str(offset + limit)
+            return {"data": page, "success": True, "meta": meta}
+        return {"data": [{"address": address, "balance": sun}], "success": True}
+    return {"balance": sun / 1e6, "transaction": txs}
+
+def _ripple_data(host: str, path: str, query: Dict[str, list]) -> Dict[str, Any]:
+    parts = path.strip("/").split("/")
+    address = parts[2] if len(parts) > 2 else ""
+    r = _rng(address)
+    if path.endswith("/balances"):
+        return {"result": "success", "balances": [{"currency": "XRP", "value": str(r.randint(10, 1000))}]}
+    if path.endswith("/transactions"):
+        count = r.randint(0, 500)
+        limit = int((query.get("limit") or ["1"])[0])
+        txs = [{"hash": t["hash"], "date": t["time"],
+                "tx": {"hash": t["hash"], "Account": address, "Destination": "rDest", "Amount": "1000000"}}
+               for t in _txs(address, min(limit, count))]
+        return {"result": "success", "count": count, "transactions": txs}
+    return {"result": "success", "account": address, "inception": NOW - r.randint(1, 2000) * 86400}
+
+def _hedera(host: str, path: str, query: Dict[str, list]) -> Dict[str, Any]:
+    account = (query.get("account.id") or [""])[0] or path.rstrip("/").split("/")[-1]
+    r = _rng(account)
+    tinybars = r.randint(0, 10**12)
+    if "/transactions" in path:
+        txs = [{"transaction_id": t["hash"], "consensus_timestamp": f"{t['time']}.000000000"}
+               for t in _txs(account, r.randint(0, 300), 3600)]
+        for cond in query.get("timestamp") or []:
+            op, _, value = cond.partition(":")
+            bound = float(value)
+            keep = {"gt": lambda ts: ts > bound, "lt": lambda ts: ts < bound}.get(op)
+            if keep:
+                txs = [tx for tx in txs if keep(float(tx["consensus_timestamp"]))]
+        if (query.get("order") or ["desc"])[0] == "asc":
+            txs.reverse()
+        limit = int((query.get("limit") or ["25"])[0])
+        page, more = txs[:limit], len(txs) > limit
+        nxt = None
+        if more and page:
+            op = "gt" if (query.get("order") or ["desc"])[0] == "asc" else "lt"
+            rest = "&".join(f"{k}={v}" for k, vals in query.items() if k != "timestamp" for v in vals)
+            nxt = f"/api/v1/transactions?{rest}&timestamp={op}:{page[-1]['consensus_timestamp']}"
+        return {"transactions": page, "links": {"next": nxt}}
+    if "/balances" in path:
+        return {"balances": [{"account": account, "balance": tinybars}]}
+    return {"account": account, "balance": {"balance": tinybars, "timestamp": f"{NOW}.0"}}
+
+GET_ROUTES: Dict[str, Callable[[str, str, Dict[str, list]], Dict[str, Any]]] = {
+    "blockchain.info": _btc,
+    "blockstream.info": _btc,
+    "api.blockcypher.com": _btc,
+    "api.blockchair.com": _btc,
+    "mempool.space": _btc,
+    "apilist.tronscanapi.com": _tron,
+    "apilist.trongrid.io": _tron,
+    "apilist.tronscan.org": _tron,
+    "tronscan.org": _tron,
+    "data.ripple.com": _ripple_data,
+    "mainnet-public.mirrornode.hedera.com": _hedera,
+    "testnet.mirrornode.hedera.com": _hedera,
+}
+
+class _Server(ThreadingHTTPServer):
+    # Backlog besar: warm-up / benchmark buka banyak sambungan serentak
+    # (backlog default 5 menyebabkan SYN diulang selepas 1s)
+    request_queue_size = 128
+
+class MockProviderServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, default: Optional[FaultConfig] = None,
+                 per_host: Optional[Dict[str, FaultConfig]] = None, seed: int = 42):
+        self.default = default or FaultConfig()
+        self.per_host = dict(per_host or {})
+        self.requests = 0
+        self._rand = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = _Server((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockProviderServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _fault(self, host: str) -> Tuple[float, Optional[int]]:
+        cfg = self.per_host.get(host, self.default)
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, cfg.latency + self._rand.uniform(-cfg.jitter, cfg.jitter))
+            roll = self._rand.random()
+        if roll < cfg.rate_429:
+            return delay, 429
+        if roll < cfg.rate_429 + cfg.error_rate:
+            return delay, 500
+        return delay, None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, *args):
+                pass
+
+            def _split(self) -> Tuple[str, str, Dict[str, list]]:
+                parts = urlsplit(self.path)
+                host, _, path = parts.path.lstrip("/").partition("/")
+                return host, "/" + path, parse_qs(parts.query)
+
+            def _reply(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _maybe_fault(self, host: str) -> bool:
+                delay, status = server._fault(host)
+                time.sleep(delay)
+                if status == 429:
+                    self._reply(429, {"error": "rate limited"}, {"Retry-After": "1"})
+                    return True
+                if status == 500:
+                    self._reply(500, {"error": "internal"})
+                    return True
+                return False
+
+            def do_GET(self):
+                host, path, query = self._split()
+                if self._maybe_fault(host):
+                    return
+                route = GET_ROUTES.get(host)
+                if route is None:
+                    self._reply(404, {"error": f"unknown host {host}"})
+                    return
+                self._reply(200, route(host, path, query))
+
+            def do_POST(self):
+                host, path, _ = self._split()
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"null")
+                except ValueError:
+                    self._reply(400, {"error": "bad json"})
+                    return
+                if self._maybe_fault(host):
+                    return
+                if host in ETH_HOSTS and not path.startswith("/solana"):
+                    handler = _eth_rpc
+                elif host in EVM_CHAIN_HOSTS:
+                    chain_id = EVM_CHAIN_HOSTS[host]
+                    handler = lambda call: _eth_rpc(call, chain_id)
+                elif host in SOL_HOSTS or path.startswith("/solana"):
+                    handler = _sol_rpc
+                elif host in XRPL_HOSTS:
+                    self._reply(200, _xrpl_rpc(body if isinstance(body, dict) else {}))
+                    return
+                else:
+                    self._reply(404, {"error": f"unknown host {host}"})
+                    return
+                if isinstance(body, list):
+                    self._reply(200, [handler(c) for c in body if isinstance(c, dict)])
+                else:
+                    self._reply(200, handler(body or {}))
+
+        return Handler
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mock blockchain providers for benchmarks")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    args = parser.parse_args()
+    server = MockProviderServer(port=args.port, default=FaultConfig(args.latency, args.jitter, args.error_rate, args.rate_429))
+    print(f"mock providers on {server.url} (set ADC_UPSTREAM_OVERRIDE={server.url})")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_pool  # noqa: E402
+import http_replay  # noqa: E402
+from bench.mock_providers import FaultConfig, MockProviderServer  # noqa: E402
+
+# Alamat contoh (format sah) bagi setiap chain; jawapan mock ditentukan oleh address
+SAMPLE_ADDRESSES = {
+    "eth": ["0xde0B295669a9FD93d5F28D9Ec85E40f4cb697BAe", "0x00000000219ab540356cBB839Cbe05303d7705Fa"],
+    "btc": ["1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa", "3J98t1WpEZ73CNmQviecrnyiWrnqRhWNLy",
+            "bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq"],
+    "tron": ["TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"],
+    "xrp": ["rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh", "rPT1Sjq2YGrBMTttX4GZHjKu9dyfzbpAYe"],
+    "sol": ["4Nd1mBQtrMJVYVfKf2PJy9NZUZdTAsp7D4xWLs4gDB4T"],
+    "hbar": ["0.0.98", "0.0.800"],
+}
+DEFAULT_OUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "n": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p50_ms": round(pick(0.50) * 1000, 3),
+        "p90_ms": round(pick(0.90) * 1000, 3),
+        "p99_ms": round(pick(0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+def bench_end_to_end(iterations: int) -> Dict[str, Any]:
+    import api_handler
+
+    out: Dict[str, Any] = {}
+    for chain, addresses in SAMPLE_ADDRESSES.items():
+        samples: List[float] = []
+        failures = 0
+        for i in range(iterations):
+            address = addresses[i % len(addresses)]
+            started = time.perf_counter()
+            result = api_handler.get_wallet_data(address)
+            samples.append(time.perf_counter() - started)
+            if result.get("status") == "0":
+                failures += 1
+        out[chain] = dict(_summary(samples), failures=failures)
+    return out
+
+def bench_flask(requests_total: int, concurrency: int) -> Dict[str, Any]:
+    import requests
+    from werkzeug.serving import make_server
+
+    import app as app_module
+
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_port}/"
+    addresses = [a for group in SAMPLE_ADDRESSES.values() for a in group]
+    local = threading.local()
+
+    def one(i: int):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        r = session.post(base, data={"wallet": addresses[i % len(addresses)]}, allow_redirects=False)
+        return time.perf_counter() - started, r.status_code
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(one, range(requests_total)))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.shutdown()
+
+    ok = sum(1 for _, status in results if status == 200)
+    return dict(_summary([lat for lat, _ in results]),
+                concurrency=concurrency,
+                throughput_rps=round(len(results) / elapsed, 2),
+                ok=ok,
+                non_200=len(results) - ok)
+
+def _rate(fn: Callable[[], Any], number: int, items_per_call: int = 1) -> Dict[str, float]:
+    best = min(timeit.repeat(fn, number=number, repeat=3))
+    return {"ops_per_sec": round(number * items_per_call / best, 1), "us_per_op": round(best / (number * items_per_call) * 1e6, 3)}
+
+def bench_micro() -> Dict[str, Any]:
+    import random
+
+    import api_handler
+    import risk_batch
+    from address_classifier import candidates, classify_batch
+    from ai_risk import calculate_risk_score
+    from bench.mock_providers import _btc
+    from iso_export import generate_iso_xml
+
+    rnd = random.Random(7)
+    n = 10_000
+    records = [{"balance": rnd.choice([0, rnd.random() * 5]), "tx_count": rnd.randint(0, 300),
+                "wallet_age": rnd.random() * 800} for _ in range(n)]
+    bal, tx, age, _ = risk_batch.columns_from_results(records)
+    sample = [a for group in SAMPLE_ADDRESSES.values() for a in group]
+    btc_payload = _btc("blockchain.info", "/rawaddr/1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa", {})
+
+    return {
+        "score_per_record": _rate(lambda: [api_handler._score(r) for r in records], 3, n),
+        "score_batch_numpy": _rate(lambda: risk_batch.ai_scores(bal, tx, age), 20, n),
+        "calculate_risk_score": _rate(lambda: [calculate_risk_score(r) for r in records], 3, n),
+        "risk_scores_numpy": _rate(lambda: risk_batch.risk_scores(bal, tx, age), 20, n),
+        "classify_batch_cold": _rate(lambda: (candidates.cache_clear(), classify_batch(sample)), 50, len(sample)),
+        "generate_iso_xml": _rate(lambda: generate_iso_xml("rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh"), 2000),
+        "parse_btc_blockchain_info": _rate(lambda: api_handler._parse_btc("1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa", btc_payload), 2000),
+    }
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return ""
+
+def _flatten(prefix: str, value: Any, out: Dict[str, float]) -> None:
+    if isinstance(value, dict):
+        for k, v in value.items():
+            _flatten(f"{prefix}.{k}" if prefix else k, v, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = float(value)
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    a: Dict[str, float] = {}
+    b: Dict[str, float] = {}
+    _flatten("", {k: v for k, v in old.items() if k != "meta"}, a)
+    _flatten("", {k: v for k, v in new.items() if k != "meta"}, b)
+    lines = []
+    for key in sorted(set(a) & set(b)):
+        if a[key] == b[key] or not key.endswith(("_ms", "_rps", "ops_per_sec")):
+            continue
+        change = (b[key] - a[key]) / a[key] * 100 if a[key] else float("inf")
+        lines.append(f"{key:55s} {a[key]:>12.3f} -> {b[key]:>12.3f} ({change:+.1f}%)")
+    return lines
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ADC Cryptoguard benchmark suite")
+    parser.add_argument("--iterations", type=int, default=20, help="lookups per chain (end-to-end)")
+    parser.add_argument("--requests", type=int, default=200, help="total Flask requests")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.02, help="mock provider latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--cache", action="store_true", help="keep the result cache enabled")
+    parser.add_argument("--keep-rate-limits", action="store_true", help="keep client-side provider rate limits")
+    parser.add_argument("--only", choices=["e2e", "flask", "micro"], action="append")
+    parser.add_argument("--out", help="result JSON path (default bench/results/bench-<time>.json)")
+    parser.add_argument("--compare", help="previous result JSON to diff against")
+    parser.add_argument("--record", metavar="ARCHIVE", help="record provider responses into ARCHIVE")
+    parser.add_argument("--replay", metavar="ARCHIVE", help="replay provider responses from ARCHIVE (no mock, no network)")
+    parser.add_argument("--replay-speed", choices=["recorded", "max"], default="recorded",
+                        help="sleep recorded latencies or replay as fast as possible")
+    args = parser.parse_args()
+
+    # Replay tidak perlukan mock: semua jawapan datang dari arkib
+    mock = None
+    if not args.replay:
+        fault = FaultConfig(args.latency, args.jitter, args.error_rate, args.rate_429)
+        mock = MockProviderServer(default=fault).start()
+        http_pool.set_upstream_override(mock.url)
+    if args.record or args.replay:
+        http_replay.set_mode("replay" if args.replay else "record", args.replay or args.record, args.replay_speed)
+
+    # Jangan sentuh kiraan penggunaan sebenar semasa benchmark
+    os.environ["USAGE_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="adc-bench-"), "usage.sqlite3")
+
+    import api_handler
+    import rate_limit
+
+    if not args.cache:
+        api_handler.RESULT_CACHE = None
+    if args.record or args.replay:
+        # URL delta bergantung pada stor sejarah; tanpa stor, URL rakaman = URL replay
+        api_handler.HISTORY = None
+    if not args.keep_rate_limits:
+        rate_limit.LIMITER.limits.clear()
+        rate_limit.LIMITER._buckets.clear()
+
+    only = set(args.only or ["e2e", "flask", "micro"])
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": vars(args),
+        }
+    }
+    try:
+        if "e2e" in only:
+            results["e2e"] = bench_end_to_end(args.iterations)
+        if "flask" in only:
+            results["flask"] = bench_flask(args.requests, args.concurrency)
+        if "micro" in only:
+            results["micro"] = bench_micro()
+    finally:
+        if mock is not None:
+            results["meta"]["mock_requests"] = mock.requests
+            mock.stop()
+        if http_replay.REPLAYER is not None:
+            results["meta"]["replay"] = http_replay.REPLAYER.stats()
+        http_replay.set_mode("")
+
+    out = args.out or os.path.join(DEFAULT_OUT_DIR, f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps({k: v for k, v in results.items() if k != "meta"}, indent=2))
+    print(f"results written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            for line in compare(json.load(f), results):
+                print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+from __future__ import annotations
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, Iterable, Iterator, Optional, Tuple
+
+from api_handler import detect_chain, get_wallet_data
+
+# Bulk screening: had serentak ikut chain supaya satu senarai besar tidak
+# membanjiri satu kumpulan provider.
+BULK_WORKERS = int(os.environ.get("BULK_WORKERS", "32"))
+BULK_MAX_ADDRESSES = int(os.environ.get("BULK_MAX_ADDRESSES", "50000"))
+CHAIN_CONCURRENCY = {
+    "eth": 8,
+    "tron": 4,
+    "btc": 4,
+    "xrp": 6,
+    "sol": 8,
+    "hbar": 6,
+}
+ADDRESS_FIELDS = ("address", "wallet")
+
+_BULK_POOL = ThreadPoolExecutor(max_workers=BULK_WORKERS, thread_name_prefix="bulk")
+
+def detect_format(content_type: str = "", filename: str = "") -> str:
+    content_type = (content_type or "").lower()
+    filename = (filename or "").lower()
+    if "ndjson" in content_type or "jsonl" in content_type or filename.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if "csv" in content_type or filename.endswith(".csv"):
+        return "csv"
+    return "text"
+
+def parse_addresses(lines: Iterable[str], fmt: str = "text") -> Iterator[str]:
+    # CSV: lajur "address"/"wallet" jika ada header, jika tidak lajur pertama.
+    # NDJSON: setiap baris string JSON atau objek {"address": ...}.
+    if fmt == "csv":
+        rows = csv.reader(lines)
+        col = 0
+        for i, row in enumerate(rows):
+            if not row:
+                continue
+            if i == 0:
+                header = [c.strip().lower() for c in row]
+                found = next((header.index(f) for f in ADDRESS_FIELDS if f in header), None)
+                if found is not None:
+                    col = found
+                    continue
+            if col < len(row) and row[col].strip():
+                yield row[col].strip()
+        return
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if fmt == "ndjson":
+            try:
+                item = json.loads(line)
+            except ValueError:
+                yield line
+                continue
+            if isinstance(item, dict):
+                item = next((item[f] for f in ADDRESS_FIELDS if item.get(f)), "")
+            if isinstance(item, str) and item.strip():
+                yield item.strip()
+        else:
+            yield line
+
+def _lookup(index: int, address: str, chain: str) -> Dict[str, Any]:
+    try:
+        result = get_wallet_data(address)
+    except Exception:
+        result = {"status": "0", "message": "❌ Lookup failed"}
+    return {"index": index, "address": address, "chain": chain, "result": result}
+
+def iter_bulk_results(addresses: Iterable[str], limits: Optional[Dict[str, int]] = None,
+                      max_addresses: int = BULK_MAX_ADDRESSES) -> Iterator[Dict[str, Any]]:
+    # Hasil dipulangkan ikut siapa siap dahulu (bukan ikut susunan input);
+    # "index" merujuk kedudukan asal. Input dibaca secara lazy dengan buffer terhad.
+    limits = dict(CHAIN_CONCURRENCY if limits is None else limits)
+    buffer_cap = max(BULK_WORKERS * 4, 64)
+    queues: Dict[str, Deque[Tuple[int, str]]] = {}
+    running: Dict[str, int] = {}
+    futures: Dict[Any, str] = {}
+    buffered = 0
+    source = iter(enumerate(addresses))
+    exhausted = False
+
+    while True:
+        while not exhausted and buffered < buffer_cap:
+            try:
+                index, address = next(source)
+            except StopIteration:
+                exhausted = True
+                break
+            if index >= max_addresses:
+                exhausted = True
+                yield {"index": index, "address": None, "chain": None,
+                       "result": {"status": "0", "message": f"❌ Limit {max_addresses} address dicapai"}}
+                break
+            address = (address or "").strip()
+            chain = detect_chain(address)
+            if chain is None:
+                yield {"index": index, "address": address, "chain": None,
+                       "result": {"status": "0", "message": "❌ Invalid wallet format"}}
+                continue
+            queues.setdefault(chain, deque()).append((index, address))
+            buffered += 1
+
+        for chain, queue in queues.items():
+            limit = max(1, limits.get(chain, 4))
+            while queue and running.get(chain, 0) < limit:
+                index, address = queue.popleft()
+                futures[_BULK_POOL.submit(_lookup, index, address, chain)] = chain
+                running[chain] = running.get(chain, 0) + 1
+
+        if not futures:
+            if exhausted and not buffered:
+                return
+            continue
+
+        done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+        for fut in done:
+            chain = futures.pop(fut)
+            running[chain] -= 1
+            buffered -= 1
+            yield fut.result()
+
+def iter_ndjson(results: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for item in results:
+        yield json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n"
@@ -0,0 +1,99 @@
+from __future__ import annotations
+import json
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# Registry rangkaian EVM. Address 0x yang sama disemak pada setiap rangkaian
+# yang diaktifkan, serentak dan dengan satu deadline dikongsi.
+# EVM_NETWORKS: kunci dipisah koma, atau "all" (default: ethereum sahaja;
+# rangkaian lain opt-in kerana setiap satu menambah panggilan RPC).
+# EVM_NETWORKS_FILE: fail JSON (senarai objek) untuk tambah / ganti rangkaian ikut kunci.
+PRIMARY = "ethereum"
+
+class EvmNetwork(NamedTuple):
+    key: str
+    name: str
+    chain_id: int
+    rpcs: Tuple[str, ...]
+    decimals: int = 18
+    symbol: str = "ETH"
+
+DEFAULT_NETWORKS: Tuple[EvmNetwork, ...] = (
+    EvmNetwork("ethereum", "Ethereum", 1, (
+        "https://cloudflare-eth.com",
+        "https://rpc.ankr.com/eth",
+        "https://ethereum.publicnode.com",
+        "https://rpc.flashbots.net",
+        "https://eth-mainnet.public.blastapi.io",
+    )),
+    EvmNetwork("bsc", "BNB Smart Chain", 56, (
+        "https://bsc-dataseed.bnb.org",
+        "https://bsc-dataseed1.defibit.io",
+        "https://bsc-rpc.publicnode.com",
+    ), symbol="BNB"),
+    EvmNetwork("polygon", "Polygon", 137, (
+        "https://polygon-rpc.com",
+        "https://polygon-bor-rpc.publicnode.com",
+    ), symbol="POL"),
+    EvmNetwork("arbitrum", "Arbitrum One", 42161, (
+        "https://arb1.arbitrum.io/rpc",
+        "https://arbitrum-one-rpc.publicnode.com",
+    )),
+    EvmNetwork("optimism", "OP Mainnet", 10, (
+        "https://mainnet.optimism.io",
+        "https://optimism-rpc.publicnode.com",
+    )),
+    EvmNetwork("base", "Base", 8453, (
+        "https://mainnet.base.org",
+        "https://base-rpc.publicnode.com",
+    )),
+    EvmNetwork("avalanche", "Avalanche C-Chain", 43114, (
+        "https://api.avax.network/ext/bc/C/rpc",
+        "https://avalanche-c-chain-rpc.publicnode.com",
+    ), symbol="AVAX"),
+)
+
+def _from_dict(item: Dict[str, Any]) -> Optional[EvmNetwork]:
+    try:
+        rpcs = tuple(str(u) for u in item["rpcs"] if u)
+        if not rpcs:
+            return None
+        return EvmNetwork(str(item["key"]), str(item.get("name") or item["key"]), int(item["chain_id"]), rpcs,
+                          int(item.get("decimals", 18)), str(item.get("symbol") or "ETH"))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def load_networks(path: Optional[str] = None, enabled: Optional[Sequence[str]] = None) -> List[EvmNetwork]:
+    """Rangkaian aktif: registry default + fail JSON, ditapis ikut `enabled`.
+
+    Rangkaian utama (ethereum) sentiasa disertakan dan di hadapan; ia
+    menentukan baki / nonce yang dipaparkan.
+    """
+    path = os.environ.get("EVM_NETWORKS_FILE") if path is None else path
+    if enabled is None:
+        spec = os.environ.get("EVM_NETWORKS", "").strip()
+        enabled = [k.strip() for k in spec.split(",") if k.strip()]
+    if any(k == "all" for k in enabled):
+        enabled = None
+
+    by_key = {n.key: n for n in DEFAULT_NETWORKS}
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            for item in json.load(f):
+                network = _from_dict(item) if isinstance(item, dict) else None
+                if network is not None:
+                    by_key[network.key] = network
+
+    keys = list(by_key) if enabled is None else [k for k in dict.fromkeys(enabled) if k in by_key]
+    if PRIMARY not in keys:
+        keys.append(PRIMARY)
+    keys.sort(key=lambda k: k != PRIMARY)
+    return [by_key[k] for k in keys]
+
+def units(raw: Any, decimals: int) -> float:
+    # Nilai hex / int dari RPC -> unit asli (cth. wei -> ETH)
+    try:
+        val = int(raw, 16) if isinstance(raw, str) else int(raw)
+        return val / 10**decimals
+    except Exception:
+        return 0.0
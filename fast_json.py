@@ -0,0 +1,15 @@
+from __future__ import annotations
+import json
+from typing import Any
+
+# Encoder JSON untuk respons API: orjson jika dipasang, jika tidak json
+# stdlib dengan output padat. Kedua-duanya pulangkan bytes UTF-8.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,50 @@
+import os
+
+# Konfigurasi produksi, opt-in: `gunicorn -c gunicorn_conf.py app:app`
+# (bukan gunicorn.conf.py, supaya `gunicorn app:app` kekal dengan default
+# gunicorn). Setiap nilai boleh diganti melalui env; lihat README.
+bind = f"0.0.0.0:{os.environ.get('PORT', '1000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+# preload: import + warm-up "local" sekali dalam master; worker baru di-fork
+# dalam keadaan panas (modul, template Jinja dan classifier sudah dimuat)
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+def on_starting(server):
+    # Backend job "memory" hanya dalam satu proses: poll yang sampai ke worker
+    # lain dapat 404. Tolak start daripada gagal secara senyap.
+    if server.cfg.workers <= 1:
+        return
+    import sys
+    from jobs import MemoryBackend, resolve_backend
+    app_module = sys.modules.get("app")
+    queue = getattr(app_module, "JOBS", None)
+    if app_module is not None:
+        memory = queue is not None and isinstance(queue.backend, MemoryBackend)
+    else:
+        memory = resolve_backend() == "memory"
+    if memory:
+        raise RuntimeError(f"JOB_BACKEND=memory cannot be shared by {server.cfg.workers} workers; "
+                           "use JOB_BACKEND=sqlite (or auto) or WEB_CONCURRENCY=1")
+
+def when_ready(server):
+    if preload_app:
+        from app import app
+        from startup import WARMUP, warm_up
+        # Tiada sambungan rangkaian dalam master (mode "full" dibuat per worker)
+        mode = "off" if WARMUP == "off" else "local"
+        server.log.info("warm-up (master): %s", warm_up(app, mode))
+
+def post_fork(server, worker):
+    # Sambungan HTTP tidak boleh dikongsi merentas fork: buang session dari
+    # master, kemudian warm-up per worker sebelum worker terima request
+    import http_pool
+    from app import JOBS, app
+    from startup import warm_up
+    http_pool.close_all()
+    server.log.info("warm-up (worker %s): %s", worker.pid, warm_up(app))
+    # Dispatcher job dimula terus (bukan hanya pada submit): task yang
+    # ditinggalkan worker yang mati diambil walaupun tiada job baru
+    if JOBS is not None:
+        JOBS.start()
@@ -0,0 +1,128 @@
+from __future__ import annotations
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Iterable, Optional
+
+# Stor sejarah tempatan bagi sync berperingkat: cursor per address (tx /
+# signature / timestamp terakhir), masa first-seen dan kiraan tx. Semakan
+# berikutnya hanya minta transaksi selepas cursor.
+# Kunci ialah SHA-256 chain:address; address tidak disimpan sebagai teks.
+HISTORY_STORE = os.environ.get("HISTORY_STORE", os.path.join("instance", "history.sqlite3"))
+RECENT_LIMIT = int(os.environ.get("HISTORY_RECENT_LIMIT", "64"))
+
+def _key(chain: str, address: str) -> bytes:
+    return hashlib.sha256(f"{chain}:{address}".encode("utf-8")).digest()
+
+class AddressHistory:
+    __slots__ = ("first_seen", "last_seen", "cursor", "tx_count", "recent")
+
+    def __init__(self, first_seen: int = 0, last_seen: int = 0, cursor: Optional[str] = None,
+                 tx_count: int = 0, recent: Optional[array] = None):
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        self.cursor = cursor
+        self.tx_count = tx_count
+        # Timestamp (epoch saat) transaksi terbaru, terbaru dahulu; array 'q' padat
+        self.recent = recent if recent is not None else array("q")
+
+    def age_days(self, now: Optional[float] = None) -> float:
+        if not self.first_seen:
+            return 0.0
+        return max(0.0, ((time.time() if now is None else now) - self.first_seen) / 86400.0)
+
+def merge(prev: Optional[AddressHistory], new_times: Iterable[int] = (), cursor: Optional[str] = None,
+          tx_count: Optional[int] = None, first_seen: Optional[int] = None) -> AddressHistory:
+    """Gabung delta (tx selepas cursor, terbaru dahulu) ke dalam rekod sedia ada.
+
+    tx_count diberi jika provider ada jumlah muktamad; jika tidak, kiraan
+    ditambah dengan bilangan tx baru. first_seen hanya dari pemanggil (tx
+    pertama yang disahkan) supaya halaman separa tidak dianggap sejarah penuh.
+    """
+    prev = prev or AddressHistory()
+    times = array("q", (int(t) for t in new_times if t))
+    recent = (times + prev.recent)[:RECENT_LIMIT]
+    seen = [t for t in (first_seen, prev.first_seen) if t]
+    return AddressHistory(
+        first_seen=min(seen) if seen else 0,
+        last_seen=max(prev.last_seen, max(times) if times else 0),
+        cursor=cursor or prev.cursor,
+        tx_count=tx_count if tx_count is not None else prev.tx_count + len(times),
+        recent=recent,
+    )
+
+class HistoryStore:
+    def __init__(self, path: str = HISTORY_STORE):
+        self.path = path
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "key BLOB PRIMARY KEY, first_seen INTEGER NOT NULL, last_seen INTEGER NOT NULL, "
+            "cursor TEXT, tx_count INTEGER NOT NULL, recent BLOB NOT NULL, updated_at INTEGER NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        # Satu sambungan per thread (dan per proses selepas fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @staticmethod
+    def _row(row) -> Optional[AddressHistory]:
+        if row is None:
+            return None
+        first_seen, last_seen, cursor, tx_count, blob = row
+        recent = array("q")
+        recent.frombytes(blob)
+        return AddressHistory(first_seen, last_seen, cursor, tx_count, recent)
+
+    def get(self, chain: str, address: str) -> Optional[AddressHistory]:
+        row = self._conn().execute(
+            "SELECT first_seen, last_seen, cursor, tx_count, recent FROM history WHERE key = ?",
+            (_key(chain, address),),
+        ).fetchone()
+        return self._row(row)
+
+    def apply(self, chain: str, address: str, new_times: Iterable[int] = (), cursor: Optional[str] = None,
+              tx_count: Optional[int] = None, first_seen: Optional[int] = None) -> AddressHistory:
+        # get + merge + put dalam satu transaksi supaya worker serentak tidak kira dua kali
+        conn = self._conn()
+        key = _key(chain, address)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            prev = self._row(conn.execute(
+                "SELECT first_seen, last_seen, cursor, tx_count, recent FROM history WHERE key = ?", (key,)
+            ).fetchone())
+            merged = merge(prev, new_times, cursor, tx_count, first_seen)
+            conn.execute(
+                "INSERT OR REPLACE INTO history (key, first_seen, last_seen, cursor, tx_count, recent, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, merged.first_seen, merged.last_seen, merged.cursor, merged.tx_count,
+                 merged.recent.tobytes(), int(time.time())),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return merged
+
+    def forget(self, chain: str, address: str) -> None:
+        self._conn().execute("DELETE FROM history WHERE key = ?", (_key(chain, address),))
+
+def build_history_store() -> Optional[HistoryStore]:
+    # HISTORY_STORE=off: tiada stor, setiap semakan tarik semula dari provider
+    if not HISTORY_STORE or HISTORY_STORE.lower() == "off":
+        return None
+    try:
+        return HistoryStore(HISTORY_STORE)
+    except (OSError, sqlite3.Error):
+        return None
@@ -0,0 +1,101 @@
+from __future__ import annotations
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Satu requests.Session (dengan pool keep-alive sendiri) bagi setiap host provider.
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "1"))
+HTTP_BACKOFF = float(os.environ.get("HTTP_BACKOFF", "0.2"))
+USER_AGENT = "ADC-Cryptoguard/1.0"
+# Untuk benchmark/ujian: hantar semua request ke satu base URL tempatan,
+# cth. https://blockchain.info/rawaddr/x -> http://127.0.0.1:8900/blockchain.info/rawaddr/x
+UPSTREAM_OVERRIDE = os.environ.get("ADC_UPSTREAM_OVERRIDE", "").rstrip("/")
+
+_sessions: Dict[str, requests.Session] = {}
+_lock = threading.Lock()
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+def set_upstream_override(base_url: str | None) -> None:
+    global UPSTREAM_OVERRIDE
+    UPSTREAM_OVERRIDE = (base_url or "").rstrip("/")
+
+def resolve_url(url: str) -> str:
+    if not UPSTREAM_OVERRIDE:
+        return url
+    parts = urlsplit(url)
+    rest = url[len(f"{parts.scheme}://{parts.netloc}"):]
+    return f"{UPSTREAM_OVERRIDE}/{parts.netloc}{rest or '/'}"
+
+def _build_session() -> requests.Session:
+    # Retry hanya untuk connect error & 502/503/504; read timeout tidak
+    # diulang supaya bajet deadline tidak habis pada satu provider.
+    # Retry-After tidak diikut: urllib3 tidur di luar timeout request
+    # (Retry-After: 8 pada 503 = 8 s walaupun timeout 1 s), melepasi deadline.
+    retry = Retry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=0,
+        status=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT, "Connection": "keep-alive"})
+    # Tiada cookie disimpan: session dikongsi antara thread & request
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+def get_session(url: str) -> requests.Session:
+    key = _host_key(url)
+    session = _sessions.get(key)
+    if session is None:
+        with _lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _sessions[key] = _build_session()
+    return session
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    # opened = sambungan TCP/TLS baru, reused = request yang guna sambungan sedia ada
+    stats: Dict[str, Dict[str, int]] = {}
+    with _lock:
+        items = list(_sessions.items())
+    for host, session in items:
+        opened = requests_sent = 0
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                opened += pool.num_connections
+                requests_sent += pool.num_requests
+        stats[host] = {
+            "opened": opened,
+            "requests": requests_sent,
+            "reused": max(0, requests_sent - opened),
+        }
+    return stats
+
+def close_all() -> None:
+    with _lock:
+        items = list(_sessions.values())
+        _sessions.clear()
+    for session in items:
+        session.close()
@@ -0,0 +1,166 @@
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: tiada flock, rakam dari satu proses sahaja
+    fcntl = None
+
+# Rakam / main semula jawapan provider di bawah _http_request_json.
+# Arkib = dua fail: <path>.dat (jawapan mentah dimampat zlib, satu rekod
+# selepas satu) dan <path>.idx (satu baris JSON per rekod: kunci, offset,
+# saiz, latensi). Semasa replay, .dat dibaca melalui mmap; hanya indeks
+# dimuat ke memori.
+# HTTP_REPLAY_MODE: "" (default, rangkaian sebenar), "record" atau "replay".
+# HTTP_REPLAY_SPEED: "recorded" (tidur ikut latensi asal) atau "max".
+# Untuk replay yang deterministik gunakan HISTORY_STORE=off: URL delta
+# (min_timestamp / until) bergantung pada cursor dalam stor sejarah.
+HTTP_REPLAY_MODE = os.environ.get("HTTP_REPLAY_MODE", "").strip().lower()
+HTTP_REPLAY_ARCHIVE = os.environ.get("HTTP_REPLAY_ARCHIVE", os.path.join("instance", "http_archive"))
+HTTP_REPLAY_SPEED = os.environ.get("HTTP_REPLAY_SPEED", "recorded").strip().lower()
+COMPRESS_LEVEL = 6
+
+# Jenis rekod: jawapan JSON mentah, atau ralat (mesej "timeout: ..." dsb.)
+KIND_BODY = "b"
+KIND_ERROR = "e"
+
+def request_key(method: str, url: str, params: Optional[dict] = None, payload: Any = None) -> str:
+    # URL asal (sebelum resolve_url) supaya rakaman melalui mock/override kekal sah
+    canonical = json.dumps([method.upper(), url, sorted((params or {}).items()), payload],
+                           sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+class Recorder:
+    # Arkib boleh dikongsi beberapa proses (worker gunicorn selepas fork):
+    # fail dibuka semula per pid, dan setiap rekod ditulis di bawah flock
+    # selepas seek ke hujung .dat supaya offset dalam indeks sentiasa betul.
+    def __init__(self, path: str = HTTP_REPLAY_ARCHIVE):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._dat: Any = None
+        self._idx: Any = None
+        self._open()
+
+    def _open(self) -> None:
+        # Deskriptor yang diwarisi dari fork berkongsi flock dengan proses induk
+        self._dat = open(self.path + ".dat", "ab")
+        self._idx = open(self.path + ".idx", "a", encoding="utf-8")
+        self._pid = os.getpid()
+
+    def record(self, key: str, elapsed: float, body: Optional[bytes] = None, error: Optional[str] = None) -> None:
+        kind, raw = (KIND_ERROR, error.encode("utf-8")) if error is not None else (KIND_BODY, body or b"")
+        blob = zlib.compress(raw, COMPRESS_LEVEL)
+        with self._lock:
+            if self._pid != os.getpid():
+                self._open()
+            if fcntl is not None:
+                fcntl.flock(self._dat.fileno(), fcntl.LOCK_EX)
+            try:
+                self._dat.seek(0, os.SEEK_END)
+                offset = self._dat.tell()
+                self._dat.write(blob)
+                self._dat.flush()
+                self._idx.write(json.dumps({"k": key, "o": offset, "n": len(blob), "raw": len(raw),
+                                            "ms": round(elapsed * 1000, 3), "t": kind}, separators=(",", ":")) + "\n")
+                self._idx.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._dat.fileno(), fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        with self._lock:
+            self._dat.close()
+            self._idx.close()
+
+class Replayer:
+    def __init__(self, path: str = HTTP_REPLAY_ARCHIVE, speed: str = HTTP_REPLAY_SPEED):
+        self.path = path
+        self.speed = speed
+        self._entries: Dict[str, List[Tuple[int, int, float, str]]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        with open(path + ".idx", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    e = json.loads(line)
+                    self._entries.setdefault(e["k"], []).append((e["o"], e["n"], e["ms"] / 1000.0, e["t"]))
+        self._file = open(path + ".dat", "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def lookup(self, key: str) -> Optional[Tuple[str, bytes, float]]:
+        """(jenis, kandungan, latensi asal) atau None jika tiada rakaman.
+
+        Kunci yang dirakam lebih dari sekali dimain ikut giliran, supaya
+        urutan jawapan sama seperti semasa rakaman.
+        """
+        entries = self._entries.get(key)
+        if not entries or self._mm is None:
+            return None
+        with self._lock:
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+        offset, length, latency, kind = entries[i % len(entries)]
+        return kind, zlib.decompress(self._mm[offset:offset + length]), latency
+
+    def delay(self, latency: float) -> float:
+        return latency if self.speed == "recorded" else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        records = [e for entries in self._entries.values() for e in entries]
+        return {
+            "keys": len(self._entries),
+            "records": len(records),
+            "errors": sum(1 for e in records if e[3] == KIND_ERROR),
+            "compressed_bytes": sum(e[1] for e in records),
+            "mean_latency_ms": round(sum(e[2] for e in records) / len(records) * 1000, 3) if records else 0.0,
+        }
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+def build_recorder() -> Optional[Recorder]:
+    return Recorder(HTTP_REPLAY_ARCHIVE) if HTTP_REPLAY_MODE == "record" else None
+
+def build_replayer() -> Optional[Replayer]:
+    return Replayer(HTTP_REPLAY_ARCHIVE, HTTP_REPLAY_SPEED) if HTTP_REPLAY_MODE == "replay" else None
+
+RECORDER = build_recorder()
+REPLAYER = build_replayer()
+
+def set_mode(mode: str, path: str = HTTP_REPLAY_ARCHIVE, speed: str = HTTP_REPLAY_SPEED) -> None:
+    # Untuk benchmark/ujian: tukar mode selepas import
+    global RECORDER, REPLAYER
+    if RECORDER is not None:
+        RECORDER.close()
+    if REPLAYER is not None:
+        REPLAYER.close()
+    RECORDER = Recorder(path) if mode == "record" else None
+    REPLAYER = Replayer(path, speed) if mode == "replay" else None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect a recorded provider response archive")
+    parser.add_argument("archive", nargs="?", default=HTTP_REPLAY_ARCHIVE, help="archive path without .dat/.idx")
+    args = parser.parse_args()
+    replayer = Replayer(args.archive, "max")
+    stats = replayer.stats()
+    stats["raw_bytes"] = 0
+    with open(args.archive + ".idx", "r", encoding="utf-8") as f:
+        stats["raw_bytes"] = sum(json.loads(line).get("raw", 0) for line in f if line.strip())
+    replayer.close()
+    print(json.dumps(stats, indent=2))
+
+if __name__ == "__main__":
+    main()
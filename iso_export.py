@@ -1,26 +1,62 @@
+import codecs
+import contextvars
+import queue
+import threading
+import time
 from datetime import datetime
+from decimal import Decimal
+from tempfile import SpooledTemporaryFile
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+from xml.sax.saxutils import escape
 
-def generate_iso_xml(wallet_address):
-    now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
+NAMESPACE = "urn:iso:std:iso:20022:tech:xsd:pain.001.001.03"
+INITIATING_PARTY = "ADC CryptoGuard"
+AGENT_BIC = "ADCOINMYKL"
+CURRENCY = "USD"
+MAX_ID_LEN = 35      # had Max35Text (MsgId, PmtInfId, EndToEndId)
+MAX_USTRD_LEN = 140  # had Max140Text (RmtInf/Ustrd)
+SPOOL_MAX_BYTES = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+# Semasa menunggu lookup batch: whitespace dihantar sekurang-kurangnya setiap
+# KEEPALIVE_INTERVAL saat supaya proxy / klien tidak memutus sambungan senyap
+KEEPALIVE_INTERVAL = 10.0
+KEEPALIVE = "\n"
+PULL_BUFFER = 256  # entri yang dibaca lebih awal oleh thread pengeluar
 
-    xml_template = f"""<?xml version="1.0" encoding="UTF-8"?>
-<Document xmlns="urn:iso:std:iso:20022:tech:xsd:pain.001.001.03">
-  <CstmrCdtTrfInitn>
-    <GrpHdr>
-      <MsgId>ADC-{wallet_address[:6]}</MsgId>
-      <CreDtTm>{now}</CreDtTm>
-      <NbOfTxs>1</NbOfTxs>
-      <CtrlSum>0</CtrlSum>
-      <InitgPty>
-        <Nm>ADC CryptoGuard</Nm>
-      </InitgPty>
-    </GrpHdr>
+Entry = Optional[Union[str, Dict[str, Any]]]
+
+def _text(value: Any, limit: Optional[int] = None) -> str:
+    value = "" if value is None else str(value)
+    return escape(value[:limit] if limit else value)
+
+def _amount(entry: Dict[str, Any]) -> Decimal:
+    # Rekod saringan: amaun 0.00 melainkan entry membawa "amount"
+    try:
+        return Decimal(str(entry.get("amount") or "0")).quantize(Decimal("0.01"))
+    except ArithmeticError:
+        return Decimal("0.00")
+
+def _remittance(entry: Dict[str, Any]) -> str:
+    # Ringkasan hasil validate dalam RmtInf/Ustrd
+    if "network" not in entry:
+        return ""
+    return (f"{entry.get('network')} score={entry.get('ai_score', '')} tx={entry.get('tx_count', 0)} "
+            f"age={entry.get('wallet_age', 0)}d bal={entry.get('balance', 0)} {entry.get('reason') or ''}").strip()
+
+def _pmt_inf(index: int, entry: Dict[str, Any], amount: Decimal, now: str) -> str:
+    address = str(entry.get("address") or "")
+    ustrd = _remittance(entry)
+    rmt_inf = f"""
+        <RmtInf>
+          <Ustrd>{_text(ustrd, MAX_USTRD_LEN)}</Ustrd>
+        </RmtInf>""" if ustrd else ""
+    return f"""
     <PmtInf>
-      <PmtInfId>Payment-{wallet_address[:6]}</PmtInfId>
+      <PmtInfId>{_text(f"Payment-{index}-{address[:6]}", MAX_ID_LEN)}</PmtInfId>
       <PmtMtd>TRF</PmtMtd>
       <BtchBookg>false</BtchBookg>
       <NbOfTxs>1</NbOfTxs>
-      <CtrlSum>0</CtrlSum>
+      <CtrlSum>{amount}</CtrlSum>
       <PmtTpInf>
         <InstrPrty>NORM</InstrPrty>
         <SvcLvl>
@@ -29,30 +65,30 @@ def generate_iso_xml(wallet_address):
       </PmtTpInf>
       <ReqdExctnDt>{now[:10]}</ReqdExctnDt>
       <Dbtr>
-        <Nm>{wallet_address}</Nm>
+        <Nm>{_text(address)}</Nm>
       </Dbtr>
       <DbtrAcct>
         <Id>
           <Othr>
-            <Id>{wallet_address}</Id>
+            <Id>{_text(address)}</Id>
           </Othr>
         </Id>
       </DbtrAcct>
       <DbtrAgt>
         <FinInstnId>
-          <BIC>ADCOINMYKL</BIC>
+          <BIC>{AGENT_BIC}</BIC>
         </FinInstnId>
       </DbtrAgt>
       <CdtTrfTxInf>
         <PmtId>
-          <EndToEndId>TX-{wallet_address[:8]}</EndToEndId>
+          <EndToEndId>{_text(f"TX-{index}-{address[:8]}", MAX_ID_LEN)}</EndToEndId>
         </PmtId>
         <Amt>
-          <InstdAmt Ccy="USD">0.00</InstdAmt>
+          <InstdAmt Ccy="{CURRENCY}">{amount}</InstdAmt>
         </Amt>
         <CdtrAgt>
           <FinInstnId>
-            <BIC>ADCOINMYKL</BIC>
+            <BIC>{AGENT_BIC}</BIC>
           </FinInstnId>
         </CdtrAgt>
         <Cdtr>
@@ -61,13 +97,116 @@ def generate_iso_xml(wallet_address):
         <CdtrAcct>
           <Id>
             <Othr>
-              <Id>{wallet_address}</Id>
+              <Id>{_text(address)}</Id>
             </Othr>
           </Id>
-        </CdtrAcct>
+        </CdtrAcct>{rmt_inf}
       </CdtTrfTxInf>
-    </PmtInf>
+    </PmtInf>"""
+
+PROLOG = f"""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="{NAMESPACE}">
+  <CstmrCdtTrfInitn>"""
+
+def _group_header(msg_id: str, now: str, count: int, total: Decimal) -> str:
+    return f"""
+    <GrpHdr>
+      <MsgId>{_text(msg_id, MAX_ID_LEN)}</MsgId>
+      <CreDtTm>{now}</CreDtTm>
+      <NbOfTxs>{count}</NbOfTxs>
+      <CtrlSum>{total}</CtrlSum>
+      <InitgPty>
+        <Nm>{INITIATING_PARTY}</Nm>
+      </InitgPty>
+    </GrpHdr>"""
+
+FOOTER = """
   </CstmrCdtTrfInitn>
 </Document>"""
 
-    return xml_template
+_DONE = object()
+
+def _pull(entries: Iterable[Entry], out: "queue.Queue", stop: threading.Event) -> None:
+    # Thread pengeluar: entri (lookup yang mungkin lambat) dibaca di sini supaya
+    # penjana di bawah boleh menghantar keep-alive semasa menunggu
+    def offer(item) -> bool:
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for entry in entries:
+            if not offer((entry, None)):
+                return
+        offer((_DONE, None))
+    except BaseException as e:
+        offer((_DONE, e))
+
+def iter_iso_batch(entries: Iterable[Entry], msg_id: Optional[str] = None) -> Iterator[str]:
+    """Strim satu dokumen pain.001 dengan satu PmtInf bagi setiap wallet.
+
+    GrpHdr perlukan NbOfTxs/CtrlSum sebelum entri pertama, jadi blok PmtInf
+    ditulis dahulu ke SpooledTemporaryFile (RAM hingga 1MB, kemudian disk)
+    dan distrim semula selepas header. Penggunaan memori kekal malar.
+    Prolog XML dihantar serta-merta. Entri dibaca dalam thread berasingan;
+    bila tiada output selama KEEPALIVE_INTERVAL (walaupun satu lookup masih
+    berjalan), whitespace (sah antara elemen) dihantar.
+    """
+    now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
+    count = 0
+    total = Decimal("0.00")
+    yield PROLOG
+    last_sent = time.monotonic()
+    pending: "queue.Queue" = queue.Queue(maxsize=PULL_BUFFER)
+    stop = threading.Event()
+    threading.Thread(target=contextvars.copy_context().run, args=(_pull, entries, pending, stop),
+                     name="iso-batch", daemon=True).start()
+    try:
+        with SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, mode="w+b") as spool:
+            while True:
+                try:
+                    entry, error = pending.get(timeout=max(0.0, KEEPALIVE_INTERVAL - (time.monotonic() - last_sent)))
+                except queue.Empty:
+                    last_sent = time.monotonic()
+                    yield KEEPALIVE
+                    continue
+                if entry is _DONE:
+                    if error is not None:
+                        raise error
+                    break
+                # None: item yang tidak dieksport (cth. lookup gagal)
+                if entry is not None:
+                    if isinstance(entry, str):
+                        entry = {"address": entry}
+                    count += 1
+                    amount = _amount(entry)
+                    total += amount
+                    spool.write(_pmt_inf(count, entry, amount, now).encode("utf-8"))
+
+            yield _group_header(msg_id or f"ADC-{now.replace('-', '').replace(':', '')}-{count}", now, count, total)
+            spool.seek(0)
+            # Decoder berperingkat: aksara UTF-8 mungkin terbelah antara chunk
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            while True:
+                chunk = spool.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+    finally:
+        # Klien putus (GeneratorExit) atau ralat: hentikan thread pengeluar
+        stop.set()
+    yield FOOTER
+
+def generate_iso_xml(wallet_address, result=None):
+    entry = dict(result) if isinstance(result, dict) else {}
+    entry["address"] = wallet_address
+    return "".join(iter_iso_batch([entry], msg_id=f"ADC-{wallet_address[:6]}"))
@@ -0,0 +1,491 @@
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from api_handler import detect_chain, get_wallet_result
+from wallet_result import Result, WalletResult, as_dict
+
+# Job latar untuk saringan panjang: request hanya hantar address dan dapat
+# job id; worker pool jalankan get_wallet_data (termasuk skor AI) di luar
+# kitaran request. Progress dan hasil dibaca melalui polling.
+# JOB_BACKEND: "memory" (satu proses sahaja), "sqlite" (broker tempatan
+# dikongsi antara worker gunicorn / `python jobs.py`), "off", atau "auto"
+# (default: "sqlite" bila lebih dari satu worker web, jika tidak "memory").
+JOB_BACKEND = os.environ.get("JOB_BACKEND", "auto").strip().lower()
+JOB_BROKER_PATH = os.environ.get("JOB_BROKER_PATH", os.path.join("instance", "jobs.sqlite3"))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "8"))
+# "thread" (default: lookup kebanyakannya menunggu I/O) atau "process"
+JOB_WORKER_MODE = os.environ.get("JOB_WORKER_MODE", "thread").strip().lower()
+# Address belum siap (semua job) sebelum submit baru ditolak dengan 503
+JOB_QUEUE_MAX = int(os.environ.get("JOB_QUEUE_MAX", "20000"))
+JOB_MAX_ADDRESSES = int(os.environ.get("JOB_MAX_ADDRESSES", "5000"))
+# Job yang siap dibuang JOB_TTL saat selepas selesai
+JOB_TTL = int(os.environ.get("JOB_TTL", "3600"))
+# Task yang diambil worker tetapi tidak siap dalam tempoh ini dibaris semula
+# (worker mati / proses di-restart)
+JOB_CLAIM_TIMEOUT = int(os.environ.get("JOB_CLAIM_TIMEOUT", "300"))
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "0.5"))
+JOB_CLEANUP_INTERVAL = float(os.environ.get("JOB_CLEANUP_INTERVAL", "60"))
+JOB_RETRY_AFTER = int(os.environ.get("JOB_RETRY_AFTER", "10"))
+RESULTS_PAGE_MAX = 1000
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+
+Task = Tuple[str, int, str, str]  # (job_id, index, address, chain)
+
+class QueueFull(Exception):
+    def __init__(self, pending: int, retry_after: int = JOB_RETRY_AFTER):
+        super().__init__(f"job queue full ({pending} pending)")
+        self.pending = pending
+        self.retry_after = retry_after
+
+class JobTooLarge(ValueError):
+    pass
+
+def _is_failed(result: Any) -> bool:
+    if isinstance(result, WalletResult):
+        return False
+    return not isinstance(result, dict) or result.get("status") == "0" or bool(result.get("error"))
+
+def _invalid_item(index: int, address: str) -> Dict[str, Any]:
+    return {"index": index, "address": address, "chain": None,
+            "result": {"status": "0", "message": "❌ Invalid wallet format"}}
+
+def _status(job_id: str, created: float, started: Optional[float], finished: Optional[float],
+            total: int, completed: int, failed: int, ttl: int = JOB_TTL) -> Dict[str, Any]:
+    # Item yang siap semasa submit (address tidak sah) juga dikira sebagai kemajuan
+    state = DONE if completed >= total else RUNNING if started or completed else QUEUED
+    return {
+        "job_id": job_id,
+        "status": state,
+        "total": total,
+        "completed": completed,
+        "failed": failed,
+        "progress": round(completed / total, 4) if total else 1.0,
+        "created_at": int(created),
+        "finished_at": int(finished) if finished else None,
+        "expires_at": int(finished + ttl) if finished else None,
+    }
+
+def screen(address: str) -> Result:
+    # Fungsi peringkat modul supaya boleh di-pickle untuk ProcessPoolExecutor;
+    # WalletResult (padat) dipulangkan, dict hanya dibina semasa hasil dibaca
+    try:
+        return get_wallet_result(address)
+    except Exception:
+        return {"status": "0", "message": "❌ Lookup failed"}
+
+# Item siap dalam MemoryBackend: (address, chain, hasil) - tuple, bukan dict
+_Item = Tuple[str, Optional[str], Result]
+
+class _Job:
+    __slots__ = ("created", "started", "finished", "total", "completed", "failed", "items")
+
+    def __init__(self, created: float, total: int):
+        self.created = created
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self.items: List[Optional[_Item]] = [None] * total
+
+class MemoryBackend:
+    # Satu proses sahaja: job tidak kelihatan oleh worker gunicorn lain
+    def __init__(self, ttl: int = JOB_TTL):
+        self.ttl = ttl
+        self._cond = threading.Condition()
+        self._jobs: Dict[str, _Job] = {}
+        self._tasks: Deque[Task] = deque()
+        self._claimed = 0
+
+    def submit(self, job_id: str, addresses: List[str], max_pending: int) -> Dict[str, Any]:
+        now = time.time()
+        with self._cond:
+            pending = len(self._tasks) + self._claimed
+            if pending + len(addresses) > max_pending:
+                raise QueueFull(pending)
+            job = self._jobs[job_id] = _Job(now, len(addresses))
+            for index, address in enumerate(addresses):
+                chain = detect_chain(address)
+                if chain is None:
+                    self._complete(job, index, (address, None, _invalid_item(index, address)["result"]), now)
+                else:
+                    self._tasks.append((job_id, index, address, chain))
+            self._cond.notify_all()
+            return self._snapshot(job_id, job)
+
+    def claim(self, limit: int, timeout: float) -> List[Task]:
+        with self._cond:
+            if not self._tasks:
+                self._cond.wait(timeout)
+            out: List[Task] = []
+            now = time.time()
+            while self._tasks and len(out) < limit:
+                task = self._tasks.popleft()
+                job = self._jobs.get(task[0])
+                if job is None:
+                    continue
+                job.started = job.started or now
+                out.append(task)
+            self._claimed += len(out)
+            return out
+
+    def finish(self, job_id: str, index: int, address: str, chain: str, result: Result) -> None:
+        with self._cond:
+            self._claimed -= 1
+            job = self._jobs.get(job_id)
+            if job is not None and job.items[index] is None:
+                self._complete(job, index, (address, chain, result), time.time())
+
+    @staticmethod
+    def _complete(job: _Job, index: int, item: _Item, now: float) -> None:
+        job.items[index] = item
+        job.completed += 1
+        job.failed += _is_failed(item[2])
+        if job.completed >= job.total:
+            job.finished = now
+
+    def _snapshot(self, job_id: str, job: _Job) -> Dict[str, Any]:
+        return _status(job_id, job.created, job.started, job.finished, job.total, job.completed, job.failed, self.ttl)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return None if job is None else self._snapshot(job_id, job)
+
+    def results(self, job_id: str, offset: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            page = job.items[offset:offset + limit]
+        return [{"index": offset + i, "address": item[0], "chain": item[1], "result": as_dict(item[2])}
+                for i, item in enumerate(page) if item is not None]
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._tasks) + self._claimed
+
+    def cleanup(self, now: Optional[float] = None) -> int:
+        cutoff = (time.time() if now is None else now) - self.ttl
+        with self._cond:
+            expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+            return len(expired)
+
+class SQLiteBroker:
+    # Broker tempatan (pengganti Redis/RabbitMQ): baris gilir dan hasil dalam
+    # satu fail SQLite WAL, dikongsi semua proses pada mesin yang sama.
+    def __init__(self, path: str = JOB_BROKER_PATH, ttl: int = JOB_TTL, claim_timeout: int = JOB_CLAIM_TIMEOUT):
+        self.path = path
+        self.ttl = ttl
+        self.claim_timeout = claim_timeout
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, created REAL NOT NULL, started REAL, finished REAL, "
+            "total INTEGER NOT NULL, completed INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0)"
+        )
+        # state: 0 = dalam baris gilir, 1 = diambil worker, 2 = siap
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "job_id TEXT NOT NULL, idx INTEGER NOT NULL, address TEXT NOT NULL, chain TEXT, "
+            "state INTEGER NOT NULL DEFAULT 0, claimed_at REAL, result TEXT, PRIMARY KEY (job_id, idx))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # Satu sambungan per thread (dan per proses selepas fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            out = fn(conn)
+            conn.execute("COMMIT")
+            return out
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def submit(self, job_id: str, addresses: List[str], max_pending: int) -> Dict[str, Any]:
+        now = time.time()
+        rows = []
+        completed = failed = 0
+        for index, address in enumerate(addresses):
+            chain = detect_chain(address)
+            if chain is None:
+                rows.append((job_id, index, address, None, 2, json.dumps(_invalid_item(index, address))))
+                completed += 1
+                failed += 1
+            else:
+                rows.append((job_id, index, address, chain, 0, None))
+
+        def run(conn: sqlite3.Connection) -> None:
+            # Semakan kapasiti dan insert dalam transaksi yang sama (atomik merentas proses)
+            pending = conn.execute("SELECT COUNT(*) FROM tasks WHERE state < 2").fetchone()[0]
+            if pending + len(addresses) - completed > max_pending:
+                raise QueueFull(pending)
+            conn.execute("INSERT INTO jobs (id, created, finished, total, completed, failed) VALUES (?, ?, ?, ?, ?, ?)",
+                         (job_id, now, now if completed >= len(addresses) else None, len(addresses), completed, failed))
+            conn.executemany("INSERT INTO tasks (job_id, idx, address, chain, state, result) VALUES (?, ?, ?, ?, ?, ?)",
+                             rows)
+
+        self._transaction(run)
+        return self.status(job_id)
+
+    def claim(self, limit: int, timeout: float) -> List[Task]:
+        now = time.time()
+
+        def run(conn: sqlite3.Connection) -> List[Task]:
+            tasks = conn.execute(
+                "SELECT job_id, idx, address, chain FROM tasks WHERE state = 0 ORDER BY rowid LIMIT ?", (limit,)
+            ).fetchall()
+            conn.executemany("UPDATE tasks SET state = 1, claimed_at = ? WHERE job_id = ? AND idx = ?",
+                             [(now, job_id, index) for job_id, index, _, _ in tasks])
+            conn.executemany("UPDATE jobs SET started = COALESCE(started, ?) WHERE id = ?",
+                             [(now, job_id) for job_id in {t[0] for t in tasks}])
+            return tasks
+
+        tasks = self._transaction(run) if limit > 0 else []
+        if not tasks:
+            time.sleep(timeout)
+        return tasks
+
+    def finish(self, job_id: str, index: int, address: str, chain: str, result: Result) -> None:
+        now = time.time()
+        failed = int(_is_failed(result))
+        item = {"index": index, "address": address, "chain": chain, "result": as_dict(result)}
+
+        def run(conn: sqlite3.Connection) -> None:
+            cur = conn.execute("UPDATE tasks SET state = 2, result = ? WHERE job_id = ? AND idx = ? AND state < 2",
+                               (json.dumps(item, ensure_ascii=False), job_id, index))
+            if cur.rowcount:
+                conn.execute(
+                    "UPDATE jobs SET completed = completed + 1, failed = failed + ?, "
+                    "finished = CASE WHEN completed + 1 >= total THEN ? ELSE finished END WHERE id = ?",
+                    (failed, now, job_id))
+
+        self._transaction(run)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT created, started, finished, total, completed, failed FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return None if row is None else _status(job_id, *row, ttl=self.ttl)
+
+    def results(self, job_id: str, offset: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone() is None:
+            return None
+        rows = conn.execute(
+            "SELECT result FROM tasks WHERE job_id = ? AND state = 2 AND idx >= ? AND idx < ? ORDER BY idx",
+            (job_id, offset, offset + limit),
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def pending(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM tasks WHERE state < 2").fetchone()[0]
+
+    def cleanup(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+
+        def run(conn: sqlite3.Connection) -> int:
+            conn.execute("UPDATE tasks SET state = 0, claimed_at = NULL WHERE state = 1 AND claimed_at < ?",
+                         (now - self.claim_timeout,))
+            expired = [r[0] for r in conn.execute(
+                "SELECT id FROM jobs WHERE finished IS NOT NULL AND finished < ?", (now - self.ttl,))]
+            conn.executemany("DELETE FROM tasks WHERE job_id = ?", [(j,) for j in expired])
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(j,) for j in expired])
+            return len(expired)
+
+        return self._transaction(run)
+
+class JobQueue:
+    def __init__(self, backend, workers: int = JOB_WORKERS, mode: str = JOB_WORKER_MODE,
+                 on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 max_pending: int = JOB_QUEUE_MAX, max_addresses: int = JOB_MAX_ADDRESSES):
+        self.backend = backend
+        self.workers = max(1, workers)
+        self.mode = mode
+        self.on_result = on_result
+        self.max_pending = max_pending
+        self.max_addresses = max_addresses
+        self._lock = threading.Condition()
+        self._running = 0
+        self._pid: Optional[int] = None
+        self._stopped = threading.Event()
+        self._executor: Optional[Executor] = None
+
+    def submit(self, addresses: Iterable[str]) -> Dict[str, Any]:
+        """Baris gilir satu job; pulangkan status awal.
+
+        JobTooLarge jika lebih dari max_addresses, QueueFull jika baris
+        gilir penuh (pemanggil patut cuba semula selepas retry_after).
+        """
+        batch: List[str] = []
+        for address in addresses:
+            if len(batch) >= self.max_addresses:
+                raise JobTooLarge(f"limit {self.max_addresses} addresses per job")
+            batch.append((address or "").strip())
+        self.start()
+        return self.backend.submit(uuid.uuid4().hex, batch, self.max_pending)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        # Dispatcher juga dimula di sini: worker yang hanya melayan poll tetap
+        # mengambil task yang ditinggalkan worker lain (broker dikongsi)
+        self.start()
+        return self.backend.status(job_id)
+
+    def results(self, job_id: str, offset: int = 0, limit: int = RESULTS_PAGE_MAX) -> Optional[Dict[str, Any]]:
+        # Halaman ikut index input [offset, offset + limit); item yang belum
+        # siap tiada dalam senarai sehingga status "done"
+        self.start()
+        status = self.backend.status(job_id)
+        if status is None:
+            return None
+        offset = max(0, offset)
+        limit = max(1, min(limit, RESULTS_PAGE_MAX))
+        items = self.backend.results(job_id, offset, limit)
+        if items is None:
+            return None
+        end = offset + limit
+        return dict(status, offset=offset, items=items, next_offset=end if end < status["total"] else None)
+
+    def start(self) -> None:
+        # Dispatcher dimula secara lazy dan semula selepas fork (thread tidak ikut fork)
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._running = 0
+            self._stopped.clear()
+            if self.mode == "process":
+                # spawn: fork daripada proses berbilang thread tidak selamat
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        threading.Thread(target=self._dispatch, name="job-dispatch", daemon=True).start()
+
+    def stop(self, wait: bool = True) -> None:
+        self._stopped.set()
+        with self._lock:
+            self._lock.notify_all()
+            executor, self._executor, self._pid = self._executor, None, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _dispatch(self) -> None:
+        last_cleanup = float("-inf")
+        while not self._stopped.is_set():
+            with self._lock:
+                while self._running >= self.workers and not self._stopped.is_set():
+                    self._lock.wait(JOB_POLL_INTERVAL)
+                free = self.workers - self._running
+                executor = self._executor
+            if self._stopped.is_set() or executor is None:
+                return
+            if time.monotonic() - last_cleanup >= JOB_CLEANUP_INTERVAL:
+                # Sebelum claim (termasuk sebaik dispatcher mula): task "running" milik
+                # worker yang mati dibaris semula selepas claim timeout
+                last_cleanup = time.monotonic()
+                try:
+                    self.backend.cleanup()
+                except sqlite3.Error:
+                    pass
+            try:
+                tasks = self.backend.claim(free, JOB_POLL_INTERVAL)
+            except sqlite3.Error:
+                time.sleep(JOB_POLL_INTERVAL)
+                continue
+            for task in tasks:
+                with self._lock:
+                    self._running += 1
+                try:
+                    fut = executor.submit(screen, task[2])
+                except RuntimeError:
+                    # Executor sudah ditutup; task dibaris semula oleh cleanup (claim timeout)
+                    return
+                fut.add_done_callback(lambda f, task=task: self._done(task, f))
+
+    def _done(self, task: Task, fut: Future) -> None:
+        job_id, index, address, chain = task
+        try:
+            result = fut.result()
+        except Exception:
+            result = {"status": "0", "message": "❌ Lookup failed"}
+        try:
+            self.backend.finish(job_id, index, address, chain, result)
+            if self.on_result is not None:
+                self.on_result({"index": index, "address": address, "chain": chain, "result": as_dict(result)})
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._lock.notify_all()
+
+def _multi_worker() -> bool:
+    # WEB_CONCURRENCY: bilangan worker gunicorn; tanpanya, gunicorn (mungkin -w N)
+    # dianggap berbilang worker supaya poll ke worker lain tidak dapat 404
+    spec = os.environ.get("WEB_CONCURRENCY", "").strip()
+    if spec.isdigit():
+        return int(spec) > 1
+    return os.environ.get("SERVER_SOFTWARE", "").startswith("gunicorn")
+
+def resolve_backend(backend: str = JOB_BACKEND) -> str:
+    if backend == "auto":
+        return "sqlite" if _multi_worker() else "memory"
+    return backend
+
+def build_job_queue(on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[JobQueue]:
+    backend = resolve_backend()
+    if backend in ("off", "none", "0", "false"):
+        return None
+    if backend == "sqlite":
+        try:
+            return JobQueue(SQLiteBroker(JOB_BROKER_PATH), on_result=on_result)
+        except (OSError, sqlite3.Error):
+            return None
+    return JobQueue(MemoryBackend(), on_result=on_result)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    # Worker berasingan untuk broker SQLite: ambil task dari fail broker yang sama dengan web tier
+    parser = argparse.ArgumentParser(description="Run a standalone screening job worker")
+    parser.add_argument("--broker", default=JOB_BROKER_PATH)
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS)
+    parser.add_argument("--mode", default=JOB_WORKER_MODE, choices=("thread", "process"))
+    args = parser.parse_args(argv)
+    queue = JobQueue(SQLiteBroker(args.broker), workers=args.workers, mode=args.mode)
+    queue.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        queue.stop()
+
+if __name__ == "__main__":
+    main()
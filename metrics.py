@@ -0,0 +1,199 @@
+from __future__ import annotations
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from provider_health import provider_key
+
+# Metrik dalam proses (format teks Prometheus) tanpa dependency tambahan.
+# Nilai adalah per worker; scrape setiap worker atau agregat di Prometheus.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEPTH_BUCKETS = (0, 1, 2, 3, 4)
+
+LabelKey = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _fmt_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+def _fmt_value(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        self.name, self.doc, self.labelnames = name, doc, tuple(labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, dict(zip(self.labelnames, key)), v) for key, v in items]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.doc, self.labelnames = name, doc, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label: [kiraan per bucket..., +Inf], jumlah
+        self._values: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][idx] += 1
+            entry[1][0] += value
+
+    def samples(self) -> List[Sample]:
+        out: List[Sample] = []
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        for key, counts, total in items:
+            labels = dict(zip(self.labelnames, key))
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                running += n
+                le = "+Inf" if bound == float("inf") else _fmt_value(bound)
+                out.append((f"{self.name}_bucket", dict(labels, le=le), running))
+            out.append((f"{self.name}_sum", labels, total))
+            out.append((f"{self.name}_count", labels, running))
+        return out
+
+Collector = Callable[[], List[Tuple[str, str, str, List[Sample]]]]
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Collector] = []
+
+    def counter(self, name: str, doc: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, doc, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, doc: str, labelnames: Sequence[str] = ()) -> Gauge:
+        metric = Gauge(name, doc, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, doc: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, doc, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Collector) -> None:
+        # Metrik yang dibaca semasa scrape, cth. statistik cache
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        families = [(m.name, m.kind, m.doc, m.samples()) for m in self._metrics]
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception:
+                continue
+        lines: List[str] = []
+        for name, kind, doc, samples in families:
+            lines.append(f"# HELP {name} {doc}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{sname}{_fmt_labels(labels)} {_fmt_value(v)}" for sname, labels, v in samples)
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+PROVIDER_LATENCY = REGISTRY.histogram(
+    "adc_provider_request_seconds", "Upstream provider call latency", ("provider", "outcome"))
+PROVIDER_ERRORS = REGISTRY.counter(
+    "adc_provider_errors_total", "Upstream provider errors by class", ("provider", "error"))
+LOOKUP_LATENCY = REGISTRY.histogram(
+    "adc_lookup_seconds", "End-to-end get_wallet_data latency", ("chain",))
+FALLBACK_DEPTH = REGISTRY.histogram(
+    "adc_fallback_depth", "Launch index of the endpoint that answered (0 = first choice)", ("chain",), DEPTH_BUCKETS)
+HTTP_LATENCY = REGISTRY.histogram(
+    "adc_http_request_seconds", "Flask request latency", ("endpoint", "status"))
+HTTP_INFLIGHT = REGISTRY.gauge("adc_http_inflight_requests", "Requests currently being served")
+
+# ---------- konteks per request ----------
+_CHAIN: contextvars.ContextVar[str] = contextvars.ContextVar("adc_chain", default="")
+_TRACE: contextvars.ContextVar[Optional[List[Tuple[str, float, str]]]] = contextvars.ContextVar("adc_trace", default=None)
+
+def error_class(error: str) -> str:
+    # "timeout: ..." -> "timeout"
+    return error.split(":", 1)[0].strip() or "unknown"
+
+def observe_provider(url: str, seconds: float, error: Optional[str] = None) -> None:
+    provider = provider_key(url)
+    outcome = error_class(error) if error else "ok"
+    PROVIDER_LATENCY.observe(seconds, provider=provider, outcome=outcome)
+    if error:
+        PROVIDER_ERRORS.inc(provider=provider, error=outcome)
+    trace = _TRACE.get()
+    if trace is not None:
+        trace.append((provider, seconds, outcome))
+
+def count_error(url: str, error: str) -> None:
+    # Ralat tanpa panggilan upstream (cth. rate limit tempatan)
+    PROVIDER_ERRORS.inc(provider=provider_key(url), error=error_class(error))
+
+def observe_fallback(depth: int) -> None:
+    FALLBACK_DEPTH.observe(depth, chain=_CHAIN.get() or "unknown")
+
+@contextmanager
+def track_lookup(chain: str) -> Iterator[None]:
+    token = _CHAIN.set(chain)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        LOOKUP_LATENCY.observe(elapsed, chain=chain)
+        trace = _TRACE.get()
+        if trace is not None:
+            trace.append((f"lookup:{chain}", elapsed, "ok"))
+        _CHAIN.reset(token)
+
+def start_trace() -> contextvars.Token:
+    return _TRACE.set([])
+
+def end_trace(token: contextvars.Token) -> List[Tuple[str, float, str]]:
+    spans = _TRACE.get() or []
+    _TRACE.reset(token)
+    return spans
+
+def server_timing(spans: Sequence[Tuple[str, float, str]]) -> str:
+    # Header Server-Timing: satu entri per panggilan provider / lookup
+    parts = []
+    for i, (name, seconds, outcome) in enumerate(spans):
+        desc = name if outcome == "ok" else f"{name} {outcome}"
+        parts.append(f'{"lookup" if name.startswith("lookup:") else f"p{i}"};dur={seconds * 1000:.1f};desc="{desc}"')
+    return ", ".join(parts)
+
+def render() -> str:
+    return REGISTRY.render()
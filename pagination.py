@@ -0,0 +1,115 @@
+from __future__ import annotations
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Paginator generik untuk API bercursor (trongrid meta.fingerprint, Hedera
+# links.next). Hanya satu halaman dipegang pada satu masa; berhenti awal
+# bila kiraan capai had skor atau bajet halaman habis.
+PAGE_BUDGET = int(os.environ.get("PAGE_BUDGET", "5"))
+# _score tidak berubah lagi selepas tx_count > 100
+TX_SCORE_THRESHOLD = 101
+
+Page = Dict[str, Any]
+NextUrl = Callable[[Page, str], Optional[str]]
+
+class PageCount(NamedTuple):
+    count: int
+    newest: Optional[int]        # timestamp item pertama (halaman pertama)
+    oldest: Optional[int]        # timestamp item terakhir yang dilihat
+    complete: bool               # semua halaman dibaca (kiraan tepat)
+    first_page: List[Any]        # item halaman pertama (untuk last5tx / cursor)
+
+def _usable(page: Any) -> bool:
+    return isinstance(page, dict) and not page.get("error")
+
+def iter_pages(url: str, get_page: Callable[[str], Optional[Page]], next_url: NextUrl,
+               max_pages: int = PAGE_BUDGET, deadline: Optional[float] = None) -> Iterator[Page]:
+    for _ in range(max_pages):
+        if deadline is not None and time.monotonic() >= deadline:
+            return
+        page = get_page(url)
+        if not _usable(page):
+            return
+        yield page
+        url = next_url(page, url)
+        if not url:
+            return
+
+async def aiter_pages(url: str, get_page: Callable[[str], Awaitable[Optional[Page]]], next_url: NextUrl,
+                      max_pages: int = PAGE_BUDGET, deadline: Optional[float] = None) -> AsyncIterator[Page]:
+    for _ in range(max_pages):
+        if deadline is not None and time.monotonic() >= deadline:
+            return
+        page = await get_page(url)
+        if not _usable(page):
+            return
+        yield page
+        url = next_url(page, url)
+        if not url:
+            return
+
+class _Counter:
+    __slots__ = ("items", "timestamp", "stop_at", "count", "newest", "oldest", "first_page", "done")
+
+    def __init__(self, items: Callable[[Page], List[Any]], timestamp: Callable[[Any], Optional[int]],
+                 stop_at: Optional[int]):
+        self.items = items
+        self.timestamp = timestamp
+        self.stop_at = stop_at
+        self.count = 0
+        self.newest: Optional[int] = None
+        self.oldest: Optional[int] = None
+        self.first_page: Optional[List[Any]] = None
+        self.done = False
+
+    def feed(self, page: Page, has_next: bool) -> bool:
+        # Pulangkan True jika perlu berhenti (had skor dicapai)
+        batch = self.items(page)
+        if self.first_page is None:
+            self.first_page = batch
+        for item in batch:
+            ts = self.timestamp(item)
+            if ts is not None:
+                if self.newest is None:
+                    self.newest = ts
+                self.oldest = ts
+        self.count += len(batch)
+        self.done = not has_next
+        return self.stop_at is not None and self.count >= self.stop_at
+
+    def result(self) -> PageCount:
+        return PageCount(self.count, self.newest, self.oldest, self.done, self.first_page or [])
+
+def count_items(url: str, get_page: Callable[[str], Optional[Page]], next_url: NextUrl,
+                items: Callable[[Page], List[Any]], timestamp: Callable[[Any], Optional[int]],
+                stop_at: Optional[int] = TX_SCORE_THRESHOLD, max_pages: int = PAGE_BUDGET,
+                deadline: Optional[float] = None) -> Optional[PageCount]:
+    """Kira item merentasi halaman; None jika halaman pertama pun gagal."""
+    counter = _Counter(items, timestamp, stop_at)
+    seen = False
+    for page in iter_pages(url, get_page, next_url, max_pages, deadline):
+        seen = True
+        if counter.feed(page, bool(next_url(page, url))):
+            break
+    return counter.result() if seen else None
+
+async def acount_items(url: str, get_page: Callable[[str], Awaitable[Optional[Page]]], next_url: NextUrl,
+                       items: Callable[[Page], List[Any]], timestamp: Callable[[Any], Optional[int]],
+                       stop_at: Optional[int] = TX_SCORE_THRESHOLD, max_pages: int = PAGE_BUDGET,
+                       deadline: Optional[float] = None) -> Optional[PageCount]:
+    counter = _Counter(items, timestamp, stop_at)
+    seen = False
+    async for page in aiter_pages(url, get_page, next_url, max_pages, deadline):
+        seen = True
+        if counter.feed(page, bool(next_url(page, url))):
+            break
+    return counter.result() if seen else None
+
+def with_query(url: str, **params: Any) -> str:
+    # Ganti/tambah parameter query tanpa menyusun semula yang lain
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in params]
+    query += [(k, str(v)) for k, v in params.items() if v is not None]
+    return urlunsplit(parts._replace(query=urlencode(query, safe=":,")))
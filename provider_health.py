@@ -0,0 +1,132 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+# Skor kesihatan setiap provider (ikut host): EWMA latency, kadar error
+# dan timeout. Provider yang kerap gagal "dibuka" circuit breaker-nya dan
+# dilangkau sehingga tempoh cooldown tamat (kemudian satu probe half-open).
+EWMA_ALPHA = float(os.environ.get("PROVIDER_EWMA_ALPHA", "0.3"))
+DEFAULT_LATENCY = 1.0        # anggaran (saat) untuk provider yang belum pernah dipanggil
+FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURES", "3"))
+ERROR_RATE_THRESHOLD = float(os.environ.get("BREAKER_ERROR_RATE", "0.5"))
+MIN_CALLS_FOR_RATE = 10
+OPEN_COOLDOWN = float(os.environ.get("BREAKER_COOLDOWN", "30"))
+PROBE_TIMEOUT = 15.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+OK = "ok"
+ERROR = "error"
+TIMEOUT = "timeout"
+
+def provider_key(url: str) -> str:
+    return urlsplit(url).netloc or url
+
+class ProviderHealth:
+    def __init__(self, key: str):
+        self.key = key
+        self.ewma_latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_started: Optional[float] = None
+
+    def score(self) -> float:
+        # Lebih rendah lebih baik: latency dihukum ikut kadar error
+        latency = DEFAULT_LATENCY if self.ewma_latency is None else self.ewma_latency
+        return latency * (1.0 + 4.0 * self.error_rate)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "ewma_latency_ms": None if self.ewma_latency is None else round(self.ewma_latency * 1000, 1),
+            "error_rate": round(self.error_rate, 3),
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "consecutive_failures": self.consecutive_failures,
+            "score": round(self.score(), 4),
+        }
+
+class ProviderRegistry:
+    def __init__(self, cooldown: float = OPEN_COOLDOWN):
+        self.cooldown = cooldown
+        self._providers: Dict[str, ProviderHealth] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> ProviderHealth:
+        health = self._providers.get(key)
+        if health is None:
+            health = self._providers[key] = ProviderHealth(key)
+        return health
+
+    def record(self, url: str, latency: float, outcome: str) -> None:
+        failed = outcome != OK
+        with self._lock:
+            h = self._get(provider_key(url))
+            h.calls += 1
+            h.ewma_latency = latency if h.ewma_latency is None else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * h.ewma_latency
+            h.error_rate = EWMA_ALPHA * (1.0 if failed else 0.0) + (1 - EWMA_ALPHA) * h.error_rate
+            h.probe_started = None
+            if not failed:
+                h.consecutive_failures = 0
+                h.state = CLOSED
+                return
+            h.errors += 1
+            if outcome == TIMEOUT:
+                h.timeouts += 1
+            h.consecutive_failures += 1
+            if (h.state == HALF_OPEN
+                    or h.consecutive_failures >= FAILURE_THRESHOLD
+                    or (h.calls >= MIN_CALLS_FOR_RATE and h.error_rate >= ERROR_RATE_THRESHOLD)):
+                h.state = OPEN
+                h.opened_at = time.monotonic()
+
+    def allow(self, url: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            h = self._get(provider_key(url))
+            if h.state == CLOSED:
+                return True
+            if h.state == OPEN:
+                if now - h.opened_at < self.cooldown:
+                    return False
+                h.state = HALF_OPEN
+            # Half-open: hanya satu probe pada satu masa
+            if h.probe_started is not None and now - h.probe_started < PROBE_TIMEOUT:
+                return False
+            h.probe_started = now
+            return True
+
+    def rank(self, urls: List[str]) -> List[str]:
+        # Susun ikut skor; provider dengan breaker terbuka diletak paling
+        # belakang (tidak dibuang, supaya pemanggil boleh fail-open).
+        now = time.monotonic()
+        with self._lock:
+            def key(item):
+                index, url = item
+                h = self._providers.get(provider_key(url))
+                if h is None:
+                    return (0, DEFAULT_LATENCY, index)
+                blocked = h.state == OPEN and now - h.opened_at < self.cooldown
+                return (1 if blocked else 0, h.score(), index)
+            return [url for _, url in sorted(enumerate(urls), key=key)]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {key: h.snapshot() for key, h in sorted(self._providers.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._providers.clear()
+
+REGISTRY = ProviderRegistry()
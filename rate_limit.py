@@ -0,0 +1,99 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Had kadar sisi-klien per host provider: (token sesaat, burst).
+# Host yang tiada dalam senarai tidak dihadkan kecuali PROVIDER_DEFAULT_RATE diset.
+PROVIDER_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "blockchain.info": (1.0, 5),
+    "blockstream.info": (5.0, 10),
+    "api.blockcypher.com": (3.0, 5),
+    "api.blockchair.com": (0.5, 5),
+    "mempool.space": (5.0, 10),
+    "apilist.tronscanapi.com": (5.0, 10),
+    "apilist.tronscan.org": (5.0, 10),
+    "tronscan.org": (5.0, 10),
+    "apilist.trongrid.io": (10.0, 15),
+    "data.ripple.com": (5.0, 10),
+    "mainnet-public.mirrornode.hedera.com": (20.0, 40),
+}
+DEFAULT_RATE = float(os.environ.get("PROVIDER_DEFAULT_RATE", "0"))
+DEFAULT_BURST = int(os.environ.get("PROVIDER_DEFAULT_BURST", "10"))
+MAX_PENALTY = 60.0
+
+class TokenBucket:
+    # Setiap acquire "menempah" token; jika token belum cukup, pemanggil
+    # beratur (tidur) sehingga gilirannya, ikut susunan tempahan.
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, timeout: float) -> Optional[float]:
+        # Pulangkan tempoh menunggu (saat), atau None jika melebihi timeout
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > timeout:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def acquire(self, timeout: float) -> bool:
+        wait = self.reserve(timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def penalize(self, seconds: float) -> None:
+        # Provider balas 429: kosongkan bucket supaya semua pemanggil menunggu
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, -min(seconds, MAX_PENALTY) * self.rate)
+
+class RateLimiter:
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.limits = dict(PROVIDER_RATE_LIMITS if limits is None else limits)
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> Optional[TokenBucket]:
+        host = urlsplit(url).hostname or ""
+        if host in self._buckets:
+            return self._buckets[host]
+        with self._lock:
+            if host not in self._buckets:
+                rate, burst = self.limits.get(host, (DEFAULT_RATE, DEFAULT_BURST))
+                self._buckets[host] = TokenBucket(rate, burst) if rate > 0 else None
+            return self._buckets[host]
+
+    def reserve(self, url: str, timeout: float) -> Optional[float]:
+        bucket = self.bucket(url)
+        return 0.0 if bucket is None else bucket.reserve(timeout)
+
+    def acquire(self, url: str, timeout: float) -> bool:
+        bucket = self.bucket(url)
+        return True if bucket is None else bucket.acquire(timeout)
+
+    def penalize(self, url: str, retry_after: Optional[str]) -> None:
+        bucket = self.bucket(url)
+        if bucket is None:
+            return
+        try:
+            seconds = float(retry_after) if retry_after else 1.0
+        except ValueError:
+            seconds = 1.0
+        bucket.penalize(seconds)
+
+LIMITER = RateLimiter()
@@ -0,0 +1,290 @@
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from wallet_result import TxSummary, WalletResult
+
+# TTL (saat) ikut chain; selepas TTL, entry masih boleh dihidang sebagai
+# "stale" selama STALE_TTL sambil di-refresh di background.
+CHAIN_TTLS = {
+    "eth": 30,
+    "tron": 30,
+    "btc": 60,
+    "xrp": 60,
+    "sol": 20,
+    "hbar": 60,
+}
+DEFAULT_TTL = int(os.environ.get("RESULT_CACHE_TTL", "30"))
+STALE_TTL = int(os.environ.get("RESULT_CACHE_STALE_TTL", "300"))
+MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "10000"))
+MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+Value = Union[WalletResult, Dict[str, Any]]
+Entry = Tuple[float, Value]  # (stored_at, value)
+
+class SingleFlight:
+    # Panggilan serentak dengan key sama dikongsi: hanya satu fn() berjalan,
+    # yang lain tunggu dan terima hasil (atau exception) yang sama.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, Dict[str, Any]] = {}
+
+    def do(self, key: Any, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        # timeout: had tunggu bagi pemanggil yang menumpang (TimeoutError jika
+        # leader belum siap); leader sendiri tidak terikat
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"event": threading.Event()}
+        if not leader:
+            if not call["event"].wait(timeout):
+                raise TimeoutError("single-flight leader still running")
+            if "exc" in call:
+                raise call["exc"]
+            return call["value"]
+        try:
+            call["value"] = fn()
+            return call["value"]
+        except BaseException as e:
+            call["exc"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call["event"].set()
+
+    def in_flight(self, key: Any) -> bool:
+        with self._lock:
+            return key in self._calls
+
+class LocalBackend:
+    # LRU dalam proses, dihadkan ikut bilangan entry dan saiz. WalletResult
+    # disimpan terus (objek padat, tidak diubah selepas dibina; saiz =
+    # nbytes()); nilai dict lain disimpan sebagai bytes JSON.
+    # Juga digunakan sebagai pengganti shared backend dalam ujian.
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, Tuple[float, float, Union[WalletResult, bytes], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            stored_at, expires_at, payload, _ = item
+            if time.time() >= expires_at:
+                self._drop(key)
+                return None
+            self._data.move_to_end(key)
+        return stored_at, payload if isinstance(payload, WalletResult) else json.loads(payload)
+
+    def set(self, key: str, value: Value, stored_at: float, ttl: float) -> None:
+        if isinstance(value, WalletResult):
+            payload: Union[WalletResult, bytes] = value
+            size = value.nbytes()
+        else:
+            payload = json.dumps(value, separators=(",", ":")).encode("utf-8")
+            size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._data[key] = (stored_at, stored_at + ttl, payload, size)
+            self._bytes += size
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._data)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._data), "bytes": self._bytes}
+
+    def _drop(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._bytes -= item[3]
+
+def _pack(value: Value) -> Dict[str, Any]:
+    # WalletResult disimpan sebagai medan mentah (epoch, bukan masa terformat)
+    # supaya _unpack membina semula objek yang sama seperti LocalBackend
+    if not isinstance(value, WalletResult):
+        return {"v": value}
+    return {"w": [value.address, value.network, value.balance, value.tx_count, value.wallet_age,
+                  [[tx.hash, tx.time, tx.sender, tx.receiver, tx.value] for tx in value.last5tx],
+                  value.reason, value.ai_score,
+                  list(value.evm_networks) if value.evm_networks is not None else None,
+                  value.tx_count_is_lower_bound]}
+
+def _unpack(item: Dict[str, Any]) -> Value:
+    if "w" not in item:
+        return item["v"]
+    (address, network, balance, tx_count, wallet_age, last5tx, reason, ai_score,
+     evm_networks, lower_bound) = item["w"]
+    return WalletResult(address, network, balance=balance, tx_count=tx_count, wallet_age=wallet_age,
+                        last5tx=[TxSummary(*tx) for tx in last5tx], reason=reason, ai_score=ai_score,
+                        evm_networks=evm_networks, tx_count_is_lower_bound=lower_bound)
+
+class RedisBackend:
+    # Shared backend supaya semua worker gunicorn guna cache yang sama.
+    # Pakej `redis` (pilihan, tiada dalam requirements.txt) hanya diperlukan
+    # jika backend ini dipilih.
+    def __init__(self, url: str, prefix: str = "adc:result:", client: Any = None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError(
+                    "RESULT_CACHE_BACKEND is a Redis URL but the 'redis' package is not installed "
+                    "(pip install redis)"
+                ) from None
+            client = redis.Redis.from_url(url)
+        self._redis = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Entry]:
+        try:
+            blob = self._redis.get(self.prefix + key)
+        except Exception:
+            return None
+        if not blob:
+            return None
+        try:
+            item = json.loads(blob)
+            return float(item["t"]), _unpack(item)
+        except (ValueError, TypeError, KeyError):
+            # Nilai rosak atau bukan milik cache ini: dianggap miss
+            return None
+
+    def set(self, key: str, value: Value, stored_at: float, ttl: float) -> None:
+        blob = json.dumps({"t": stored_at, **_pack(value)}, separators=(",", ":"))
+        try:
+            self._redis.setex(self.prefix + key, max(1, int(ttl)), blob)
+        except Exception:
+            pass
+
+    def delete(self, key: str) -> None:
+        try:
+            self._redis.delete(self.prefix + key)
+        except Exception:
+            pass
+
+    def clear(self) -> None:
+        try:
+            for key in self._redis.scan_iter(self.prefix + "*"):
+                self._redis.delete(key)
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+def _is_cacheable(value: Any) -> bool:
+    # Hasil separa (incomplete_fields) tidak disimpan; hasil penuh disimpan bila sub-query selesai
+    if isinstance(value, WalletResult):
+        return not value.incomplete_fields
+    return (isinstance(value, dict) and value.get("status") != "0" and not value.get("error")
+            and not value.get("incomplete_fields"))
+
+class ResultCache:
+    def __init__(self, backend=None, ttls: Optional[Dict[str, int]] = None,
+                 default_ttl: int = DEFAULT_TTL, stale_ttl: int = STALE_TTL, refresh_workers: int = 4):
+        self.backend = backend if backend is not None else LocalBackend()
+        self.ttls = dict(CHAIN_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._flight = SingleFlight()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+        self._counts = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0}
+        self._lock = threading.Lock()
+
+    def ttl_for(self, chain: str) -> int:
+        return self.ttls.get(chain, self.default_ttl)
+
+    def get_or_fetch(self, chain: str, address: str, fetch: Callable[[], Value]) -> Value:
+        key = f"{chain}:{address}"
+        entry = self.backend.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            age = time.time() - stored_at
+            if age < self.ttl_for(chain):
+                self._count("hits")
+                return value
+            if age < self.ttl_for(chain) + self.stale_ttl:
+                self._count("stale_hits")
+                self._refresh(key, chain, fetch)
+                return value
+        self._count("misses")
+        return self._flight.do(key, lambda: self._load(key, chain, fetch))
+
+    def peek(self, chain: str, address: str) -> Optional[Tuple[Value, float]]:
+        # (value, age) tanpa fetch; None jika tiada atau sudah lepas tempoh stale
+        entry = self.backend.get(f"{chain}:{address}")
+        if entry is None:
+            return None
+        stored_at, value = entry
+        age = time.time() - stored_at
+        if age >= self.ttl_for(chain) + self.stale_ttl:
+            return None
+        return value, age
+
+    def store(self, chain: str, address: str, value: Value) -> None:
+        if _is_cacheable(value):
+            self.backend.set(f"{chain}:{address}", value, time.time(), self.ttl_for(chain) + self.stale_ttl)
+
+    def invalidate(self, chain: str, address: str) -> None:
+        self.backend.delete(f"{chain}:{address}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._counts)
+        out.update(self.backend.stats())
+        return out
+
+    def _load(self, key: str, chain: str, fetch: Callable[[], Value]) -> Value:
+        value = fetch()
+        if _is_cacheable(value):
+            self.backend.set(key, value, time.time(), self.ttl_for(chain) + self.stale_ttl)
+        return value
+
+    def _refresh(self, key: str, chain: str, fetch: Callable[[], Value]) -> None:
+        if self._flight.in_flight(key):
+            return
+        self._count("refreshes")
+
+        def run():
+            try:
+                self._flight.do(key, lambda: self._load(key, chain, fetch))
+            except Exception:
+                pass
+
+        self._refresher.submit(run)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+def build_result_cache() -> Optional[ResultCache]:
+    # RESULT_CACHE_BACKEND: "local" (default), "off", atau URL redis://...
+    spec = os.environ.get("RESULT_CACHE_BACKEND", "local").strip()
+    if spec.lower() in ("off", "none", "0", "false"):
+        return None
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return ResultCache(RedisBackend(spec))
+    return ResultCache(LocalBackend())
@@ -0,0 +1,108 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ai_risk import RiskReason, reasons_text
+
+# Skor berkelompok (columnar) untuk re-score set address yang besar.
+# Hasil mesti sama tepat dengan api_handler._score dan
+# ai_risk.calculate_risk_score bagi setiap rekod.
+
+BUCKET_LOW = 0
+BUCKET_MEDIUM = 1
+BUCKET_HIGH = 2
+BUCKET_NAMES = ("low", "medium", "high")
+
+def columns_from_results(results: Iterable[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+    # Dict hasil get_wallet_data -> lajur (balance, tx_count, wallet_age, network),
+    # dengan paksaan nilai yang sama seperti _score
+    balance: List[float] = []
+    tx_count: List[int] = []
+    wallet_age: List[float] = []
+    network: List[str] = []
+    for r in results:
+        balance.append(float(r.get("balance") or 0.0))
+        tx_count.append(int(r.get("tx_count") or 0))
+        wallet_age.append(float(r.get("wallet_age") or 0.0))
+        network.append(r.get("network") or "")
+    return (np.asarray(balance, dtype=np.float64), np.asarray(tx_count, dtype=np.int64),
+            np.asarray(wallet_age, dtype=np.float64), network)
+
+def ai_scores(balance: Sequence[float], tx_count: Sequence[int], wallet_age: Sequence[float]) -> np.ndarray:
+    # Setara api_handler._score; susunan operasi dikekalkan supaya
+    # pembundaran float (round half-even) memberi nilai yang sama.
+    bal = np.asarray(balance, dtype=np.float64)
+    tx = np.trunc(np.asarray(tx_count, dtype=np.float64)).astype(np.int64)
+    age = np.asarray(wallet_age, dtype=np.float64)
+
+    score = 50 + np.minimum(20, age / 30)
+    score = score + np.minimum(20, np.maximum(0, 5 - tx))
+    score = score - np.where(tx > 100, 10, 0)
+    score = score - np.where(bal == 0, 10, 0)
+    return np.clip(np.rint(score), 0, 100).astype(np.int64)
+
+def risk_scores(balance: Sequence[float], tx_count: Sequence[float],
+                wallet_age: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    # Setara ai_risk.calculate_risk_score: pulangkan (score, bitmask RiskReason)
+    bal = np.asarray(balance, dtype=np.float64)
+    tx = np.asarray(tx_count, dtype=np.float64)
+    age = np.asarray(wallet_age, dtype=np.float64)
+
+    low_bal = bal < 0.01
+    few_tx = tx < 3
+    no_age = age == 0
+    strong = bal > 1
+
+    score = 100 - 30 * low_bal - 20 * few_tx - 20 * no_age + 10 * strong
+    score = np.clip(score, 0, 100).astype(np.int64)
+
+    mask = (low_bal * int(RiskReason.LOW_BALANCE)
+            | few_tx * int(RiskReason.FEW_TX)
+            | no_age * int(RiskReason.NO_AGE)
+            | strong * int(RiskReason.STRONG_BALANCE)).astype(np.int64)
+    mask |= np.select(
+        [score >= 80, score >= 50],
+        [int(RiskReason.LOW_RISK), int(RiskReason.MEDIUM_RISK)],
+        int(RiskReason.HIGH_RISK),
+    )
+    return score, mask
+
+def risk_buckets(scores: Sequence[int]) -> np.ndarray:
+    s = np.asarray(scores)
+    return np.select([s >= 80, s >= 50], [BUCKET_LOW, BUCKET_MEDIUM], BUCKET_HIGH).astype(np.int8)
+
+class BatchScores:
+    __slots__ = ("network", "ai_score", "risk_score", "reason_mask", "bucket")
+
+    def __init__(self, network: Optional[Sequence[str]], ai_score: np.ndarray, risk_score: np.ndarray,
+                 reason_mask: np.ndarray, bucket: np.ndarray):
+        self.network = network
+        self.ai_score = ai_score
+        self.risk_score = risk_score
+        self.reason_mask = reason_mask
+        self.bucket = bucket
+
+    def __len__(self) -> int:
+        return len(self.ai_score)
+
+    def reasons(self, i: int) -> str:
+        # Teks sebab hanya dibina bila diminta
+        return reasons_text(self.reason_mask[i])
+
+    def record(self, i: int) -> Dict[str, Any]:
+        return {
+            "network": self.network[i] if self.network is not None else None,
+            "ai_score": int(self.ai_score[i]),
+            "risk_score": int(self.risk_score[i]),
+            "risk_bucket": BUCKET_NAMES[self.bucket[i]],
+            "reasons": self.reasons(i),
+        }
+
+def score_batch(balance: Sequence[float], tx_count: Sequence[int], wallet_age: Sequence[float],
+                network: Optional[Sequence[str]] = None) -> BatchScores:
+    n = len(balance)
+    if len(tx_count) != n or len(wallet_age) != n or (network is not None and len(network) != n):
+        raise ValueError("score_batch: all columns must have the same length")
+    risk, mask = risk_scores(balance, tx_count, wallet_age)
+    return BatchScores(network, ai_scores(balance, tx_count, wallet_age), risk, mask, risk_buckets(risk))
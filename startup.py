@@ -0,0 +1,159 @@
+from __future__ import annotations
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+# Permulaan worker: fasa warm-up sebelum worker terima request (dengan
+# preload gunicorn, import dan warm-up "local" dibuat sekali dalam master).
+# WARMUP: "off", "local" (default: template Jinja, classifier)
+# atau "full" (tambah DNS + sambungan pool ke provider utama + priming cache).
+WARMUP = os.environ.get("WARMUP", "local").strip().lower()
+WARMUP_TOP_PROVIDERS = int(os.environ.get("WARMUP_TOP_PROVIDERS", "2"))
+WARMUP_TIMEOUT = float(os.environ.get("WARMUP_TIMEOUT", "5"))
+# Address (dipisah koma) yang dimasukkan ke result cache semasa warm-up "full"
+WARMUP_ADDRESSES = [a.strip() for a in os.environ.get("WARMUP_ADDRESSES", "").split(",") if a.strip()]
+
+# Satu contoh bagi setiap cabang classifier (EIP-55, Base58Check, bech32, ...)
+SAMPLE_ADDRESSES = (
+    "0x742d35Cc6634C0532925a3b844Bc454e4438f44e",
+    "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa",
+    "bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq",
+    "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t",
+    "rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh",
+    "4Nd1mBQtrMJVYVfKf2PJy9NZUZdTAsp7D4xWLs4gDB4T",
+    "0.0.98",
+)
+
+def precompile_templates(flask_app) -> int:
+    # get_template menyusun dan menyimpan template dalam cache jinja_env
+    env = flask_app.jinja_env
+    names = env.list_templates(extensions=("html", "xml", "txt"))
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+def warm_classifier() -> int:
+    from address_classifier import classify_batch, keccak256
+    keccak256(b"")
+    return sum(1 for chain in classify_batch(SAMPLE_ADDRESSES) if chain)
+
+def provider_urls(top: int = WARMUP_TOP_PROVIDERS) -> List[str]:
+    # `top` endpoint pertama bagi setiap chain / rangkaian EVM, satu per host
+    import api_handler as h
+    sample = "x"
+    groups: List[Sequence[str]] = [n.rpcs for n in h.EVM_NETWORKS]
+    groups += [h._btc_endpoints(sample), h._tron_endpoints(sample), h.SOL_RPCS,
+               h.XRP_RIPPLED_NODES, [h.XRP_DATA_API], h._hbar_endpoints(sample)]
+    urls: List[str] = []
+    seen = set()
+    for group in groups:
+        for url in list(group)[:top]:
+            parts = urlsplit(url)
+            key = (parts.scheme, parts.netloc)
+            if key not in seen:
+                seen.add(key)
+                urls.append(url)
+    return urls
+
+def _open_pooled(url: str) -> float:
+    # Satu HEAD melalui session host: DNS + TCP + TLS, sambungan kekal dalam
+    # pool keep-alive. Status jawapan tidak penting (405 pun cukup).
+    from http_pool import get_session, resolve_url
+    started = time.monotonic()
+    target = resolve_url(url)
+    get_session(target).head(target, timeout=WARMUP_TIMEOUT, allow_redirects=False).close()
+    return time.monotonic() - started
+
+def warm_connections(urls: Sequence[str], timeout: float = WARMUP_TIMEOUT) -> Dict[str, int]:
+    if not urls:
+        return {"opened": 0, "failed": 0}
+    executor = ThreadPoolExecutor(max_workers=min(16, len(urls)), thread_name_prefix="warmup")
+    futures = [executor.submit(_open_pooled, url) for url in urls]
+    done, _ = wait(futures, timeout=timeout)
+    executor.shutdown(wait=False, cancel_futures=True)
+    opened = sum(1 for f in done if f.exception() is None)
+    return {"opened": opened, "failed": len(urls) - opened}
+
+def prime_cache(addresses: Sequence[str]) -> int:
+    from api_handler import get_wallet_data
+    primed = 0
+    for address in addresses:
+        try:
+            result = get_wallet_data(address)
+        except Exception:
+            continue
+        if isinstance(result, dict) and result.get("status") != "0":
+            primed += 1
+    return primed
+
+def warm_up(flask_app=None, mode: Optional[str] = None) -> Dict[str, Any]:
+    """Jalankan warm-up ikut mode; pulangkan laporan (kiraan + masa dalam ms)."""
+    mode = WARMUP if mode is None else mode
+    report: Dict[str, Any] = {"mode": mode}
+    if mode not in ("local", "full"):
+        return report
+    started = time.monotonic()
+    if flask_app is not None:
+        report["templates"] = precompile_templates(flask_app)
+    report["classifier"] = warm_classifier()
+    if mode == "full":
+        report["connections"] = warm_connections(provider_urls())
+        report["cache_primed"] = prime_cache(WARMUP_ADDRESSES)
+    report["ms"] = round((time.monotonic() - started) * 1000, 1)
+    return report
+
+# ---------- --profile-startup ----------
+def profile_imports(module: str = "app", top: int = 15) -> Tuple[float, List[Tuple[str, float, float]]]:
+    """Import `module` dalam proses baru dengan -X importtime.
+
+    Pulangkan (jumlah ms, [(modul, self ms, kumulatif ms)]) disusun ikut
+    masa kumulatif.
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    rows: List[Tuple[str, float, float]] = []
+    total = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|", 2))
+        row = (name.strip(), int(self_us) / 1000.0, int(cumulative_us) / 1000.0)
+        rows.append(row)
+        if row[0] == module:
+            total = row[2]
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"import {module} failed")
+    rows.sort(key=lambda r: r[2], reverse=True)
+    return total, rows[:top]
+
+def profile_startup(module: str = "app", top: int = 15, mode: str = "local") -> None:
+    total, rows = profile_imports(module, top)
+    print(f"import {module}: {total:.1f} ms")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for name, self_ms, cumulative_ms in rows:
+        print(f"{cumulative_ms:>10.1f}ms {self_ms:>8.1f}ms  {name}")
+    if mode != "off":
+        flask_app = importlib.import_module(module).app if module == "app" else None
+        report = warm_up(flask_app, mode)
+        print(f"warm-up ({mode}): {report}")
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Startup profiling and warm-up")
+    parser.add_argument("--profile-startup", action="store_true", help="report import time and warm-up cost")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--warmup", default=WARMUP, choices=("off", "local", "full"))
+    args = parser.parse_args(argv)
+    if args.profile_startup:
+        profile_startup(args.module, args.top, args.warmup)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
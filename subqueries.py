@@ -0,0 +1,129 @@
+from __future__ import annotations
+import asyncio
+import contextvars
+import inspect
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, wait
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+# Sub-query pilihan (umur, kiraan tx, last5tx) dijalankan serentak dengan
+# query wajib (balance). Selepas PARTIAL_DEADLINE saat dari mula lookup,
+# hasil dipulangkan dengan medan yang belum siap dalam "incomplete_fields";
+# sub-query yang masih berjalan diselesaikan di background (masih terikat
+# pada deadline global REQUEST_DEADLINE) dan hasil penuh disimpan ke cache.
+PARTIAL_DEADLINE = float(os.environ.get("PARTIAL_DEADLINE", "4"))
+
+Values = Dict[str, Any]
+
+class SubQueries:
+    def __init__(self, pool: Executor, deadline: float, soft_deadline: Optional[float] = None):
+        self.pool = pool
+        self.deadline = deadline
+        self.soft_deadline = min(deadline, time.monotonic() + PARTIAL_DEADLINE if soft_deadline is None else soft_deadline)
+        self._futures: Dict[str, Future] = {}
+        self._fields: Dict[str, Sequence[str]] = {}
+
+    def optional(self, name: str, fields: Sequence[str], fn: Callable[..., Any], *args: Any) -> None:
+        # Salin contextvars (chain / trace) ke thread pool
+        self._futures[name] = self.pool.submit(contextvars.copy_context().run, fn, *args)
+        self._fields[name] = tuple(fields)
+
+    @staticmethod
+    def _value(fut: Future) -> Any:
+        try:
+            return fut.result()
+        except Exception:
+            return None
+
+    def collect(self) -> Tuple[Values, List[str]]:
+        """(nilai yang siap, medan yang belum siap) selepas menunggu hingga soft deadline."""
+        pending = [f for f in self._futures.values() if not f.done()]
+        if pending:
+            wait(pending, timeout=max(0.0, self.soft_deadline - time.monotonic()))
+        values = {name: self._value(f) for name, f in self._futures.items() if f.done()}
+        missing = sorted({field for name, f in self._futures.items() if not f.done() for field in self._fields[name]})
+        return values, missing
+
+    def complete(self, callback: Callable[[Values], None]) -> None:
+        # Panggil callback dengan semua nilai bila sub-query terakhir selesai
+        pending = [f for f in self._futures.values() if not f.done()]
+        if not pending:
+            callback({name: self._value(f) for name, f in self._futures.items()})
+            return
+        remaining = [len(pending)]
+        lock = threading.Lock()
+
+        def done(_: Future) -> None:
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            try:
+                callback({name: self._value(f) for name, f in self._futures.items()})
+            except Exception:
+                pass
+
+        for fut in pending:
+            fut.add_done_callback(done)
+
+    def cancel(self) -> None:
+        for fut in self._futures.values():
+            fut.cancel()
+
+# Rujukan kuat kepada task background (asyncio hanya simpan weakref)
+_background: Set[asyncio.Task] = set()
+
+class AsyncSubQueries:
+    def __init__(self, deadline: float, soft_deadline: Optional[float] = None):
+        self.deadline = deadline
+        self.soft_deadline = min(deadline, time.monotonic() + PARTIAL_DEADLINE if soft_deadline is None else soft_deadline)
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self._fields: Dict[str, Sequence[str]] = {}
+
+    def optional(self, name: str, fields: Sequence[str], coro: Awaitable[Any]) -> None:
+        self._tasks[name] = asyncio.ensure_future(coro)
+        self._fields[name] = tuple(fields)
+
+    @staticmethod
+    def _value(task: asyncio.Future) -> Any:
+        if task.cancelled() or task.exception() is not None:
+            return None
+        return task.result()
+
+    async def collect(self) -> Tuple[Values, List[str]]:
+        pending = [t for t in self._tasks.values() if not t.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=max(0.0, self.soft_deadline - time.monotonic()))
+        values = {name: self._value(t) for name, t in self._tasks.items() if t.done()}
+        missing = sorted({field for name, t in self._tasks.items() if not t.done() for field in self._fields[name]})
+        return values, missing
+
+    def complete(self, callback: Callable[[Values], Any]) -> None:
+        # callback boleh pulangkan awaitable (cth. kerja SQLite di executor);
+        # ia ditunggu dalam task background supaya drain_background() merangkuminya
+        async def finish() -> None:
+            if self._tasks:
+                await asyncio.wait(list(self._tasks.values()))
+            try:
+                out = callback({name: self._value(t) for name, t in self._tasks.items()})
+                if inspect.isawaitable(out):
+                    await out
+            except Exception:
+                pass
+
+        task = asyncio.ensure_future(finish())
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+
+async def drain_background(timeout: Optional[float] = None) -> None:
+    # Tunggu pelengkapan background dalam loop ini (sebelum loop / session ditutup)
+    loop = asyncio.get_running_loop()
+    tasks = [t for t in _background if t.get_loop() is loop and not t.done()]
+    if tasks:
+        await asyncio.wait(tasks, timeout=timeout)
@@ -0,0 +1,18 @@
+import os
+import sys
+import tempfile
+
+# Modul dibaca dari akar repo; stor tempatan ke direktori sementara dan
+# tiada panggilan rangkaian sebenar (upstream dihala ke port tertutup)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+_TMP = tempfile.mkdtemp(prefix="adc-tests-")
+os.environ.setdefault("HISTORY_STORE", "off")
+os.environ.setdefault("USAGE_DB_PATH", os.path.join(_TMP, "usage.sqlite3"))
+os.environ.setdefault("USAGE_FILE_PATH", os.path.join(_TMP, "usage.json"))
+os.environ.setdefault("JOB_BROKER_PATH", os.path.join(_TMP, "jobs.sqlite3"))
+os.environ.setdefault("ADC_UPSTREAM_OVERRIDE", "http://127.0.0.1:9")
+os.environ.setdefault("HTTP_RETRIES", "0")
+os.environ.setdefault("WARMUP", "off")
@@ -0,0 +1,100 @@
+import pytest
+
+import address_classifier as ac
+
+GENESIS = "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa"
+SEGWIT_V0 = "bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq"
+TAPROOT = "bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqzk5jj0"
+
+# Vektor EIP-55
+EIP55 = [
+    "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed",
+    "0xfB6916095ca1df60bB79Ce92cE3Ea74c37c5d359",
+    "0xdbF03B407c01E7cD3CBea99509d93f8DDDC8C6FB",
+    "0xD1220A0cf47c7B9Be7A2E6BA89F429762e7b9aDb",
+]
+
+@pytest.fixture(params=["default", "fallback"])
+def keccak(request, monkeypatch):
+    # Laluan pure-Python diuji walaupun pycryptodome dipasang
+    if request.param == "fallback":
+        monkeypatch.setattr(ac, "_pycryptodome_keccak", None)
+    return ac.keccak256
+
+@pytest.mark.parametrize("data, digest", [
+    (b"", "c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470"),
+    (b"abc", "4e03657aea45a94fc7d47ba826c8d667c0d1e6e33a64a036ec44f58fa12d6c45"),
+    (b"The quick brown fox jumps over the lazy dog",
+     "4d741b6f1eb29cb2a9b9911c82f56fa8d73b04959d3d9d222895df6c0b28aa15"),
+])
+def test_keccak256(keccak, data, digest):
+    assert keccak(data).hex() == digest
+
+@pytest.mark.parametrize("address", EIP55)
+def test_eip55(keccak, address):
+    assert ac.eip55_checksum(address.lower()) == address
+    assert ac._check_eth(address) == (True, True)
+    # Satu huruf ditukar kes: checksum gagal
+    i = next(i for i, c in enumerate(address) if i > 1 and c.isalpha())
+    assert ac._check_eth(address[:i] + address[i].swapcase() + address[i + 1:]) == (False, False)
+
+def test_eth_without_checksum_is_shape_only():
+    assert ac._check_eth(EIP55[0].lower()) == (True, False)
+    assert ac._check_eth("0x" + EIP55[0][2:].upper()) == (True, False)
+
+def test_base58check():
+    assert ac.b58check_payload(GENESIS).hex() == "0062e907b15cbf27d5425399ebf6f0fb50ebb88f18"
+    assert ac.b58check_payload(GENESIS[:-1] + "b") is None
+    assert ac.b58check_payload("0OIl") is None
+    assert ac.b58decode("111") == b"\0\0\0"
+
+@pytest.mark.parametrize("address, expected", [
+    (GENESIS, ("btc",)),
+    ("3J98t1WpEZ73CNmQviecrnyiWrnqRhWNLy", ("btc",)),
+    ("TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t", ("tron",)),
+    ("rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh", ("xrp",)),
+    (SEGWIT_V0, ("btc",)),
+    (SEGWIT_V0.upper(), ("btc",)),
+    (TAPROOT, ("btc",)),
+    (EIP55[0], ("eth",)),
+    ("0.0.1234", ("hbar",)),
+    ("1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb", ()),
+])
+def test_candidates(address, expected):
+    assert ac.candidates(address) == expected
+
+def test_segwit_known_programs():
+    assert ac.segwit_decode(SEGWIT_V0) == (0, bytes.fromhex("e8df018c7e326cc253faac7e46cdc51e68542c42"))
+    assert ac.segwit_decode(TAPROOT) == (
+        1, bytes.fromhex("79be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798"))
+
+def _encode(hrp, version, program, const):
+    # 8 -> 5 bit dengan padding sifar (_convertbits tidak menambah padding)
+    bits = len(program) * 8
+    pad = -bits % 5
+    n = int.from_bytes(program, "big") << pad
+    data = [version] + [(n >> 5 * i) & 31 for i in reversed(range((bits + pad) // 5))]
+    values = [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp] + data
+    mod = ac._bech32_polymod(values + [0] * 6) ^ const
+    checksum = [(mod >> 5 * (5 - i)) & 31 for i in range(6)]
+    return hrp + "1" + "".join(ac.BECH32_CHARSET[v] for v in data + checksum)
+
+def test_segwit_rejects_wrong_checksum_variant():
+    taproot = ac.segwit_decode(TAPROOT)[1]
+    assert _encode("bc", 1, taproot, ac.BECH32M_CONST) == TAPROOT
+    program = bytes(range(20))
+    assert ac.segwit_decode(_encode("bc", 0, program, ac.BECH32_CONST)) == (0, program)
+    # v0 dengan bech32m dan v1 dengan bech32 (BIP-350) ditolak
+    assert ac.segwit_decode(_encode("bc", 0, program, ac.BECH32M_CONST)) is None
+    assert ac.segwit_decode(_encode("bc", 1, bytes(32), ac.BECH32_CONST)) is None
+    assert ac.segwit_decode(_encode("bc", 1, bytes(32), ac.BECH32M_CONST)) == (1, bytes(32))
+
+@pytest.mark.parametrize("address", [
+    SEGWIT_V0[:-1] + "p",
+    TAPROOT[:-1] + "q",
+    SEGWIT_V0[:10] + SEGWIT_V0[10:].upper(),
+    "tb1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq",
+    "bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdb",
+])
+def test_segwit_invalid(address):
+    assert ac.segwit_decode(address) is None
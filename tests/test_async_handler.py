@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import time
+
+import api_handler
+import async_handler
+from result_cache import LocalBackend, ResultCache
+from subqueries import AsyncSubQueries
+
+ADDRESS = "bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq"
+
+def test_partial_completion_runs_off_loop_and_is_drained(monkeypatch):
+    cache = ResultCache(LocalBackend())
+    monkeypatch.setattr(api_handler, "RESULT_CACHE", cache)
+    writers = []
+
+    def build(values, persist):
+        if persist:
+            # Di sini stor sejarah ditulis (SQLite): mesti bukan thread event loop
+            writers.append(threading.get_ident())
+        return api_handler._normalize_result(ADDRESS, "Bitcoin", balance=1.0, tx_count=values.get("slow") or 0)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return 7
+
+    async def main():
+        now = time.monotonic()
+        plan = AsyncSubQueries(now + 5, soft_deadline=now)
+        plan.optional("slow", ("tx_count",), slow())
+        values, incomplete = await plan.collect()
+        result = await async_handler._partial("btc", ADDRESS, values, incomplete, plan, build)
+        assert result.incomplete_fields == ("tx_count",)
+        assert cache.peek("btc", ADDRESS) is None
+        await async_handler.drain()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert writers and loop_thread not in writers
+    # Hasil penuh disimpan ke cache yang dibaca semasa panggilan, bukan semasa import
+    assert cache.peek("btc", ADDRESS)[0].tx_count == 7
+
+def test_complete_result_built_off_loop():
+    writers = []
+
+    def build(values, persist):
+        writers.append((threading.get_ident(), persist))
+        return api_handler._normalize_result(ADDRESS, "Bitcoin")
+
+    async def main():
+        plan = AsyncSubQueries(time.monotonic() + 5)
+        await async_handler._partial("btc", ADDRESS, {}, [], plan, build)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert [persist for _, persist in writers] == [True]
+    assert writers[0][0] != loop_thread
+
+def test_cache_is_read_at_call_time(monkeypatch):
+    cache = ResultCache(LocalBackend())
+    cache.store("btc", ADDRESS, api_handler._normalize_result(ADDRESS, "Bitcoin", tx_count=3))
+    monkeypatch.setattr(api_handler, "RESULT_CACHE", cache)
+    assert async_handler.get_wallet_data_sync(ADDRESS)["tx_count"] == 3
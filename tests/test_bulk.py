@@ -0,0 +1,114 @@
+import io
+import json
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+import bulk
+from app import app
+from bulk import detect_format, iter_bulk_results, parse_addresses
+
+BTC = "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa"
+
+def _eth(i):
+    return "0x%040x" % (i + 1)
+
+@pytest.mark.parametrize("content_type, filename, fmt", [
+    ("application/x-ndjson", "", "ndjson"),
+    ("", "wallets.jsonl", "ndjson"),
+    ("text/csv; charset=utf-8", "", "csv"),
+    ("", "WALLETS.CSV", "csv"),
+    ("text/plain", "list.txt", "text"),
+])
+def test_detect_format(content_type, filename, fmt):
+    assert detect_format(content_type, filename) == fmt
+
+def test_csv_header_selects_address_column():
+    lines = ["label,Wallet,note", f"a,{BTC},x", "b,,y", "c, 0.0.42 ,z"]
+    assert list(parse_addresses(lines, "csv")) == [BTC, "0.0.42"]
+
+def test_csv_without_header_uses_first_column():
+    lines = [f"{BTC},first", "", "0.0.42,second"]
+    assert list(parse_addresses(lines, "csv")) == [BTC, "0.0.42"]
+
+def test_ndjson_objects_and_strings():
+    lines = [
+        json.dumps({"address": BTC, "ref": 1}),
+        json.dumps({"wallet": "0.0.42"}),
+        json.dumps("0.0.43"),
+        "0.0.44",
+        json.dumps({"other": "x"}),
+        json.dumps(17),
+        "",
+    ]
+    assert list(parse_addresses(lines, "ndjson")) == [BTC, "0.0.42", "0.0.43", "0.0.44"]
+
+def test_text_skips_blank_lines():
+    assert list(parse_addresses([" 0.0.1 \n", "\n", "0.0.2"])) == ["0.0.1", "0.0.2"]
+
+@pytest.fixture
+def lookups(monkeypatch):
+    # get_wallet_data palsu: rekod puncak serentak per chain
+    state = {"running": Counter(), "peak": Counter(), "calls": Counter()}
+    lock = threading.Lock()
+
+    def fake(address):
+        chain = bulk.detect_chain(address)
+        with lock:
+            state["running"][chain] += 1
+            state["calls"][address] += 1
+            state["peak"][chain] = max(state["peak"][chain], state["running"][chain])
+        time.sleep(0.005)
+        with lock:
+            state["running"][chain] -= 1
+        if address.endswith("13"):
+            raise RuntimeError("provider down")
+        return {"address": address, "status": "1"}
+
+    monkeypatch.setattr(bulk, "get_wallet_data", fake)
+    return state
+
+def test_every_index_once_with_per_chain_limits(lookups):
+    addresses = []
+    for i in range(300):
+        addresses.append(_eth(i) if i % 3 else f"0.0.{i}")
+    addresses[7] = "not-an-address"
+    limits = {"eth": 3, "hbar": 2}
+    items = list(iter_bulk_results(addresses, limits=limits))
+    assert sorted(item["index"] for item in items) == list(range(300))
+    by_index = {item["index"]: item for item in items}
+    assert by_index[7]["chain"] is None and by_index[7]["result"]["status"] == "0"
+    assert by_index[0]["chain"] == "hbar" and by_index[1]["chain"] == "eth"
+    # Lookup yang gagal (exception) tetap pulang sebagai hasil gagal
+    assert by_index[39]["address"] == "0.0.39"
+    failed = [item for item in items if item["address"] and item["address"].endswith("13")]
+    assert failed and all(item["result"]["status"] == "0" for item in failed)
+    assert lookups["peak"]["eth"] <= 3 and lookups["peak"]["hbar"] <= 2
+    assert lookups["peak"]["eth"] >= 2
+    assert sum(lookups["calls"].values()) == 299
+
+def test_max_addresses_cutoff(lookups):
+    items = list(iter_bulk_results((f"0.0.{i}" for i in range(10)), max_addresses=4))
+    assert sorted(item["index"] for item in items) == [0, 1, 2, 3, 4]
+    cutoff = next(item for item in items if item["index"] == 4)
+    assert cutoff["address"] is None and "4" in cutoff["result"]["message"]
+    assert sum(lookups["calls"].values()) == 4
+
+def test_api_bulk_streams_ndjson(lookups):
+    body = "address\n" + "\n".join(f"0.0.{i}" for i in range(20)) + "\nbad\n"
+    response = app.test_client().post("/api/bulk", data=body, content_type="text/csv")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    items = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert sorted(item["index"] for item in items) == list(range(21))
+    assert {item["address"] for item in items if item["chain"] == "hbar"} == {f"0.0.{i}" for i in range(20)}
+
+def test_api_bulk_upload_and_empty(lookups):
+    client = app.test_client()
+    data = {"file": (io.BytesIO(b'{"address": "0.0.5"}\n"0.0.6"\n'), "list.ndjson")}
+    response = client.post("/api/bulk", data=data, content_type="multipart/form-data")
+    lines = response.get_data(as_text=True).splitlines()
+    assert sorted(json.loads(line)["address"] for line in lines) == ["0.0.5", "0.0.6"]
+    assert client.post("/api/bulk", data="\n\n", content_type="text/plain").status_code == 400
@@ -0,0 +1,30 @@
+import api_handler
+from evm_networks import DEFAULT_NETWORKS, PRIMARY, load_networks
+
+ADDRESS = "0x" + "ab" * 20
+
+def test_default_is_mainnet_only(monkeypatch):
+    monkeypatch.delenv("EVM_NETWORKS", raising=False)
+    assert [n.key for n in load_networks(path="")] == [PRIMARY]
+
+def test_opt_in_keeps_mainnet_first():
+    assert [n.key for n in load_networks(path="", enabled=["bsc", "nope", "bsc"])] == [PRIMARY, "bsc"]
+    assert len(load_networks(path="", enabled=["all"])) == len(DEFAULT_NETWORKS)
+
+def test_display_values_come_from_mainnet():
+    eth, bsc, pol = load_networks(path="", enabled=["ethereum", "bsc", "polygon"])
+    result = api_handler._evm_result(ADDRESS, [(eth, (1.5, 3)), (bsc, (20.0, 200)), (pol, None)])
+    assert (result.network, result.balance, result.tx_count) == ("Ethereum", 1.5, 3)
+    # Skor dari jumlah merentasi rangkaian
+    assert result.ai_score == api_handler._score({"tx_count": 203, "wallet_age": 0, "balance": 21.5})
+    assert [e.get("error") for e in result.evm_networks] == [None, None, "unavailable"]
+
+def test_mainnet_failure_fails_lookup():
+    eth, bsc = load_networks(path="", enabled=["bsc"])
+    assert api_handler._evm_result(ADDRESS, [(eth, None), (bsc, (20.0, 200))])["status"] == "0"
+
+def test_single_network_has_no_breakdown():
+    eth, = load_networks(path="", enabled=[])
+    result = api_handler._evm_result(ADDRESS, [(eth, (0.25, 7))])
+    assert "evm_networks" not in result.to_dict()
+    assert result.ai_score == api_handler._score({"tx_count": 7, "wallet_age": 0, "balance": 0.25})
@@ -0,0 +1,62 @@
+import threading
+import time
+
+import api_handler
+
+def test_backup_to_busy_host_is_skipped(monkeypatch):
+    slots = api_handler._HostSlots(1)
+    monkeypatch.setattr(api_handler, "_HEDGE_SLOTS", slots)
+    release = threading.Event()
+    launched = []
+
+    def attempt(url, timeout):
+        launched.append(url)
+        if url.startswith("http://slow.test"):
+            release.wait(2)
+            return None
+        return "ok"
+
+    endpoints = ["http://slow.test/1", "http://slow.test/2", "http://fast.test/1"]
+    monkeypatch.setattr(api_handler.PROVIDER_HEALTH, "rank", lambda eps: list(eps))
+    result = api_handler._hedged(endpoints, attempt, time.monotonic() + 5, hedge_delay=0.01)
+    assert result == "ok"
+    # slow.test sudah penuh (1 attempt kalah masih berjalan): backup kedua dilangkau
+    assert launched == ["http://slow.test/1", "http://fast.test/1"]
+    assert slots.busy("slow.test") == 1
+    release.set()
+    for _ in range(100):
+        if not slots.busy("slow.test"):
+            break
+        time.sleep(0.01)
+    assert slots.busy("slow.test") == 0
+
+def test_first_attempt_ignores_host_limit(monkeypatch):
+    slots = api_handler._HostSlots(0)
+    monkeypatch.setattr(api_handler, "_HEDGE_SLOTS", slots)
+    assert api_handler._hedged(["http://only.test/"], lambda url, timeout: 42, time.monotonic() + 1) == 42
+
+def test_probe_not_claimed_when_host_full(monkeypatch):
+    from provider_health import ERROR, ProviderRegistry
+    registry = ProviderRegistry(cooldown=0.0)
+    monkeypatch.setattr(api_handler, "PROVIDER_HEALTH", registry)
+    slots = api_handler._HostSlots(1)
+    monkeypatch.setattr(api_handler, "_HEDGE_SLOTS", slots)
+    monkeypatch.setattr(registry, "rank", lambda eps: list(eps))
+    for _ in range(3):
+        registry.record("http://open.test/", 0.1, ERROR)
+    # Host penuh oleh attempt dari lookup lain
+    slots.acquire("open.test")
+    launched = []
+
+    def attempt(url, timeout):
+        launched.append(url)
+        if url.startswith("http://slow.test"):
+            time.sleep(0.05)
+        return "ok" if url.startswith("http://fast.test") else None
+
+    endpoints = ["http://slow.test/1", "http://open.test/1", "http://fast.test/1"]
+    assert api_handler._hedged(endpoints, attempt, time.monotonic() + 5, hedge_delay=0.01) == "ok"
+    assert "http://open.test/1" not in launched
+    slots.release("open.test")
+    # Backup yang dilangkau tidak menuntut slot probe half-open
+    assert registry.allow("http://open.test/")
@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from history_sync import RECENT_LIMIT, AddressHistory, HistoryStore, merge
+
+def test_first_merge():
+    hist = merge(None, new_times=[300, 200, 100], cursor="c1", first_seen=100)
+    assert (hist.first_seen, hist.last_seen, hist.cursor, hist.tx_count) == (100, 300, "c1", 3)
+    assert list(hist.recent) == [300, 200, 100]
+
+def test_delta_is_added_newest_first():
+    prev = merge(None, new_times=[300, 200], cursor="c1", first_seen=100)
+    hist = merge(prev, new_times=[500, 400], cursor="c2")
+    assert (hist.first_seen, hist.last_seen, hist.cursor, hist.tx_count) == (100, 500, "c2", 4)
+    assert list(hist.recent) == [500, 400, 300, 200]
+
+def test_empty_delta_keeps_cursor_and_count():
+    prev = merge(None, new_times=[300], cursor="c1", tx_count=10, first_seen=100)
+    hist = merge(prev)
+    assert (hist.cursor, hist.tx_count, hist.last_seen) == ("c1", 10, 300)
+
+def test_provider_total_overrides_count():
+    prev = merge(None, new_times=[300, 200], cursor="c1")
+    assert merge(prev, new_times=[400], tx_count=57).tx_count == 57
+
+def test_first_seen_keeps_oldest():
+    prev = merge(None, first_seen=200)
+    assert merge(prev, first_seen=100).first_seen == 100
+    assert merge(prev, first_seen=300).first_seen == 200
+    # Tanpa first_seen dari pemanggil, halaman separa tidak dianggap sejarah penuh
+    assert merge(None, new_times=[500, 400]).first_seen == 0
+
+def test_recent_is_bounded():
+    hist = merge(None, new_times=range(RECENT_LIMIT + 10, 0, -1))
+    assert len(hist.recent) == RECENT_LIMIT
+    assert hist.recent[0] == RECENT_LIMIT + 10
+
+def test_age_days():
+    assert AddressHistory(first_seen=0).age_days(now=1_000_000) == 0.0
+    assert AddressHistory(first_seen=86400).age_days(now=3 * 86400) == pytest.approx(2.0)
+
+def test_store_roundtrip(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    assert store.get("xrp", "rAddr") is None
+    store.apply("xrp", "rAddr", new_times=[300, 200], cursor="c1", first_seen=100)
+    hist = store.get("xrp", "rAddr")
+    assert (hist.first_seen, hist.cursor, hist.tx_count, list(hist.recent)) == (100, "c1", 2, [300, 200])
+    # Kunci ialah hash chain:address, bukan address
+    assert store.get("btc", "rAddr") is None
+    store.forget("xrp", "rAddr")
+    assert store.get("xrp", "rAddr") is None
+
+def test_concurrent_apply_counts_once_each(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+
+    def worker(base):
+        for i in range(20):
+            store.apply("tron", "T1", new_times=[base + i])
+
+    threads = [threading.Thread(target=worker, args=(n * 100,)) for n in range(1, 5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert store.get("tron", "T1").tx_count == 80
+
+SOL_ADDR = "So1anaAddr"
+
+def _signatures(n, newest=1_700_000_000, step=3600):
+    return [{"signature": f"sig{i}", "blockTime": newest - i * step} for i in range(n)]
+
+@pytest.fixture
+def sol_store(tmp_path, monkeypatch):
+    import api_handler
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    monkeypatch.setattr(api_handler, "HISTORY", store)
+    return store
+
+def test_sol_full_signature_page_is_not_persisted(sol_store):
+    import api_handler
+    sigs = _signatures(api_handler.SOL_SIGNATURE_LIMIT)
+    out = api_handler._sol_result(SOL_ADDR, 1.0, sigs)
+    assert out.tx_count == api_handler.SOL_SIGNATURE_LIMIT
+    assert out.tx_count_is_lower_bound
+    assert sol_store.get("sol", SOL_ADDR) is None
+    # Halaman seterusnya tanpa cursor: masih sync penuh
+    assert len(api_handler._sol_calls(SOL_ADDR, sol_store.get("sol", SOL_ADDR))) == 2
+
+def test_sol_partial_page_is_persisted(sol_store):
+    import api_handler
+    sigs = _signatures(10)
+    out = api_handler._sol_result(SOL_ADDR, 1.0, sigs)
+    assert (out.tx_count, out.tx_count_is_lower_bound) == (10, False)
+    hist = sol_store.get("sol", SOL_ADDR)
+    assert (hist.cursor, hist.tx_count, hist.first_seen) == ("sig0", 10, sigs[-1]["blockTime"])
+
+def test_sol_full_delta_page_resets_stale_cursor(sol_store):
+    import api_handler
+    sol_store.apply("sol", SOL_ADDR, new_times=[1_600_000_000], cursor="old", tx_count=40, first_seen=1_500_000_000)
+    prev = sol_store.get("sol", SOL_ADDR)
+    out = api_handler._sol_result(SOL_ADDR, 1.0, _signatures(api_handler.SOL_SIGNATURE_LIMIT), prev=prev)
+    assert out.tx_count == 40 + api_handler.SOL_SIGNATURE_LIMIT
+    assert out.tx_count_is_lower_bound
+    hist = sol_store.get("sol", SOL_ADDR)
+    # Cursor dan kiraan basi dibuang; first_seen yang disahkan dikekalkan
+    assert (hist.cursor, hist.tx_count, hist.first_seen) == (None, 0, 1_500_000_000)
+    assert out.wallet_age == round(hist.age_days(), 2)
@@ -0,0 +1,44 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import api_handler
+import http_pool
+
+class _Busy(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(503)
+        self.send_header("Retry-After", "8")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def busy_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Busy)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+def test_retry_after_is_not_slept(busy_url, monkeypatch):
+    monkeypatch.setattr(http_pool, "HTTP_RETRIES", 1)
+    http_pool.close_all()
+    started = time.monotonic()
+    r = http_pool.get_session(busy_url).get(busy_url, timeout=1.0)
+    assert r.status_code == 503
+    assert time.monotonic() - started < 2.0
+
+def test_pool_stats_in_metrics(busy_url):
+    http_pool.close_all()
+    session = http_pool.get_session(busy_url)
+    for _ in range(3):
+        session.get(busy_url, timeout=1.0)
+    host = busy_url.rstrip("/")
+    assert http_pool.pool_stats()[host]["requests"] >= 3
+    text = api_handler.METRICS.render()
+    assert 'adc_http_pool_requests_total{provider="%s",connection="reused"}' % host[len("http://"):] in text
@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+
+import http_replay
+from http_replay import KIND_BODY, KIND_ERROR, Recorder, Replayer, request_key
+
+def test_request_key_is_canonical():
+    a = request_key("get", "https://x/api", {"b": 1, "a": 2})
+    assert a == request_key("GET", "https://x/api", {"a": 2, "b": 1})
+    assert a != request_key("POST", "https://x/api", {"a": 2, "b": 1})
+    assert request_key("POST", "https://x", payload={"m": 1}) != request_key("POST", "https://x", payload={"m": 2})
+
+def test_record_and_replay_in_order(tmp_path):
+    path = str(tmp_path / "archive")
+    recorder = Recorder(path)
+    recorder.record("k1", 0.05, body=b'{"n": 1}')
+    recorder.record("k1", 0.07, body=b'{"n": 2}')
+    recorder.record("k2", 1.5, error="timeout: read")
+    recorder.close()
+
+    replayer = Replayer(path, "max")
+    assert replayer.lookup("k1") == (KIND_BODY, b'{"n": 1}', 0.05)
+    assert replayer.lookup("k1")[1] == b'{"n": 2}'
+    # Kunci yang dirakam berulang dimain ikut giliran
+    assert replayer.lookup("k1")[1] == b'{"n": 1}'
+    assert replayer.lookup("k2") == (KIND_ERROR, b"timeout: read", 1.5)
+    assert replayer.lookup("missing") is None
+    assert replayer.delay(1.5) == 0.0
+    assert replayer.stats()["records"] == 3
+    replayer.close()
+
+@pytest.mark.skipif(not hasattr(os, "fork") or http_replay.fcntl is None, reason="needs fork and flock")
+def test_forked_writers_keep_offsets_valid(tmp_path):
+    path = str(tmp_path / "archive")
+    recorder = Recorder(path)
+    recorder.record("parent", 0.0, body=b"parent-before-fork")
+    pids = []
+    for n in range(4):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                for i in range(50):
+                    recorder.record(f"w{n}-{i}", 0.0, body=json.dumps({"w": n, "i": i, "pad": "x" * (i * 7)}).encode())
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    for pid in pids:
+        assert os.waitpid(pid, 0)[1] == 0
+    recorder.record("parent", 0.0, body=b"parent-after-fork")
+    recorder.close()
+
+    replayer = Replayer(path, "max")
+    assert replayer.stats()["records"] == 202
+    for n in range(4):
+        for i in range(50):
+            body = json.loads(replayer.lookup(f"w{n}-{i}")[1])
+            assert (body["w"], body["i"]) == (n, i)
+    assert replayer.lookup("parent")[1] == b"parent-before-fork"
+    assert replayer.lookup("parent")[1] == b"parent-after-fork"
+    replayer.close()
@@ -0,0 +1,104 @@
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import iso_export
+from iso_export import MAX_ID_LEN, MAX_USTRD_LEN, PROLOG, generate_iso_xml, iter_iso_batch
+
+NS = {"p": iso_export.NAMESPACE}
+
+def _parse(xml):
+    return ET.fromstring(xml.encode("utf-8"))
+
+def test_single_export_is_well_formed():
+    root = _parse(generate_iso_xml("rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh",
+                                   {"network": "XRP", "ai_score": 70, "tx_count": 12, "balance": 1.5}))
+    assert root.find("p:CstmrCdtTrfInitn/p:GrpHdr/p:NbOfTxs", NS).text == "1"
+    assert root.find("p:CstmrCdtTrfInitn/p:GrpHdr/p:MsgId", NS).text == "ADC-rHb9CJ"
+    ustrd = root.find(".//p:RmtInf/p:Ustrd", NS).text
+    assert ustrd.startswith("XRP score=70 tx=12")
+
+def test_markup_in_values_is_escaped():
+    hostile = 'x</Id><Evil a="1">&amp;<![CDATA[y]]>'
+    xml = generate_iso_xml(hostile, {"network": "ETH", "reason": "<script>alert('&')</script>"})
+    root = _parse(xml)
+    assert root.find(".//p:Evil", NS) is None
+    assert root.find(".//p:Dbtr/p:Nm", NS).text == hostile
+    assert "<script>" not in xml
+    assert root.find(".//p:RmtInf/p:Ustrd", NS).text.endswith("<script>alert('&')</script>")
+
+def test_length_limits_apply_before_escaping():
+    root = _parse(generate_iso_xml("&" * 100, {"network": "N", "reason": "<" * 300}))
+    assert len(root.find(".//p:PmtInfId", NS).text) <= MAX_ID_LEN
+    assert len(root.find(".//p:RmtInf/p:Ustrd", NS).text) <= MAX_USTRD_LEN
+
+def test_batch_counts_and_skips_none():
+    entries = ["addr1", None, {"address": "addr2", "amount": "2.5"}, None]
+    root = _parse("".join(iter_iso_batch(entries, msg_id="M1")))
+    hdr = root.find("p:CstmrCdtTrfInitn/p:GrpHdr", NS)
+    assert (hdr.find("p:NbOfTxs", NS).text, hdr.find("p:CtrlSum", NS).text) == ("2", "2.50")
+    ids = [e.text for e in root.iterfind(".//p:DbtrAcct/p:Id/p:Othr/p:Id", NS)]
+    assert ids == ["addr1", "addr2"]
+
+def test_prolog_is_sent_before_entries_are_read():
+    consumed = []
+
+    def entries():
+        for address in ("a1", "a2"):
+            consumed.append(address)
+            yield address
+
+    chunks = iter_iso_batch(entries())
+    assert next(chunks) == PROLOG
+    assert consumed == []
+    rest = list(chunks)
+    assert consumed == ["a1", "a2"]
+    assert _parse(PROLOG + "".join(rest)).find(".//p:NbOfTxs", NS).text == "2"
+
+def test_keepalive_while_a_lookup_blocks(monkeypatch):
+    monkeypatch.setattr(iso_export, "KEEPALIVE_INTERVAL", 0.05)
+    release = threading.Event()
+
+    def entries():
+        yield "a1"
+        # Satu lookup lambat (lebih lama dari beberapa KEEPALIVE_INTERVAL)
+        release.wait(2)
+        yield "a2"
+
+    chunks = iter_iso_batch(entries())
+    assert next(chunks) == PROLOG
+    started = time.monotonic()
+    assert next(chunks) == iso_export.KEEPALIVE
+    assert next(chunks) == iso_export.KEEPALIVE
+    assert time.monotonic() - started < 1.0
+    release.set()
+    rest = list(chunks)
+    root = _parse(PROLOG + iso_export.KEEPALIVE * 2 + "".join(rest))
+    assert root.find(".//p:NbOfTxs", NS).text == "2"
+
+def test_source_error_is_raised():
+    def entries():
+        yield "a1"
+        raise RuntimeError("lookup pool closed")
+
+    with pytest.raises(RuntimeError, match="pool closed"):
+        list(iter_iso_batch(entries()))
+
+def test_closing_stream_stops_reader():
+    read = []
+
+    def entries():
+        for i in range(10_000):
+            read.append(i)
+            yield f"a{i}"
+
+    chunks = iter_iso_batch(entries())
+    next(chunks)
+    chunks.close()
+    time.sleep(0.2)
+    count = len(read)
+    time.sleep(0.2)
+    # Pengeluar berhenti (buffer terhad), tidak membaca semua entri
+    assert len(read) == count < 10_000
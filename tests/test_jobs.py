@@ -0,0 +1,118 @@
+import time
+
+import pytest
+
+import api_handler
+import jobs
+from jobs import DONE, QUEUED, RUNNING, MemoryBackend, QueueFull, SQLiteBroker
+
+ETH = "0x" + "ab" * 20
+HBAR = "0.0.1234"
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(ttl=60)
+    return SQLiteBroker(str(tmp_path / "jobs.sqlite3"), ttl=60, claim_timeout=30)
+
+def _result(address):
+    return api_handler._normalize_result(address, "Ethereum", balance=1.0, tx_count=3)
+
+def test_queued_running_done(backend):
+    status = backend.submit("job1", [ETH, HBAR], max_pending=10)
+    assert (status["status"], status["completed"], status["total"]) == (QUEUED, 0, 2)
+    assert backend.pending() == 2
+
+    tasks = backend.claim(1, timeout=0)
+    assert [(t[0], t[1], t[3]) for t in tasks] == [("job1", 0, "eth")]
+    assert backend.status("job1")["status"] == RUNNING
+
+    backend.finish("job1", 0, ETH, "eth", _result(ETH))
+    status = backend.status("job1")
+    assert (status["status"], status["completed"], status["progress"]) == (RUNNING, 1, 0.5)
+
+    task = backend.claim(5, timeout=0)[0]
+    backend.finish(*task, {"status": "0", "message": "down"})
+    status = backend.status("job1")
+    assert (status["status"], status["completed"], status["failed"]) == (DONE, 2, 1)
+    assert status["finished_at"] is not None
+    assert backend.pending() == 0
+    items = backend.results("job1", 0, 10)
+    assert [item["index"] for item in items] == [0, 1]
+    assert items[0]["result"]["tx_count"] == 3
+
+def test_invalid_addresses_count_as_progress(backend):
+    status = backend.submit("job2", ["not-an-address", ETH], max_pending=10)
+    # Address tidak sah siap semasa submit: kemajuan, bukan "queued"
+    assert (status["status"], status["completed"], status["failed"]) == (RUNNING, 1, 1)
+    assert backend.submit("job3", ["nope"], max_pending=10)["status"] == DONE
+
+def test_sqlite_finish_is_idempotent(tmp_path):
+    # Task yang dibaris semula selepas claim timeout boleh siap dua kali
+    broker = SQLiteBroker(str(tmp_path / "jobs.sqlite3"), ttl=60, claim_timeout=30)
+    broker.submit("job4", [ETH], max_pending=10)
+    task = broker.claim(1, timeout=0)[0]
+    broker.finish(*task, _result(ETH))
+    broker.finish(*task, _result(ETH))
+    assert broker.status("job4")["completed"] == 1
+
+def test_queue_full(backend):
+    backend.submit("job5", [ETH, HBAR], max_pending=3)
+    with pytest.raises(QueueFull):
+        backend.submit("job6", [ETH, HBAR], max_pending=3)
+    assert backend.status("job6") is None
+
+def test_cleanup_expires_finished_jobs(backend):
+    backend.submit("job7", ["nope"], max_pending=10)
+    backend.submit("job8", [ETH], max_pending=10)
+    finished_at = backend.status("job7")["finished_at"]
+    assert backend.cleanup(now=finished_at + 61) == 1
+    assert backend.status("job7") is None
+    assert backend.status("job8") is not None
+
+def test_sqlite_requeues_stale_claims(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "jobs.sqlite3"), ttl=60, claim_timeout=30)
+    broker.submit("job9", [ETH], max_pending=10)
+    claimed_at = broker.claim(1, timeout=0)
+    assert broker.claim(1, timeout=0) == []
+    broker.cleanup(now=time.time() + 31)
+    assert broker.claim(1, timeout=0) == claimed_at
+
+@pytest.mark.parametrize("env, expected", [
+    ({}, "memory"),
+    ({"WEB_CONCURRENCY": "1"}, "memory"),
+    ({"WEB_CONCURRENCY": "4"}, "sqlite"),
+    ({"SERVER_SOFTWARE": "gunicorn/21.1.0"}, "sqlite"),
+    ({"SERVER_SOFTWARE": "gunicorn/21.1.0", "WEB_CONCURRENCY": "1"}, "memory"),
+])
+def test_auto_backend(monkeypatch, env, expected):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.delenv("SERVER_SOFTWARE", raising=False)
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    assert jobs.resolve_backend("auto") == expected
+    assert jobs.resolve_backend("sqlite") == "sqlite"
+
+def test_poll_only_worker_drains_shared_broker(tmp_path, monkeypatch):
+    path = str(tmp_path / "jobs.sqlite3")
+    monkeypatch.setattr(jobs, "screen", _result)
+    # Worker A terima submit kemudian mati sebelum/semasa dispatch
+    dead = jobs.JobQueue(SQLiteBroker(path, ttl=60, claim_timeout=30), workers=2)
+    monkeypatch.setattr(dead, "start", lambda: None)
+    job_id = dead.submit([ETH, HBAR, ETH])["job_id"]
+    dead.backend.claim(1, timeout=0)
+    # Claim worker A sudah melepasi claim timeout
+    dead.backend._conn().execute("UPDATE tasks SET claimed_at = claimed_at - 60 WHERE state = 1")
+
+    # Worker B hanya melayan poll (tiada submit)
+    poller = jobs.JobQueue(SQLiteBroker(path, ttl=60, claim_timeout=30), workers=2)
+    try:
+        assert poller.status(job_id)["total"] == 3
+        deadline = time.monotonic() + 5
+        while poller.status(job_id)["status"] != DONE and time.monotonic() < deadline:
+            time.sleep(0.02)
+        page = poller.results(job_id)
+        assert page["status"] == DONE
+        assert [item["index"] for item in page["items"]] == [0, 1, 2]
+    finally:
+        poller.stop()
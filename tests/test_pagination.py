@@ -0,0 +1,78 @@
+import api_handler
+from history_sync import HistoryStore
+from pagination import TX_SCORE_THRESHOLD, count_items, with_query
+from wallet_result import WalletResult
+
+def _pages(total, per_page=25):
+    # Halaman palsu: item terbaru dahulu, timestamp menurun
+    pages = {}
+    for n, start in enumerate(range(0, total, per_page)):
+        items = [{"ts": 10_000 - i} for i in range(start, min(start + per_page, total))]
+        more = start + per_page < total
+        pages[f"p{n}"] = {"data": items, "next": f"p{n + 1}" if more else None}
+    return pages
+
+def _count(total, **kwargs):
+    pages = _pages(total)
+    return count_items("p0", pages.get, lambda page, url: page["next"], lambda page: page["data"],
+                       lambda item: item["ts"], **kwargs)
+
+def test_count_reads_every_page_when_below_threshold():
+    counted = _count(60)
+    assert counted.count == 60
+    assert counted.complete
+    assert counted.newest == 10_000
+    assert counted.oldest == 10_000 - 59
+    assert len(counted.first_page) == 25
+
+def test_count_stops_at_score_threshold():
+    counted = _count(261)
+    assert counted.count >= TX_SCORE_THRESHOLD
+    assert counted.count < 261
+    assert not counted.complete
+
+def test_count_stops_at_page_budget():
+    counted = _count(200, stop_at=None, max_pages=2)
+    assert counted.count == 50
+    assert not counted.complete
+
+def test_count_first_page_failure():
+    assert count_items("p0", lambda url: {"error": "boom"}, lambda page, url: None,
+                       lambda page: page["data"], lambda item: item["ts"]) is None
+
+def test_with_query_replaces_params():
+    url = with_query("https://x/api?limit=10&order=desc", limit=50, after=None)
+    assert url == "https://x/api?order=desc&limit=50"
+
+def _result(tx_count=0):
+    return api_handler._normalize_result("0.0.1234", "Hedera", balance=1.0, tx_count=tx_count)
+
+def test_truncated_count_is_not_persisted(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    monkeypatch.setattr(api_handler, "HISTORY", store)
+    counted = _count(261)
+    for _ in range(3):
+        prev = store.get("hbar", "0.0.1234")
+        out = api_handler._record_paged("hbar", "0.0.1234", _result(), prev, counted,
+                                        new_times=[10_000], cursor="10000", first_seen=9_000)
+        # Kiraan separa dilaporkan sebagai had bawah, tidak bertambah setiap semakan
+        assert out.tx_count == counted.count
+        assert out.tx_count_is_lower_bound
+        assert out.to_dict()["tx_count_is_lower_bound"] is True
+    hist = store.get("hbar", "0.0.1234")
+    assert hist.cursor is None
+    assert hist.tx_count == 0
+    assert hist.first_seen == 9_000
+
+def test_complete_count_is_persisted(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    monkeypatch.setattr(api_handler, "HISTORY", store)
+    counted = _count(60)
+    out = api_handler._record_paged("hbar", "0.0.1234", _result(), None, counted,
+                                    new_times=[10_000], cursor="10000", first_seen=None)
+    assert isinstance(out, WalletResult)
+    assert out.tx_count == 60
+    assert not out.tx_count_is_lower_bound
+    assert "tx_count_is_lower_bound" not in out.to_dict()
+    hist = store.get("hbar", "0.0.1234")
+    assert (hist.cursor, hist.tx_count) == ("10000", 60)
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+import provider_health
+from provider_health import (CLOSED, ERROR, FAILURE_THRESHOLD, HALF_OPEN, MIN_CALLS_FOR_RATE, OK, OPEN, TIMEOUT,
+                             ProviderRegistry)
+
+URL = "http://rpc.test/v1"
+
+def _state(registry, key="rpc.test"):
+    return registry.snapshot()[key]["state"]
+
+def _open(registry, url=URL):
+    for _ in range(FAILURE_THRESHOLD):
+        registry.record(url, 0.1, ERROR)
+
+def test_opens_after_consecutive_failures():
+    registry = ProviderRegistry(cooldown=60)
+    for _ in range(FAILURE_THRESHOLD - 1):
+        registry.record(URL, 0.1, TIMEOUT)
+    assert _state(registry) == CLOSED
+    assert registry.allow(URL)
+    registry.record(URL, 0.1, ERROR)
+    assert _state(registry) == OPEN
+    assert not registry.allow(URL)
+    snap = registry.snapshot()["rpc.test"]
+    assert (snap["errors"], snap["timeouts"], snap["consecutive_failures"]) == (FAILURE_THRESHOLD, 2, 3)
+
+def test_success_resets_consecutive_failures():
+    registry = ProviderRegistry(cooldown=60)
+    for _ in range(3):
+        for _ in range(FAILURE_THRESHOLD - 1):
+            registry.record(URL, 0.1, ERROR)
+        registry.record(URL, 0.1, OK)
+    assert registry.snapshot()["rpc.test"]["calls"] < MIN_CALLS_FOR_RATE
+    assert _state(registry) == CLOSED
+
+def test_opens_on_error_rate_after_min_calls():
+    registry = ProviderRegistry(cooldown=60)
+    # Tiada FAILURE_THRESHOLD kegagalan berturut-turut, tetapi kadar error tinggi
+    outcomes = [ERROR, ERROR, OK] * 4
+    for n, outcome in enumerate(outcomes, 1):
+        registry.record(URL, 0.1, outcome)
+        if n < MIN_CALLS_FOR_RATE:
+            assert _state(registry) == CLOSED
+        if _state(registry) == OPEN:
+            break
+    assert n == MIN_CALLS_FOR_RATE
+    assert registry.snapshot()["rpc.test"]["error_rate"] >= provider_health.ERROR_RATE_THRESHOLD
+
+def test_half_open_single_probe_then_close():
+    registry = ProviderRegistry(cooldown=0.05)
+    _open(registry)
+    assert not registry.allow(URL)
+    time.sleep(0.06)
+    assert registry.allow(URL)
+    assert _state(registry) == HALF_OPEN
+    # Satu probe sahaja pada satu masa
+    assert not registry.allow(URL)
+    registry.record(URL, 0.1, OK)
+    assert _state(registry) == CLOSED
+    assert registry.allow(URL) and registry.allow(URL)
+
+def test_failed_probe_reopens():
+    registry = ProviderRegistry(cooldown=0.05)
+    _open(registry)
+    time.sleep(0.06)
+    assert registry.allow(URL)
+    registry.record(URL, 0.1, ERROR)
+    assert _state(registry) == OPEN
+    assert not registry.allow(URL)
+    time.sleep(0.06)
+    assert registry.allow(URL)
+
+def test_abandoned_probe_expires(monkeypatch):
+    # Probe yang tidak pernah merekod hasil (cth. attempt tidak dilancar) menyekat
+    # probe lain sehingga PROBE_TIMEOUT; _hedged hanya menuntut probe bila melancar
+    monkeypatch.setattr(provider_health, "PROBE_TIMEOUT", 0.05)
+    registry = ProviderRegistry(cooldown=0.0)
+    _open(registry)
+    assert registry.allow(URL)
+    assert not registry.allow(URL)
+    time.sleep(0.06)
+    assert registry.allow(URL)
+
+def test_rank_orders_by_score_and_puts_open_last():
+    registry = ProviderRegistry(cooldown=60)
+    slow, fast, broken, fresh = ("http://slow.test/", "http://fast.test/", "http://broken.test/", "http://new.test/")
+    registry.record(slow, 2.0, OK)
+    registry.record(fast, 0.1, OK)
+    _open(registry, broken)
+    ranked = registry.rank([broken, slow, fresh, fast])
+    # Belum pernah dipanggil: DEFAULT_LATENCY (1 s), di antara fast dan slow
+    assert ranked == [fast, fresh, slow, broken]
+
+def test_rank_penalises_errors_and_keeps_order_on_ties():
+    registry = ProviderRegistry(cooldown=60)
+    a, b, c = "http://a.test/", "http://b.test/", "http://c.test/"
+    registry.record(a, 0.2, ERROR)
+    registry.record(b, 0.3, OK)
+    assert registry.rank([a, b]) == [b, a]
+    assert registry.rank([c, "http://d.test/"]) == [c, "http://d.test/"]
+
+@pytest.mark.parametrize("url, key", [("https://x.test:8443/rpc?a=1", "x.test:8443"), ("not a url", "not a url")])
+def test_provider_key(url, key):
+    assert provider_health.provider_key(url) == key
@@ -0,0 +1,139 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import api_handler
+from rate_limit import MAX_PENALTY, RateLimiter, TokenBucket
+
+class _Provider(BaseHTTPRequestHandler):
+    # /slow: jawapan lambat (untuk coalescing); /limited: 429 dengan Retry-After
+    calls = []
+
+    def do_GET(self):
+        type(self).calls.append(self.path)
+        if self.path.startswith("/limited"):
+            self.send_response(429)
+            self.send_header("Retry-After", "2")
+            body = b""
+        else:
+            time.sleep(0.3)
+            self.send_response(200)
+            body = b'{"ok": true}'
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def provider_url(monkeypatch):
+    # conftest mengalihkan semua upstream ke port mati; di sini terus ke server tempatan
+    monkeypatch.setattr(api_handler, "resolve_url", lambda url: url)
+    _Provider.calls = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Provider)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_reserve_queues_callers_in_order():
+    bucket = TokenBucket(rate=10.0, burst=2)
+    waits = [bucket.reserve(timeout=1.0) for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    # Token seterusnya ditempah: setiap pemanggil menunggu giliran, bukan gagal
+    assert waits[2] == pytest.approx(0.1, abs=0.02)
+    assert waits[3] == pytest.approx(0.2, abs=0.02)
+
+def test_reserve_beyond_timeout_does_not_consume():
+    bucket = TokenBucket(rate=1.0, burst=1)
+    assert bucket.reserve(timeout=0.0) == 0.0
+    assert bucket.reserve(timeout=0.5) is None
+    assert bucket.reserve(timeout=1.5) == pytest.approx(1.0, abs=0.05)
+
+def test_acquire_sleeps_then_succeeds():
+    bucket = TokenBucket(rate=20.0, burst=1)
+    started = time.monotonic()
+    assert all(bucket.acquire(timeout=1.0) for _ in range(3))
+    assert time.monotonic() - started >= 0.09
+
+def test_penalize_applies_retry_after_and_is_capped():
+    bucket = TokenBucket(rate=2.0, burst=5)
+    bucket.penalize(3.0)
+    assert bucket.reserve(timeout=10.0) == pytest.approx(3.5, abs=0.05)
+    capped = TokenBucket(rate=1.0, burst=5)
+    capped.penalize(3600)
+    assert capped.reserve(timeout=1000) == pytest.approx(MAX_PENALTY + 1, abs=0.05)
+
+@pytest.mark.parametrize("retry_after, expected", [("4", 4.0), (None, 1.0), ("Wed, 21 Oct 2015 07:28:00 GMT", 1.0)])
+def test_limiter_parses_retry_after(retry_after, expected):
+    limiter = RateLimiter({"p.test": (1.0, 1)})
+    limiter.reserve("http://p.test/x", 0)
+    limiter.penalize("http://p.test/x", retry_after)
+    assert limiter.reserve("http://p.test/y", 100) == pytest.approx(expected + 1, abs=0.05)
+    # Host tanpa had tidak dihadkan
+    assert limiter.reserve("http://other.test/", 0) == 0.0
+
+def test_429_penalises_provider_bucket(provider_url, monkeypatch):
+    limiter = RateLimiter({"127.0.0.1": (1.0, 5)})
+    monkeypatch.setattr(api_handler, "RATE_LIMITER", limiter)
+    out = api_handler._http_request_json("GET", provider_url + "/limited", 1.0)
+    assert "429" in out["error"]
+    assert limiter.reserve(provider_url, 10) == pytest.approx(3.0, abs=0.1)
+    # Pemanggil dengan bajet kecil gagal cepat sebagai rate_limited (tiada request)
+    calls = len(_Provider.calls)
+    assert api_handler._http_request_json("GET", provider_url + "/limited", 0.5)["error"].startswith("rate_limited")
+    assert len(_Provider.calls) == calls
+
+def _concurrent_gets(url, timeouts):
+    out = [None] * len(timeouts)
+
+    def run(i):
+        out[i] = api_handler._http_get_json(url, {"a": 1}, timeout=timeouts[i])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(timeouts))]
+    for t in threads:
+        t.start()
+        time.sleep(0.01)
+    for t in threads:
+        t.join()
+    return out
+
+def test_identical_gets_make_one_upstream_call(provider_url):
+    out = _concurrent_gets(provider_url + "/slow", [2.0] * 5)
+    assert out == [{"ok": True}] * 5
+    assert _Provider.calls == ["/slow?a=1"]
+
+def test_follower_waits_only_its_own_timeout(provider_url):
+    started = time.monotonic()
+    out = _concurrent_gets(provider_url + "/slow", [2.0, 0.05])
+    assert out[0] == {"ok": True}
+    assert out[1]["error"].startswith("timeout")
+    assert len(_Provider.calls) == 1
+    assert time.monotonic() - started < 1.0
+
+def test_async_follower_waits_only_its_own_timeout(monkeypatch):
+    import asyncio
+    import async_handler
+    calls = []
+
+    async def slow(method, url, timeout, **kwargs):
+        calls.append(url)
+        await asyncio.sleep(0.3)
+        return {"ok": True}
+
+    monkeypatch.setattr(async_handler, "_request_json", slow)
+
+    async def main():
+        leader = asyncio.ensure_future(async_handler._get_json("http://p.test/x", 2.0))
+        await asyncio.sleep(0)
+        follower = await async_handler._get_json("http://p.test/x", 0.05)
+        shared = await async_handler._get_json("http://p.test/x", 2.0)
+        return await leader, follower, shared
+
+    leader, follower, shared = asyncio.run(main())
+    assert leader == shared == {"ok": True}
+    assert follower["error"].startswith("timeout")
+    assert calls == ["http://p.test/x"]
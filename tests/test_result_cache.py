@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pytest
+
+import api_handler
+from app import app
+from result_cache import LocalBackend, ResultCache
+
+ADDRESS = "bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq"
+
+def test_local_backend_expires_after_ttl():
+    backend = LocalBackend()
+    backend.set("a", {"v": 1}, time.time() - 20, ttl=10)
+    backend.set("b", {"v": 2}, time.time(), ttl=10)
+    assert backend.get("a") is None
+    assert backend.get("b")[1] == {"v": 2}
+    assert backend.stats()["entries"] == 1
+
+def test_local_backend_evicts_least_recently_used():
+    backend = LocalBackend(max_entries=2)
+    now = time.time()
+    backend.set("a", {"v": 1}, now, 60)
+    backend.set("b", {"v": 2}, now, 60)
+    backend.get("a")
+    backend.set("c", {"v": 3}, now, 60)
+    assert backend.get("b") is None
+    assert backend.get("a") is not None and backend.get("c") is not None
+
+def test_local_backend_bounded_by_bytes():
+    value = {"v": "x" * 100}
+    backend = LocalBackend(max_bytes=250)
+    now = time.time()
+    for key in "abc":
+        backend.set(key, value, now, 60)
+    assert backend.get("a") is None
+    assert backend.stats()["bytes"] <= 250
+    # Nilai lebih besar daripada had tidak disimpan langsung
+    backend.set("big", {"v": "x" * 300}, now, 60)
+    assert backend.get("big") is None
+
+def test_stale_value_served_while_refreshing():
+    cache = ResultCache(LocalBackend(), ttls={"btc": 10}, stale_ttl=300)
+    cache.backend.set("btc:" + ADDRESS, {"tx_count": 1}, time.time() - 20, 310)
+    refreshed = threading.Event()
+
+    def fetch():
+        refreshed.set()
+        return {"tx_count": 2}
+
+    assert cache.get_or_fetch("btc", ADDRESS, fetch) == {"tx_count": 1}
+    assert refreshed.wait(2)
+    deadline = time.monotonic() + 2
+    while cache.peek("btc", ADDRESS)[0] != {"tx_count": 2} and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.peek("btc", ADDRESS)[0] == {"tx_count": 2}
+    assert cache.get_or_fetch("btc", ADDRESS, lambda: pytest.fail("fresh entry refetched")) == {"tx_count": 2}
+    stats = cache.stats()
+    assert (stats["stale_hits"], stats["refreshes"], stats["hits"]) == (1, 1, 1)
+
+def test_fetch_past_stale_window():
+    cache = ResultCache(LocalBackend(), ttls={"btc": 10}, stale_ttl=30)
+    cache.backend.set("btc:" + ADDRESS, {"tx_count": 1}, time.time() - 50, 310)
+    assert cache.get_or_fetch("btc", ADDRESS, lambda: {"tx_count": 5}) == {"tx_count": 5}
+    assert cache.stats()["misses"] == 1
+
+def test_failed_results_are_not_cached():
+    cache = ResultCache(LocalBackend())
+    cache.get_or_fetch("btc", ADDRESS, lambda: {"status": "0", "message": "down"})
+    assert cache.peek("btc", ADDRESS) is None
+
+def test_validate_etag_and_not_modified(monkeypatch):
+    cache = ResultCache(LocalBackend())
+    cache.store("btc", ADDRESS, api_handler._normalize_result(ADDRESS, "Bitcoin", balance=1.0, tx_count=3))
+    monkeypatch.setattr(api_handler, "RESULT_CACHE", cache)
+    client = app.test_client()
+
+    first = client.get("/api/v1/validate", query_string={"address": ADDRESS})
+    assert first.status_code == 200
+    assert first.json["tx_count"] == 3
+    etag = first.headers["ETag"]
+    assert etag
+    assert first.headers["Cache-Control"].startswith("public, max-age=")
+
+    again = client.get("/api/v1/validate", query_string={"address": ADDRESS}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+
+    changed = client.get("/api/v1/validate", query_string={"address": ADDRESS}, headers={"If-None-Match": '"other"'})
+    assert changed.status_code == 200
+
+class _FakeRedis:
+    # Pengganti klien redis dalam memori (get / setex / delete / scan_iter)
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, blob):
+        self.data[key] = blob.encode("utf-8") if isinstance(blob, str) else blob
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def scan_iter(self, pattern):
+        return [key for key in list(self.data) if key.startswith(pattern.rstrip("*"))]
+
+def _redis_backend():
+    from result_cache import RedisBackend
+    return RedisBackend("redis://unused", client=_FakeRedis())
+
+def test_redis_backend_returns_wallet_results():
+    from wallet_result import TxSummary
+    backend = _redis_backend()
+    value = api_handler._normalize_result(ADDRESS, "Bitcoin", balance=1.5, tx_count=3, wallet_age_days=40,
+                                          last5tx=[TxSummary("ab" * 32, 1_700_000_000, "a", "b", "0.1 BTC")])
+    backend.set("btc:" + ADDRESS, value, 123.0, 60)
+    stored_at, cached = backend.get("btc:" + ADDRESS)
+    assert stored_at == 123.0
+    # Jenis sama seperti LocalBackend
+    local = LocalBackend()
+    local.set("btc:" + ADDRESS, value, time.time(), 60)
+    assert isinstance(cached, type(local.get("btc:" + ADDRESS)[1]))
+    assert cached.to_dict() == value.to_dict()
+    assert cached.last5tx[0].time == 1_700_000_000
+
+    backend.set("raw", {"status": "1"}, 1.0, 60)
+    assert backend.get("raw") == (1.0, {"status": "1"})
+    backend.clear()
+    assert backend.get("raw") is None
+
+def test_redis_backend_treats_corrupt_values_as_miss():
+    backend = _redis_backend()
+    for blob in (b"not json", b"[1, 2]", b'{"t": 1}', b'{"t": 1, "w": [1]}'):
+        backend._redis.data["adc:result:btc:x"] = blob
+        assert backend.get("btc:x") is None
+    cache = ResultCache(backend)
+    assert cache.get_or_fetch("btc", "x", lambda: {"tx_count": 1}) == {"tx_count": 1}
+
+def test_redis_backend_requires_package(monkeypatch):
+    import sys
+    from result_cache import RedisBackend
+    monkeypatch.setitem(sys.modules, "redis", None)
+    with pytest.raises(RuntimeError, match="pip install redis"):
+        RedisBackend("redis://localhost")
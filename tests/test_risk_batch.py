@@ -0,0 +1,44 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from ai_risk import calculate_risk_score
+from api_handler import _score
+from risk_batch import ai_scores, columns_from_results, score_batch
+
+# Grid termasuk sempadan: umur x/30 tepat .5 (round half-even), tx di sekitar 5 dan 100,
+# balance sifar / di bawah 0.01 / di atas 1, dan nilai negatif atau tiada
+BALANCES = [0.0, -1.0, 0.005, 0.01, 0.5, 1.0, 1.0000001, 250.0]
+TX_COUNTS = [0, 1, 2, 3, 4, 5, 6, 99, 100, 101, 10_000, -3]
+AGES = [0.0, 0.5, 14.999, 15.0, 15.001, 29.99, 45.0, 75.0, 135.0, 599.0, 600.0, 615.0, 10_000.0, -45.0]
+
+GRID = list(itertools.product(BALANCES, TX_COUNTS, AGES))
+
+def test_ai_scores_equal_score_exactly():
+    balance, tx_count, wallet_age = (list(col) for col in zip(*GRID))
+    batch = ai_scores(balance, tx_count, wallet_age)
+    expected = [_score({"balance": b, "tx_count": t, "wallet_age": a}) for b, t, a in GRID]
+    assert batch.dtype == np.int64
+    assert batch.tolist() == expected
+
+def test_columns_coerce_like_score():
+    results = [
+        {"balance": None, "tx_count": "7", "wallet_age": None, "network": "Bitcoin"},
+        {"balance": "0.5", "tx_count": 3.9, "wallet_age": "45"},
+        {},
+    ]
+    balance, tx_count, wallet_age, network = columns_from_results(results)
+    assert network == ["Bitcoin", "", ""]
+    assert ai_scores(balance, tx_count, wallet_age).tolist() == [_score(r) for r in results]
+
+def test_score_batch_matches_calculate_risk_score():
+    balance, tx_count, wallet_age = (list(col) for col in zip(*GRID))
+    batch = score_batch(balance, tx_count, wallet_age)
+    for i, (b, t, a) in enumerate(GRID):
+        score, reasons = calculate_risk_score({"balance": b, "tx_count": t, "wallet_age": a})
+        assert (int(batch.risk_score[i]), batch.reasons(i)) == (score, reasons)
+
+def test_score_batch_rejects_ragged_columns():
+    with pytest.raises(ValueError):
+        score_batch([1.0], [1, 2], [0.0])
@@ -0,0 +1,36 @@
+import time
+
+from usage_counter import TOTAL_REQUESTS, SQLiteBackend, UsageCounter
+
+def _wait_for(fn, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if fn():
+            return True
+        time.sleep(0.01)
+    return fn()
+
+def test_read_only_worker_sees_other_writers(tmp_path):
+    path = str(tmp_path / "usage.sqlite3")
+    writer = UsageCounter(SQLiteBackend(path), flush_interval=60)
+    # Worker yang hanya melayan GET /api/usage: tiada incr/record
+    reader = UsageCounter(SQLiteBackend(path), flush_interval=0.05)
+    try:
+        assert reader.snapshot()[TOTAL_REQUESTS] == 0
+        writer.record(network="eth", validated=True)
+        writer.flush()
+        assert _wait_for(lambda: reader.get(TOTAL_REQUESTS) == 1)
+        assert reader.snapshot()["chains_touched"] == {"eth": 1}
+    finally:
+        writer.close()
+        reader.close()
+
+def test_pending_writes_are_visible_locally(tmp_path):
+    counter = UsageCounter(SQLiteBackend(str(tmp_path / "usage.sqlite3")), flush_interval=60)
+    try:
+        counter.record(network="btc", high_risk=True)
+        assert counter.get(TOTAL_REQUESTS) == 1
+        counter.flush()
+        assert counter.snapshot()["high_risk_flags"] == 1
+    finally:
+        counter.close()
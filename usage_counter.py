@@ -0,0 +1,223 @@
+from __future__ import annotations
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: tiada flock, rename atomik masih digunakan
+    fcntl = None
+
+# Kiraan agregat sahaja (lihat docs/security/DATAFLOW.md): tiada address disimpan.
+# Setiap worker kumpul kenaikan dalam memori dan flush secara berkala ke
+# backend dikongsi (SQLite atau fail JSON tulis-kemudian-rename).
+USAGE_BACKEND = os.environ.get("USAGE_BACKEND", "sqlite")
+USAGE_DB_PATH = os.environ.get("USAGE_DB_PATH", os.path.join("instance", "usage.sqlite3"))
+USAGE_FILE_PATH = os.environ.get("USAGE_FILE_PATH", os.path.join("instance", "usage.json"))
+LEGACY_USER_COUNT_FILE = os.path.join("static", "user_count.txt")
+FLUSH_INTERVAL = float(os.environ.get("USAGE_FLUSH_INTERVAL", "5"))
+FLUSH_EVERY = int(os.environ.get("USAGE_FLUSH_EVERY", "200"))
+
+USERS_VALIDATED = "users_validated"
+TOTAL_REQUESTS = "total_requests"
+HIGH_RISK_FLAGS = "high_risk_flags"
+CHAIN_PREFIX = "chain:"
+
+def _legacy_seed(path: str = LEGACY_USER_COUNT_FILE) -> Dict[str, int]:
+    try:
+        with open(path) as f:
+            return {USERS_VALIDATED: int((f.read() or "0").strip())}
+    except (ValueError, OSError):
+        return {}
+
+class SQLiteBackend:
+    def __init__(self, path: str = USAGE_DB_PATH, seed: Optional[Dict[str, int]] = None):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            # INSERT OR IGNORE: seed sekali sahaja walaupun banyak worker mula serentak
+            conn.executemany("INSERT OR IGNORE INTO counters (name, value) VALUES (?, ?)", (seed or {}).items())
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def add(self, deltas: Dict[str, int]) -> Dict[str, int]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                deltas.items(),
+            )
+            totals = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            conn.execute("COMMIT")
+            return totals
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def read(self) -> Dict[str, int]:
+        conn = self._connect()
+        try:
+            return dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        finally:
+            conn.close()
+
+class FileBackend:
+    # JSON ditulis ke fail sementara kemudian os.replace (atomik); flock
+    # pada fail .lock mengelak kenaikan hilang antara worker.
+    def __init__(self, path: str = USAGE_FILE_PATH, seed: Optional[Dict[str, int]] = None):
+        self.path = path
+        self.seed = dict(seed or {})
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _load(self) -> Dict[str, int]:
+        try:
+            with open(self.path) as f:
+                return {k: int(v) for k, v in json.load(f).items()}
+        except FileNotFoundError:
+            return dict(self.seed)
+        except (ValueError, OSError, AttributeError):
+            return {}
+
+    def add(self, deltas: Dict[str, int]) -> Dict[str, int]:
+        with open(self.path + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            totals = Counter(self._load())
+            totals.update(deltas)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(dict(totals), f, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            return dict(totals)
+
+    def read(self) -> Dict[str, int]:
+        return self._load()
+
+class UsageCounter:
+    def __init__(self, backend, flush_interval: float = FLUSH_INTERVAL, flush_every: int = FLUSH_EVERY):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self._pending: Counter = Counter()
+        self._pending_ops = 0
+        self._persisted: Dict[str, int] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._stop = threading.Event()
+        atexit.register(self.flush)
+
+    def incr(self, name: str, n: int = 1) -> None:
+        self._ensure_flusher()
+        with self._lock:
+            self._pending[name] += n
+            self._pending_ops += 1
+            due = self._pending_ops >= self.flush_every
+        if due:
+            self.flush()
+
+    def record(self, network: Optional[str] = None, high_risk: bool = False, validated: bool = False) -> None:
+        # Satu validation request: kemas kini semua metrik agregat serentak
+        self._ensure_flusher()
+        with self._lock:
+            self._pending[TOTAL_REQUESTS] += 1
+            if validated:
+                self._pending[USERS_VALIDATED] += 1
+            if network:
+                self._pending[CHAIN_PREFIX + network] += 1
+            if high_risk:
+                self._pending[HIGH_RISK_FLAGS] += 1
+            self._pending_ops += 1
+            due = self._pending_ops >= self.flush_every
+        if due:
+            self.flush()
+
+    def get(self, name: str) -> int:
+        # Nilai terakhir yang diflush (termasuk worker lain) + kenaikan tempatan.
+        # Flusher dimulakan juga di sini: worker yang hanya membaca tetap membaca semula jumlah backend
+        self._ensure_flusher()
+        if not self._loaded:
+            self._refresh()
+        with self._lock:
+            return self._persisted.get(name, 0) + self._pending.get(name, 0)
+
+    def snapshot(self) -> Dict[str, object]:
+        self._ensure_flusher()
+        if not self._loaded:
+            self._refresh()
+        with self._lock:
+            totals = Counter(self._persisted)
+            totals.update(self._pending)
+        return {
+            USERS_VALIDATED: totals.get(USERS_VALIDATED, 0),
+            TOTAL_REQUESTS: totals.get(TOTAL_REQUESTS, 0),
+            HIGH_RISK_FLAGS: totals.get(HIGH_RISK_FLAGS, 0),
+            "chains_touched": {k[len(CHAIN_PREFIX):]: v for k, v in sorted(totals.items()) if k.startswith(CHAIN_PREFIX)},
+        }
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                deltas = {k: v for k, v in self._pending.items() if v}
+                self._pending.clear()
+                self._pending_ops = 0
+            try:
+                totals = self.backend.add(deltas) if deltas else self.backend.read()
+            except Exception:
+                # Backend gagal: pulangkan kenaikan supaya dicuba lagi nanti
+                with self._lock:
+                    self._pending.update(deltas)
+                return
+            with self._lock:
+                self._persisted = totals
+                self._loaded = True
+
+    def close(self) -> None:
+        self._stop.set()
+        self.flush()
+
+    def _refresh(self) -> None:
+        try:
+            totals = self.backend.read()
+        except Exception:
+            totals = {}
+        with self._lock:
+            self._persisted = totals
+            self._loaded = True
+
+    def _ensure_flusher(self) -> None:
+        # Thread flush dimulakan per proses (selepas fork gunicorn)
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+        threading.Thread(target=self._run, name="usage-flush", daemon=True).start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+def build_usage_counter() -> UsageCounter:
+    seed = _legacy_seed()
+    if USAGE_BACKEND == "file":
+        return UsageCounter(FileBackend(USAGE_FILE_PATH, seed))
+    return UsageCounter(SQLiteBackend(USAGE_DB_PATH, seed))
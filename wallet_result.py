@@ -0,0 +1,129 @@
+from __future__ import annotations
+import sys
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+# Perwakilan padat hasil validate untuk cache dan buffer job: objek __slots__
+# (tiada __dict__ per objek), timestamp tx sebagai epoch integer, hash hex
+# sebagai bytes. Format dict lama (templat, ISO export, JSON API) hanya
+# dibina oleh to_dict() di sempadan.
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+def epoch(t: Any, millis: bool = False) -> Any:
+    """Timestamp provider -> epoch saat (int); nilai bukan nombor dikekalkan.
+
+    millis=True: nilai > 1e12 dianggap milisaat (TRON).
+    """
+    if isinstance(t, bool) or not isinstance(t, (int, float)):
+        return t
+    return int(t / 1000 if millis and t > 1e12 else t)
+
+def format_time(t: Any) -> Any:
+    # Sama seperti format lama: hanya nombor bukan sifar diformat
+    if t and isinstance(t, int) and not isinstance(t, bool):
+        return time.strftime(TIME_FORMAT, time.gmtime(t))
+    return t
+
+def _pack_hash(h: str) -> Union[str, bytes]:
+    # Hash hex huruf kecil (BTC, TRON, EVM) disimpan sebagai bytes mentah
+    # (separuh saiz); hash lain (base58 Solana, hex huruf besar XRP) kekal str
+    if len(h) % 2 == 0 and h:
+        try:
+            raw = bytes.fromhex(h)
+        except ValueError:
+            return h
+        if raw.hex() == h:
+            return raw
+    return h
+
+class TxSummary:
+    __slots__ = ("_hash", "time", "sender", "receiver", "value")
+
+    def __init__(self, hash: str = "", time: Any = None, sender: Any = "-", receiver: Any = "-", value: Any = "-"):
+        self._hash = _pack_hash(hash) if isinstance(hash, str) else hash
+        self.time = time
+        self.sender = sender
+        self.receiver = receiver
+        self.value = value
+
+    @property
+    def hash(self) -> str:
+        h = self._hash
+        return h.hex() if isinstance(h, bytes) else h
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"hash": self.hash, "time": format_time(self.time), "from": self.sender,
+                "to": self.receiver, "value": self.value}
+
+    def __reduce__(self):
+        return TxSummary, (self.hash, self.time, self.sender, self.receiver, self.value)
+
+    def __repr__(self) -> str:
+        return f"TxSummary(hash={self.hash!r}, time={self.time!r})"
+
+class WalletResult:
+    __slots__ = ("address", "network", "balance", "tx_count", "wallet_age", "last5tx", "reason", "ai_score",
+                 "evm_networks", "incomplete_fields", "tx_count_is_lower_bound")
+
+    def __init__(self, address: str, network: str, balance: float = 0.0, tx_count: int = 0,
+                 wallet_age: float = 0, last5tx: Sequence[TxSummary] = (), reason: str = "OK", ai_score: int = 0,
+                 evm_networks: Optional[Sequence[Dict[str, Any]]] = None,
+                 incomplete_fields: Optional[Sequence[str]] = None, tx_count_is_lower_bound: bool = False):
+        self.address = address
+        self.network = network
+        self.balance = balance
+        self.tx_count = tx_count
+        self.wallet_age = wallet_age
+        self.last5tx: Tuple[TxSummary, ...] = tuple(last5tx)
+        self.reason = reason
+        self.ai_score = ai_score
+        self.evm_networks = tuple(evm_networks) if evm_networks is not None else None
+        self.incomplete_fields = tuple(incomplete_fields) if incomplete_fields else None
+        # True: paginator berhenti awal, tx_count ialah had bawah (bukan jumlah tepat)
+        self.tx_count_is_lower_bound = tx_count_is_lower_bound
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Susunan kunci sama dengan _normalize_result lama (ETag bergantung pada bait JSON)
+        out: Dict[str, Any] = {
+            "address": self.address,
+            "network": self.network,
+            "balance": self.balance,
+            "tx_count": self.tx_count,
+            "wallet_age": self.wallet_age,
+            "last5tx": [tx.to_dict() for tx in self.last5tx],
+            "reason": self.reason,
+            "ai_score": self.ai_score,
+        }
+        if self.evm_networks is not None:
+            out["evm_networks"] = [dict(entry) for entry in self.evm_networks]
+        if self.incomplete_fields:
+            out["incomplete_fields"] = list(self.incomplete_fields)
+        if self.tx_count_is_lower_bound:
+            out["tx_count_is_lower_bound"] = True
+        return out
+
+    def __reduce__(self):
+        return WalletResult, tuple(getattr(self, name) for name in WalletResult.__slots__)
+
+    def __repr__(self) -> str:
+        return f"WalletResult(address={self.address!r}, network={self.network!r}, tx_count={self.tx_count!r})"
+
+    def nbytes(self) -> int:
+        """Anggaran memori (objek + tuple + TxSummary + nilai tidak dikongsi)."""
+        size = sys.getsizeof(self) + sys.getsizeof(self.last5tx) + sys.getsizeof(self.address)
+        size += sys.getsizeof(self.balance) + sys.getsizeof(self.wallet_age)
+        for tx in self.last5tx:
+            size += sys.getsizeof(tx) + sys.getsizeof(tx._hash) + sys.getsizeof(tx.time)
+            for value in (tx.sender, tx.receiver, tx.value):
+                if value != "-":
+                    size += sys.getsizeof(value)
+        if self.evm_networks is not None:
+            size += sys.getsizeof(self.evm_networks) + sum(sys.getsizeof(e) for e in self.evm_networks)
+        return size
+
+# Hasil dalaman fetcher: WalletResult, atau dict ralat {"status": "0", ...}
+Result = Union[WalletResult, Dict[str, Any]]
+
+def as_dict(value: Any) -> Any:
+    # Sempadan: WalletResult -> dict; hasil ralat (dict) dipulangkan terus
+    return value.to_dict() if isinstance(value, WalletResult) else value